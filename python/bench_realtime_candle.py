@@ -0,0 +1,1178 @@
+"""
+RealtimeCandleManager 성능 벤치마크
+
+실제 KIS 접속 없이 합성(synthetic) H0STCNT0 프레임을 만들어
+틱 파싱 → 분봉 집계 경로의 처리량을 측정합니다.
+--e2e를 주면 로컬 KIS 시뮬레이터(kis_simulator)에 실제 WebSocket으로 접속해
+수신 처리량, 틱→콜백 지연 분위수, 종목당 메모리, 재연결 시간을 측정합니다.
+분봉 백필은 항상 시뮬레이터의 REST 분봉 조회(초당 건수 제한 포함)로 측정합니다.
+
+사용법:
+    python bench_realtime_candle.py
+    python bench_realtime_candle.py --symbols 500 --frames 20000
+    python bench_realtime_candle.py --e2e --symbols 200 --rate 50 --duration 10 --json out.json
+    python bench_realtime_candle.py --parser bytes          # 파서 백엔드 지정 (auto/python/bytes)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import sys
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from candle_ipc import TICK, CandleFeedClient, CandlePublisher
+from candle_parser import (
+    JSON_BACKEND,
+    PARSERS,
+    loads_json,
+    recv_supports_bytes,
+    run,
+)
+from candle_orderbook import OrderBookDecoder
+from kis_simulator import KisSimulator, make_book_record, make_frame, make_record
+from realtime_candle import (
+    CandleBar,
+    CandleRing,
+    RealtimeCandleManager,
+    SessionDate,
+    StockCandleBuffer,
+    SymbolTable,
+    TieredHistory,
+    candles_to_json,
+    decode_tick_frame,
+    to_epoch_minute,
+    to_epoch_second,
+)
+
+
+# ──────────────────────────────────────────────
+# 합성 데이터 생성
+# ──────────────────────────────────────────────
+def make_frames(
+    codes: list[str],
+    n_frames: int,
+    records_per_frame: int,
+    start_seconds: int = 9 * 3600,
+    ticks_per_second: int = 1000,
+    seed: int = 42,
+) -> list[str]:
+    """
+    종목 목록에 대해 시간 순으로 진행되는 멀티 레코드 프레임 생성.
+    ticks_per_second 만큼의 레코드마다 체결 시각이 1초 진행된다.
+    """
+    rng = random.Random(seed)
+    prices = {code: rng.randint(1_000, 500_000) for code in codes}
+    acml = {code: 0 for code in codes}
+    frames: list[str] = []
+    seq = 0
+    for _ in range(n_frames):
+        records = []
+        for _ in range(records_per_frame):
+            code = codes[rng.randrange(len(codes))]
+            prices[code] = max(1, prices[code] + rng.randint(-5, 5) * 10)
+            sec = start_seconds + seq // ticks_per_second
+            hhmmss = f"{sec // 3600:02d}{sec // 60 % 60:02d}{sec % 60:02d}"
+            qty = rng.randint(1, 500)
+            acml[code] += qty
+            records.append(make_record(
+                code, hhmmss, prices[code], qty,
+                side=1 if qty % 2 else 5, strength=100.0 + qty % 50, acml_vol=acml[code],
+            ))
+            seq += 1
+        frames.append(make_frame(records))
+    return frames
+
+
+# ──────────────────────────────────────────────
+# 벤치마크
+# ──────────────────────────────────────────────
+def bench_parse(
+    n_symbols: int,
+    n_frames: int,
+    records_per_frame: int,
+    metrics: bool = False,
+    extended: bool = False,
+    parser: str = "python",
+) -> dict:
+    """
+    _parse_tick 처리량 측정 (콜백 없음, metrics=True면 계측 켠 상태,
+    extended=True면 확장 필드 디코딩·집계 후 분봉별 매수+매도 = 거래량, VWAP ∈ [저가, 고가] 확인,
+    parser: 파서 백엔드 — bytes 파서면 recv(decode=False)처럼 UTF-8 bytes 프레임을 넣는다)
+    """
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    frames = make_frames(codes, n_frames, records_per_frame)
+
+    manager = RealtimeCandleManager(
+        app_key="bench", app_secret="bench", max_per_session=n_symbols,
+        metrics=metrics, extended=extended, parser=parser,
+    )
+    for code in codes:
+        manager.add_stock(code)
+    if manager.parser.binary:
+        frames = [raw.encode("utf-8") for raw in frames]
+
+    parse = manager._parse_tick
+    t0 = time.perf_counter()
+    for raw in frames:
+        parse(raw)
+    elapsed = time.perf_counter() - t0
+
+    records = n_frames * records_per_frame
+    assert manager._tick_count == records, (manager._tick_count, records)
+    if extended:
+        for code in codes:
+            for bar in manager.get_candles(code):
+                if bar.trade_count:
+                    assert bar.buy_volume + bar.sell_volume == bar.volume, bar
+                    assert bar.low <= bar.vwap <= bar.high, bar
+    return {
+        "parser": manager.parser.name,
+        "records_per_frame": records_per_frame,
+        "frames": n_frames,
+        "records": records,
+        "elapsed_s": elapsed,
+        "frames_per_s": n_frames / elapsed,
+        "records_per_s": records / elapsed,
+    }
+
+
+def bench_parsers(n_symbols: int, n_frames: int, records: list[int], repeat: int = 3) -> dict:
+    """
+    파서 백엔드 비교: 백엔드별 _parse_tick 처리량 (레코드/프레임별 repeat회 중 최고,
+    설치된 websockets로 쓸 수 없는 binary 파서는 생략), 제어 프레임(PINGPONG) JSON
+    파싱 시간 (결과 일치는 tests/test_parser_conformance.py)
+    """
+    rows = []
+    usable = [name for name, cls in PARSERS.items() if not cls.binary or recv_supports_bytes()]
+    for n in records:
+        for name in usable:
+            best = max(
+                (bench_parse(n_symbols, n_frames, n, parser=name) for _ in range(repeat)),
+                key=lambda r: r["records_per_s"],
+            )
+            rows.append(best)
+
+    ping = json.dumps(
+        {"header": {"tr_id": "PINGPONG", "datetime": "20250101093000"}}
+    ).encode("utf-8")
+    loops = 100_000
+    json_us = {}
+    for label, loads in (("json", json.loads), (JSON_BACKEND, loads_json)):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            loads(ping)
+        json_us[label] = (time.perf_counter() - t0) / loops * 1e6
+    return {"rows": rows, "json_backend": JSON_BACKEND, "json_us": json_us}
+
+
+def bench_trade_time(n_ticks: int = 200_000, ticks_per_second: int = 20) -> dict:
+    """
+    틱당 체결시각 처리 비용 비교 (HHMMSS 문자열 → 분 키).
+      datetime : datetime.now().date() + 슬라이스 3회 + datetime() + replace() + epoch 변환
+      int      : SessionDate 캐시 + 정수 연산 (같은 HHMMSS는 재사용), 분 키 = second // 60
+    """
+    texts = []
+    for i in range(n_ticks):
+        sec = 9 * 3600 + i // ticks_per_second
+        texts.append(f"{sec // 3600:02d}{sec // 60 % 60:02d}{sec % 60:02d}")
+
+    t0 = time.perf_counter()
+    for text in texts:
+        today = datetime.now().date()
+        dt = datetime(
+            today.year, today.month, today.day,
+            int(text[:2]), int(text[2:4]), int(text[4:6]),
+        )
+        to_epoch_minute(dt.replace(second=0, microsecond=0))
+    legacy_s = time.perf_counter() - t0
+
+    session_date = SessionDate()
+    t0 = time.perf_counter()
+    day_base, now_sod = session_date.current()
+    last = None
+    second = 0
+    for text in texts:
+        if text != last:
+            v = int(text)
+            second = day_base + v // 10000 * 3600 + v // 100 % 100 * 60 + v % 100
+            last = text
+        second // 60
+    int_s = time.perf_counter() - t0
+
+    return {
+        "datetime_ns": legacy_s / n_ticks * 1e9,
+        "int_ns": int_s / n_ticks * 1e9,
+    }
+
+
+def bench_history(n_symbols: int, n_bars: int, max_history: int = 1440) -> dict:
+    """
+    완성 분봉 보관 구조 비교: 기존 deque[CandleBar] vs CandleRing.
+    종목당 n_bars개를 추가하여 메모리(tracemalloc)와 추가·조회 시간을 측정한다.
+    """
+    base = datetime(2025, 1, 2, 9, 0)
+    minutes = [base + timedelta(minutes=i) for i in range(n_bars)]
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+
+    def run_deque() -> tuple[list, float]:
+        stores = []
+        t0 = time.perf_counter()
+        for code in codes:
+            d: deque[CandleBar] = deque(maxlen=max_history)
+            for dt in minutes:
+                d.append(CandleBar(code, dt, 100.0, 101.0, 99.0, 100.5, 1000, 10, True))
+            stores.append(d)
+        return stores, time.perf_counter() - t0
+
+    def run_ring(extended: bool = False) -> tuple[list, float]:
+        stores = []
+        keys = [to_epoch_minute(dt) for dt in minutes]
+        extra = (600, 400, 100_500.0, 100.0, 101.0, 120.0) if extended else None
+        t0 = time.perf_counter()
+        for code in codes:
+            r = CandleRing(code, max_history, extended)
+            for m in keys:
+                r.append(m, 100.0, 101.0, 99.0, 100.5, 1000, 10, extra)
+            stores.append(r)
+        return stores, time.perf_counter() - t0
+
+    results = {}
+    for name, run, tail in (
+        ("deque", run_deque, lambda d: list(d)[-5:]),
+        ("ring", run_ring, lambda r: r.tail_columns(5)),
+        ("ring+x", lambda: run_ring(extended=True), lambda r: r.tail_columns(5)),
+    ):
+        gc.collect()
+        tracemalloc.start()
+        stores, append_s = run()
+        mem, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        gc.collect()
+        t0 = time.perf_counter()
+        gc.collect()
+        gc_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for store in stores:
+            tail(store)
+        tail_s = time.perf_counter() - t0
+
+        results[name] = {
+            "bytes_per_bar": mem / (n_symbols * min(n_bars, max_history)),
+            "append_per_s": n_symbols * n_bars / append_s,
+            "tail5_us": tail_s / n_symbols * 1e6,
+            "gc_ms": gc_s * 1e3,
+        }
+        del stores
+    return results
+
+
+def bench_range(days: int = 7, queries: int = 2000) -> dict:
+    """
+    한 종목 days일치 1분봉을 TieredHistory(1분봉 1일 + 5분봉 days일)에 넣고
+    30분 구간 조회를 선형 스캔(CandleView 전체 복사 후 필터)과 이진 탐색(range_columns)으로
+    비교한다. 메모리는 같은 기간을 1분봉 링으로 보관할 때와 비교한다.
+    """
+    total = days * 1440
+    tiered = TieredHistory("000001", 1440, (("5m", days * 1440),))
+    plain = CandleRing("000001", total)
+    base = to_epoch_minute(datetime(2025, 1, 2))
+    for m in range(base, base + total):
+        tiered.append(m, 100.0, 101.0, 99.0, 100.5, 1000, 10)
+        plain.append(m, 100.0, 101.0, 99.0, 100.5, 1000, 10)
+    usage = tiered.usage
+    assert usage["compacted"] == total - 1440 and usage["evicted"] == 0, usage
+    assert sum(tiered.range_columns()["volume"]) == total * 1000
+
+    rng = random.Random(1)
+    starts = [base + rng.randrange(total - 30) for _ in range(queries)]
+    t0 = time.perf_counter()
+    for start in starts:
+        c = plain.tail_columns()
+        [m for m in c["minute"] if start <= m < start + 30]
+    scan_us = (time.perf_counter() - t0) / queries * 1e6
+    t0 = time.perf_counter()
+    for start in starts:
+        plain.range_columns(start, start + 30)
+    bisect_us = (time.perf_counter() - t0) / queries * 1e6
+    t0 = time.perf_counter()
+    for start in starts:
+        tiered.range_columns(start, start + 30)
+    tiered_us = (time.perf_counter() - t0) / queries * 1e6
+    return {
+        "days": days,
+        "scan_us": scan_us,
+        "bisect_us": bisect_us,
+        "tiered_us": tiered_us,
+        "tiered_bytes": tiered.memory_bytes,
+        "plain_bytes": plain.memory_bytes,
+        "compacted": usage["compacted"],
+    }
+
+
+@dataclass
+class _DictBar:
+    """슬롯 없는 CandleBar (bench_hotpath 비교 기준, to_dict는 asdict 기반)"""
+
+    stock_code: str
+    dt: datetime
+    open: float = 0.0
+    high: float = 0.0
+    low: float = 0.0
+    close: float = 0.0
+    volume: int = 0
+    trade_count: int = 0
+    is_closed: bool = False
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["dt"] = self.dt.strftime("%Y-%m-%d %H:%M:%S")
+        return d
+
+
+def bench_hotpath(n_symbols: int = 200, n_frames: int = 5_000, n_bars: int = 1440) -> dict:
+    """
+    핫패스 객체 비교: 캔들 객체 크기(슬롯 vs __dict__), to_dict vs dataclasses.asdict,
+    candles_to_json(컬럼 직접 직렬화) vs 캔들별 to_dict + json.dumps,
+    디코딩 튜플의 종목코드 인터닝 전후 보관 메모리·할당 블록 수
+    """
+    dt = datetime(2025, 1, 2, 9, 0)
+    bar = CandleBar("005930", dt, 100.0, 101.0, 99.0, 100.5, 1000, 10, True)
+    plain = _DictBar("005930", dt, 100.0, 101.0, 99.0, 100.5, 1000, 10, True)
+    assert bar.to_dict() == plain.to_dict()
+
+    reps = 20_000
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        bar.to_dict()
+    to_dict_us = (time.perf_counter() - t0) / reps * 1e6
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        plain.to_dict()
+    asdict_us = (time.perf_counter() - t0) / reps * 1e6
+
+    buf = StockCandleBuffer("005930", max_history=n_bars)
+    base = to_epoch_second(dt)
+    buf.on_ticks([(100.0 + i % 7, 10, base + i * 60) for i in range(n_bars)])
+    view = buf.get_all_candles()
+    expected = json.dumps([b.to_dict() for b in view], separators=(",", ":"))
+    assert json.loads(candles_to_json(view)) == json.loads(expected)
+    t0 = time.perf_counter()
+    json.dumps([b.to_dict() for b in view], separators=(",", ":"))
+    per_bar_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter()
+    candles_to_json(view)
+    batch_ms = (time.perf_counter() - t0) * 1e3
+
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    frames = make_frames(codes, n_frames, 20)
+    symbols = SymbolTable()
+    for code in codes:
+        symbols.intern(code)
+    session = SessionDate()
+    decoded = {}
+    for name, table in (("plain", None), ("interned", symbols)):
+        gc.collect()
+        tracemalloc.start()
+        kept = [decode_tick_frame(raw, session, symbols=table) for raw in frames]
+        mem, _ = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        tracemalloc.stop()
+        decoded[name] = {"bytes_per_tick": mem / (n_frames * 20), "blocks_per_tick": blocks / (n_frames * 20)}
+        del kept
+
+    return {
+        "bar_bytes": sys.getsizeof(bar),
+        "dict_bar_bytes": sys.getsizeof(plain) + sys.getsizeof(plain.__dict__),
+        "to_dict_us": to_dict_us,
+        "asdict_us": asdict_us,
+        "bars": len(view),
+        "json_per_bar_ms": per_bar_ms,
+        "json_batch_ms": batch_ms,
+        "decoded": decoded,
+    }
+
+
+def bench_journal(n_symbols: int, n_frames: int, records_per_frame: int = 5) -> dict:
+    """
+    TickJournalWriter 기록 속도와 JournalReplay 최대 속도 재생(저널 읽기 + 압축 해제 +
+    _parse_tick) 처리량 측정 (재생 결과 검증은 tests/test_journal.py)
+    """
+    import os
+
+    from tick_journal import JournalReplay, TickJournalWriter
+
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    ticks_per_second = 100  # 여러 분에 걸치도록 (분봉 마감 포함)
+    frames = make_frames(codes, n_frames, records_per_frame, ticks_per_second=ticks_per_second)
+    record_day = datetime(2025, 1, 2)
+    base_ns = int(record_day.replace(hour=9).timestamp() * 1e9)
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "bench.journal")
+        writer = TickJournalWriter(path)
+        t0 = time.perf_counter()
+        for i, raw in enumerate(frames):
+            # 수신 시각 = 프레임 첫 체결 시각 + 프레임 번호(µs), 체결시각과 같은 날
+            sec = i * records_per_frame // ticks_per_second
+            writer.record(raw, base_ns + sec * 1_000_000_000 + i * 1000)
+        writer.close()
+        record_s = time.perf_counter() - t0
+
+        manager = RealtimeCandleManager(
+            app_key="bench", app_secret="bench", max_per_session=n_symbols
+        )
+        for code in codes:
+            manager.add_stock(code)
+        replay = JournalReplay(path)
+        replay.run_sync(manager)
+
+    return {
+        "record_per_s": n_frames / record_s,
+        "replay_per_s": replay.frames / replay.elapsed,
+        "compression_ratio": writer.stats["compression_ratio"],
+    }
+
+
+def bench_indicators(n_bars: int) -> Optional[dict]:
+    """
+    스트리밍 지표(IndicatorEngine) 분봉당 갱신 비용과 배치 재계산 비용 비교
+    (numpy 없으면 None, 결과 일치는 tests/test_indicators.py)
+    """
+    from candle_indicators import (
+        ATR, EMA, RSI, SMA, VWAP, Bollinger, IndicatorEngine, batch_indicators, np,
+    )
+
+    if np is None:
+        return None
+
+    rng = random.Random(7)
+    # 이력이 덮어써지지 않도록 용량을 넉넉히 (배치는 보관된 전체 이력 기준)
+    buf = StockCandleBuffer("000000", max_history=n_bars * 2)
+    indicators = [SMA(20), EMA(12), RSI(14), ATR(14), VWAP(), Bollinger(20, 2.0)]
+    IndicatorEngine(buf, indicators, history=n_bars * 2)  # 버퍼 리스너로 등록되어 틱마다 갱신
+
+    t = datetime(2025, 1, 2, 9, 0)
+    price = 50_000
+    ticks = []
+    for _ in range(n_bars * 4):
+        t += timedelta(seconds=rng.choice((5, 15, 25)))
+        price = max(1, price + rng.randint(-50, 50))
+        ticks.append((float(price), rng.randint(1, 300), t))
+
+    t0 = time.perf_counter()
+    for price_, qty, trade_time in ticks:
+        buf.on_tick(price_, qty, trade_time)
+    stream_s = time.perf_counter() - t0
+
+    view = buf.get_history()
+    t0 = time.perf_counter()
+    batch = batch_indicators(view, indicators)
+    batch_s = time.perf_counter() - t0
+
+    return {
+        "bars": len(view),
+        "stream_us_per_tick": stream_s / len(ticks) * 1e6,
+        "batch_ms": batch_s * 1e3,
+    }
+
+
+def bench_reads(n_symbols: int, duration: float = 1.0, readers: int = 2) -> dict:
+    """
+    대시보드형 폴링 부하: 쓰기 스레드 1개가 전 종목에 틱을 넣는 동안
+    읽기 스레드 readers개가 get_all_candles(5)를 반복 호출한다.
+    읽기 없이 쓸 때와 비교한 쓰기 처리량, 초당 읽기 수, 일관성 위반 수를 측정한다.
+    """
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    base = datetime(2025, 1, 2, 9, 0)
+
+    def run(n_readers: int) -> tuple[float, float, int]:
+        buffers = [StockCandleBuffer(code, 1440) for code in codes]
+        stop = threading.Event()
+        reads = [0] * n_readers
+        violations = [0] * n_readers
+
+        def writer(counter: list) -> None:
+            i = 0
+            while not stop.is_set():
+                t = base + timedelta(seconds=i // n_symbols * 3)
+                buffers[i % n_symbols].on_tick(100.0 + i % 7, 1, t)
+                i += 1
+            counter.append(i)
+
+        def reader(k: int) -> None:
+            j = 0
+            while not stop.is_set():
+                view = buffers[j % n_symbols].get_all_candles(5)
+                minutes = view.columns["minute"]
+                for a, b in zip(minutes, minutes[1:]):
+                    if b != a + 1:
+                        violations[k] += 1
+                j += 1
+            reads[k] = j
+
+        written: list = []
+        threads = [threading.Thread(target=writer, args=(written,))]
+        threads += [threading.Thread(target=reader, args=(k,)) for k in range(n_readers)]
+        for th in threads:
+            th.start()
+        time.sleep(duration)
+        stop.set()
+        for th in threads:
+            th.join()
+        return written[0] / duration, sum(reads) / duration, sum(violations)
+
+    alone, _, _ = run(0)
+    contended, reads_per_s, violations = run(readers)
+    assert violations == 0, violations
+    return {
+        "ticks_per_s_alone": alone,
+        "ticks_per_s_with_readers": contended,
+        "reads_per_s": reads_per_s,
+    }
+
+
+def bench_snapshot(
+    n_symbols: int, n_frames: int, records_per_frame: int = 5, window: int = 5
+) -> dict:
+    """
+    전 종목 스캔: 종목마다 get_current() + get_history(window)로 같은 값을 계산하는
+    루프와 market_snapshot() 1회를 비교하고, 두 결과가 일치하는지 확인한다.
+    """
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    manager = RealtimeCandleManager(
+        app_key="bench", app_secret="bench", max_per_session=n_symbols,
+        snapshot_window=window,
+    )
+    for code in codes:
+        manager.add_stock(code)
+    for raw in make_frames(codes, n_frames, records_per_frame, ticks_per_second=100):
+        manager._parse_tick(raw)
+
+    def scan() -> dict[str, tuple]:
+        result = {}
+        for code in codes:
+            buf = manager.get_buffer(code)
+            cur = buf.get_current()
+            hist = buf.get_history(window)
+            if cur is None:
+                continue
+            closes, volumes = hist.columns["close"], hist.columns["volume"]
+            if len(closes) == window:
+                ref, closed_volume = closes[0], sum(volumes[1:])
+            else:
+                ref, closed_volume = math.nan, sum(volumes)
+            result[code] = (cur.close, cur.close / ref - 1, closed_volume + cur.volume)
+        return result
+
+    n = 20
+    t0 = time.perf_counter()
+    for _ in range(n):
+        expected = scan()
+    loop_us = (time.perf_counter() - t0) / n * 1e6
+    n = 2000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        snap = manager.market_snapshot()
+    snapshot_us = (time.perf_counter() - t0) / n * 1e6
+
+    for code, (last, ret, vol) in expected.items():
+        row = snap.get(code)
+        assert row["last"] == last and row["volume_n"] == vol, (code, row, last, vol)
+        assert row["return_n"] == ret or (math.isnan(ret) and math.isnan(row["return_n"])), code
+    return {"symbols": n_symbols, "loop_us": loop_us, "snapshot_us": snapshot_us}
+
+
+def bench_orderbook(n_symbols: int, n_frames: int, depth: int = 5) -> dict:
+    """
+    H0STASP0 호가 프레임 처리량 (매니저 _parse_tick → OrderBookDecoder).
+    한 종목의 분별 시간가중 스프레드를 호가 이력으로 직접 계산한 값과 비교하고,
+    워밍업 후 프레임 처리 중 남는 메모리(tracemalloc)가 없는지 확인한다.
+    """
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    books = OrderBookDecoder(depth=depth)
+    manager = RealtimeCandleManager(
+        app_key="bench", app_secret="bench", max_per_session=n_symbols * 2, decoders=[books],
+    )
+    for code in codes:
+        manager.add_stock(code)
+    rng = random.Random(7)
+    start = 9 * 3600
+    frames: list[str] = []
+    updates: list[tuple[int, int]] = []  # codes[0]의 (초, 스프레드)
+    for i in range(n_frames):
+        code = codes[rng.randrange(len(codes))]
+        sec = start + i * 600 // n_symbols // 10  # 종목당 평균 10초에 한 번
+        spread = rng.randint(1, 5) * 10
+        frames.append(make_frame([make_book_record(
+            code, f"{sec // 3600:02d}{sec // 60 % 60:02d}{sec % 60:02d}", 50_000, spread,
+            [rng.randint(1, 5_000) for _ in range(10)], [rng.randint(1, 5_000) for _ in range(10)],
+        )], "H0STASP0"))
+        if code == codes[0]:
+            updates.append((sec, spread))
+
+    # 워밍업 10% → 처리량 60% → 잔류 메모리 30% (tracemalloc은 느려서 따로 잰다)
+    warm, timed = len(frames) // 10, len(frames) * 7 // 10
+    for raw in frames[:warm]:
+        manager._parse_tick(raw)
+    t0 = time.perf_counter()
+    for raw in frames[warm:timed]:
+        manager._parse_tick(raw)
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for raw in frames[timed:]:
+        manager._parse_tick(raw)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert books.messages == n_frames and books.errors == 0, books.stats
+    # 종목별 스칼라(시각·누적값)가 새 int/float 객체로 바뀌는 만큼만 남고, 메시지 수에 비례하지 않음
+    assert retained < n_symbols * 1024, retained
+
+    # 분별 시간가중 스프레드 직접 계산 (갱신 없는 분은 직전 호가 유지)
+    stats = books.get_stats(codes[0], include_current=False)
+    day_base = (datetime.now().toordinal() - datetime(1970, 1, 1).toordinal()) * 86400
+    expected: dict[int, float] = {}
+    for (sec, spread), nxt in zip(updates, updates[1:] + [(None, None)]):
+        end = sec + 1 if nxt[0] is None else nxt[0]
+        for t in range(sec, end):
+            minute = (day_base + t) // 60
+            expected[minute] = expected.get(minute, 0.0) + spread / 60
+    for minute, spread in zip(stats["minute"], stats["spread"]):
+        first = (day_base + updates[0][0]) // 60
+        if minute == first:
+            continue  # 첫 분은 첫 호가 이전 구간이 없어 가중치가 60초보다 작다
+        assert abs(spread - expected[minute]) < 1e-6, (minute, spread, expected[minute])
+    return {
+        "symbols": n_symbols,
+        "frames": timed - warm,
+        "frames_per_s": (timed - warm) / elapsed,
+        "minutes_checked": len(stats["minute"]) - 1,
+        "retained_bytes": retained,
+        "retained_frames": n_frames - timed,
+    }
+
+
+def bench_store(n_symbols: int, n_bars: int) -> dict:
+    """
+    CandleStore 기록(분 단위 전 종목 배치) 및 mmap 구간 조회 속도 측정.
+    매니저처럼 분마다 append_many 1회, 마지막에 sync 1회를 수행한다.
+    """
+    from candle_store import CandleStore
+
+    base = datetime(2025, 1, 2, 9, 0)
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    with tempfile.TemporaryDirectory() as root:
+        store = CandleStore(root)
+        t0 = time.perf_counter()
+        for i in range(n_bars):
+            dt = base + timedelta(minutes=i)
+            store.append_many(
+                [CandleBar(code, dt, 100.0, 101.0, 99.0, 100.5, 1000, 10, True) for code in codes]
+            )
+        store.sync()
+        append_s = time.perf_counter() - t0
+        store.close()
+
+        start = base + timedelta(minutes=n_bars // 2)
+        end = start + timedelta(minutes=30)
+        t0 = time.perf_counter()
+        for code in codes:
+            view = store.read(code, base, start, end)
+        query_s = time.perf_counter() - t0
+        assert len(view) == min(30, max(0, n_bars - n_bars // 2)), len(view)
+
+    return {
+        "append_per_s": n_symbols * n_bars / append_s,
+        "query30_us": query_s / n_symbols * 1e6,
+    }
+
+
+async def bench_backfill(n_symbols: int, rate_limit: int = 20, until_hour: int = 11) -> dict:
+    """
+    시뮬레이터 REST 분봉 조회로 n_symbols 종목을 09:00 ~ until_hour시까지 백필
+    (저장소 다시 쓰기 포함, 병합 결과 검사는 tests/test_backfill.py)
+    """
+    from candle_store import CandleStore
+
+    sim = KisSimulator(rest_rate_limit=rate_limit)
+    await sim.start()
+    root = tempfile.TemporaryDirectory()
+    manager = RealtimeCandleManager(
+        app_key="bench", app_secret="bench", rest_url=sim.rest_url, auto_close=False,
+        store=CandleStore(root.name),
+    )
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    for code in codes:
+        manager.add_stock(code)
+    until = datetime.now().replace(hour=until_hour, minute=0, second=30, microsecond=0)
+
+    t0 = time.perf_counter()
+    filled = await manager.backfill(until=until)
+    elapsed = time.perf_counter() - t0
+    client_stats = manager.backfill_client.stats
+    manager.backfill_client.close()
+    await sim.stop()
+    manager.store.close()
+    root.cleanup()
+
+    return {
+        "symbols": n_symbols,
+        "rate_limit": rate_limit,
+        "elapsed_s": elapsed,
+        "bars": sum(filled.values()),
+        "requests": client_stats["requests"],
+        "retries": client_stats["retries"],
+        "requests_per_s": client_stats["requests"] / elapsed,
+    }
+
+
+async def bench_universe(n_symbols: int, rate: int = 100) -> dict:
+    """
+    연결 중 종목 구성 변경: 빈 상태에서 set_universe(n_symbols개) 후 다른 스레드에서
+    절반을 새 종목으로 바꾸는 set_universe를 요청한다. 시뮬레이터가 초당 rate건을 넘는
+    구독/해제 요청을 거절하도록 두고, 거절 없이 반영됐는지와 변경별 소요 시간을 잰다.
+    """
+    sim = KisSimulator(ticks_per_symbol=2, ws_rate_limit=rate)
+    await sim.start()
+    manager = RealtimeCandleManager(
+        app_key="bench", app_secret="bench", ws_url=sim.ws_url, rest_url=sim.rest_url,
+        sessions=math.ceil(n_symbols * 1.5 / RealtimeCandleManager.MAX_PER_SESSION),
+        subscribe_rate=rate,
+    )
+    task = asyncio.ensure_future(manager.start())
+    while sim.stats["active_sessions"] < len(manager._sessions):
+        await asyncio.sleep(0.05)
+
+    first = [f"{i:06d}" for i in range(n_symbols)]
+    second = first[n_symbols // 2:] + [f"{i:06d}" for i in range(n_symbols, n_symbols * 3 // 2)]
+    initial = await manager.set_universe(first)
+
+    # 다른 스레드의 요청 (이벤트 루프는 계속 수신)
+    changes = []
+    thread = threading.Thread(target=lambda: changes.append(manager.set_universe(second)))
+    thread.start()
+    while thread.is_alive() or not changes[0].done:
+        await asyncio.sleep(0.05)
+    replace = changes[0]
+    await asyncio.sleep(0.2)
+    stats = sim.stats
+    manager.stop()
+    await asyncio.wait_for(task, 5)
+    await sim.stop()
+
+    assert stats["subscribe_rejected"] == 0, stats
+    assert stats["subscribed"] == n_symbols, stats
+    assert sorted(manager._buffers) == sorted(second)
+    assert len(replace.added) == len(replace.removed) == n_symbols // 2, replace.stats
+    return {
+        "symbols": n_symbols,
+        "rate": rate,
+        "initial_s": initial.elapsed_s,
+        "replace_s": replace.elapsed_s,
+        "replaced": len(replace.added),
+        "requests": stats["subscribe_requests"],
+    }
+
+
+async def bench_publish(
+    n_symbols: int, n_frames: int, n_clients: int = 4, records_per_frame: int = 5
+) -> dict:
+    """
+    CandlePublisher 팬아웃: 구독자 n_clients개(짝수 번째는 전 종목, 홀수 번째는 종목 10%)에
+    _parse_tick 프레임을 발행하고 모든 틱이 도착할 때까지의 처리량을 잰다.
+    구독자가 받은 틱으로 합친 종목별 거래량이 버퍼의 거래량과 같은지 확인한다.
+    """
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+    frames = make_frames(codes, n_frames, records_per_frame)
+    manager = RealtimeCandleManager(
+        app_key="bench", app_secret="bench", max_per_session=n_symbols, auto_close=False
+    )
+    for code in codes:
+        manager.add_stock(code)
+    manager._dispatcher.start()
+    path = os.path.join(tempfile.mkdtemp(), "candle.sock")
+    publisher = CandlePublisher(manager, path, maxsize=n_frames * records_per_frame)
+    await publisher.start()
+
+    filters = [None if i % 2 == 0 else codes[:max(1, n_symbols // 10)] for i in range(n_clients)]
+    clients = []
+    for codes_i in filters:
+        client = CandleFeedClient(path)
+        await client.connect(codes_i)
+        clients.append(client)
+    while sum(1 for c in publisher._clients if c.codes) < n_clients:
+        await asyncio.sleep(0.001)
+
+    counts: dict[str, int] = {}
+    for raw in frames:
+        for tick in decode_tick_frame(raw):
+            counts[tick[0]] = counts.get(tick[0], 0) + 1
+
+    async def receive(client: CandleFeedClient, codes_i: Optional[list[str]]) -> dict:
+        expected = sum(counts.get(c, 0) for c in (codes_i or codes))
+        volumes: dict[str, int] = {}
+        n = 0
+        while n < expected:
+            for message in await client.read():
+                if isinstance(message, tuple):
+                    volumes[message[1]] = volumes.get(message[1], 0) + message[3]
+                    n += 1
+        return volumes
+
+    receivers = [asyncio.ensure_future(receive(c, f)) for c, f in zip(clients, filters)]
+    t0 = time.perf_counter()
+    for i, raw in enumerate(frames):
+        manager._parse_tick(raw)
+        if i % 64 == 0:
+            await asyncio.sleep(0)
+    results = await asyncio.gather(*receivers)
+    elapsed = time.perf_counter() - t0
+
+    for volumes, codes_i in zip(results, filters):
+        for code in codes_i or codes:
+            expected = sum(bar.volume for bar in manager.get_candles(code))
+            assert volumes.get(code, 0) == expected, (code, volumes.get(code), expected)
+    for client in clients:
+        await client.close()
+    await publisher.close()
+    manager._dispatcher.stop()
+
+    ticks = n_frames * records_per_frame
+    messages = sum(sum(counts.get(c, 0) for c in (f or codes)) for f in filters)
+    return {
+        "clients": n_clients,
+        "ticks": ticks,
+        "messages": messages,
+        "elapsed_s": elapsed,
+        "ticks_per_s": ticks / elapsed,
+        "messages_per_s": messages / elapsed,
+        "bytes_per_tick": TICK.size,
+    }
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def _wait_until(predicate, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def bench_e2e(
+    n_symbols: int,
+    rate: float,
+    duration: float,
+    records_per_frame: int = 5,
+    reconnect_timeout: float = 30.0,
+    parser: str = "python",
+) -> dict:
+    """
+    시뮬레이터 ↔ RealtimeCandleManager 종단간 측정.
+      1) 처리량·지연: duration초 동안 on_tick 수신 수와 (전송 → on_tick) 지연 분위수
+      2) 재연결: 시뮬레이터가 모든 연결을 끊은 뒤 전 종목 재구독까지 걸린 시간
+      3) 메모리: 종목 등록 + duration/2초 수신 후 tracemalloc 증가분 / 종목 수
+    """
+    sessions = max(1, math.ceil(n_symbols / RealtimeCandleManager.MAX_PER_SESSION))
+    codes = [f"{i:06d}" for i in range(n_symbols)]
+
+    def make_manager(sim: KisSimulator) -> RealtimeCandleManager:
+        manager = RealtimeCandleManager(
+            app_key="bench", app_secret="bench",
+            ws_url=sim.ws_url, rest_url=sim.rest_url, sessions=sessions, parser=parser,
+        )
+        for code in codes:
+            manager.add_stock(code)
+        return manager
+
+    # ① 처리량·지연 + ② 재연결
+    sim = KisSimulator(
+        ticks_per_symbol=rate, records_per_frame=records_per_frame, latency_probe=True
+    )
+    await sim.start()
+    manager = make_manager(sim)
+    latencies: list[int] = []
+    sent_ns = sim.sent_ns
+
+    def on_tick(stock_code, price, qty, trade_time):
+        sent = sent_ns.pop(qty, None)
+        if sent is not None:
+            latencies.append(time.perf_counter_ns() - sent)
+
+    manager.on_tick = on_tick
+    runner = asyncio.ensure_future(manager.start())
+    subscribed = await _wait_until(lambda: sim.subscribed_count >= n_symbols, reconnect_timeout)
+    assert subscribed, f"구독 실패: {sim.subscribed_count}/{n_symbols}"
+
+    latencies.clear()
+    ticks0 = manager._tick_count
+    t0 = time.perf_counter()
+    await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - t0
+    received = manager._tick_count - ticks0
+    sent = sim.ticks_sent
+    lat = sorted(x / 1e6 for x in latencies)
+
+    t0 = time.perf_counter()
+    await sim.drop_connections()
+    await _wait_until(lambda: sim.subscribed_count == 0, reconnect_timeout)
+    recovered = await _wait_until(lambda: sim.subscribed_count >= n_symbols, reconnect_timeout)
+    reconnect_s = time.perf_counter() - t0 if recovered else float("nan")
+
+    manager.stop()
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    await sim.stop()
+
+    # ③ 메모리 (지연 측정 없이 별도 실행)
+    sim = KisSimulator(ticks_per_symbol=rate, records_per_frame=records_per_frame)
+    await sim.start()
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    manager = make_manager(sim)
+    runner = asyncio.ensure_future(manager.start())
+    await _wait_until(lambda: sim.subscribed_count >= n_symbols, reconnect_timeout)
+    await asyncio.sleep(duration / 2)
+    gc.collect()
+    mem, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    manager.stop()
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    await sim.stop()
+
+    return {
+        "symbols": n_symbols,
+        "sessions": sessions,
+        "parser": manager.parser.name,
+        "event_loop": type(asyncio.get_running_loop()).__module__,
+        "rate_per_symbol": rate,
+        "records_per_frame": records_per_frame,
+        "duration_s": round(elapsed, 3),
+        "ticks_received": received,
+        "ticks_sent_total": sent,
+        "ticks_per_s": received / elapsed,
+        "latency_ms": {
+            "p50": _percentile(lat, 0.50),
+            "p95": _percentile(lat, 0.95),
+            "p99": _percentile(lat, 0.99),
+            "max": lat[-1] if lat else float("nan"),
+        },
+        "memory_per_symbol_bytes": (mem - base) / n_symbols,
+        "reconnect_s": reconnect_s,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RealtimeCandleManager 벤치마크")
+    parser.add_argument("--symbols", type=int, default=200, help="종목 수")
+    parser.add_argument("--frames", type=int, default=10_000, help="프레임 수")
+    parser.add_argument(
+        "--records", type=int, nargs="+", default=[1, 5, 20],
+        help="프레임당 레코드 수 (여러 개 지정 가능)",
+    )
+    parser.add_argument("--bars", type=int, default=1440, help="종목당 분봉 수 (history 벤치)")
+    parser.add_argument("--e2e", action="store_true", help="로컬 시뮬레이터 종단간 벤치만 실행")
+    parser.add_argument("--rate", type=float, default=20.0, help="[e2e] 종목당 초당 체결 수")
+    parser.add_argument("--duration", type=float, default=10.0, help="[e2e] 측정 시간(초)")
+    parser.add_argument("--json", help="[e2e] 결과를 JSON 파일로 저장 (릴리스 간 비교용)")
+    parser.add_argument(
+        "--parser", default="python", choices=["auto", *PARSERS],
+        help="_parse_tick·e2e 벤치의 프레임 파서 백엔드",
+    )
+    args = parser.parse_args()
+
+    if args.e2e:
+        logging.getLogger("realtime_candle").setLevel(logging.ERROR)  # 재연결 경고 생략
+        r = run(bench_e2e(args.symbols, args.rate, args.duration, parser=args.parser))
+        lat = r["latency_ms"]
+        print(
+            f"🔌 종단간 (종목 {r['symbols']}개, 세션 {r['sessions']}개, "
+            f"파서 {r['parser']}, 루프 {r['event_loop']}, "
+            f"종목당 {r['rate_per_symbol']:g}틱/s, 프레임당 ≤{r['records_per_frame']}건)"
+        )
+        print(f"  수신 {r['ticks_per_s']:>10,.0f} ticks/s ({r['ticks_received']:,}틱 / {r['duration_s']}s)")
+        print(
+            f"  틱→콜백 지연 p50 {lat['p50']:.2f}ms | p95 {lat['p95']:.2f}ms | "
+            f"p99 {lat['p99']:.2f}ms | max {lat['max']:.2f}ms"
+        )
+        print(f"  종목당 메모리 {r['memory_per_symbol_bytes'] / 1024:,.1f} KiB")
+        print(f"  재연결 → 전 종목 재구독 {r['reconnect_s']:.2f}s")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(r, f, ensure_ascii=False, indent=2)
+        return
+
+    print(
+        f"📊 _parse_tick 처리량 (종목 {args.symbols}개, 프레임 {args.frames:,}개, 파서 {args.parser})"
+    )
+    for n in args.records:
+        r = bench_parse(args.symbols, args.frames, n, parser=args.parser)
+        print(
+            f"  레코드/프레임={r['records_per_frame']:>3} | "
+            f"{r['frames_per_s']:>10,.0f} frames/s | "
+            f"{r['records_per_s']:>10,.0f} records/s | "
+            f"{r['elapsed_s']:.3f}s"
+        )
+    r = bench_parse(args.symbols, args.frames, args.records[-1], metrics=True)
+    print(
+        f"  + 계측(metrics=True) {r['records_per_frame']:>3} | "
+        f"{r['frames_per_s']:>10,.0f} frames/s | "
+        f"{r['records_per_s']:>10,.0f} records/s | "
+        f"{r['elapsed_s']:.3f}s"
+    )
+    r = bench_parse(args.symbols, args.frames, args.records[-1], extended=True)
+    print(
+        f"  + 확장(extended=True) {r['records_per_frame']:>3} | "
+        f"{r['frames_per_s']:>10,.0f} frames/s | "
+        f"{r['records_per_s']:>10,.0f} records/s | "
+        f"{r['elapsed_s']:.3f}s"
+    )
+
+    r = bench_parsers(args.symbols, args.frames, args.records)
+    print("\n🧩 파서 백엔드")
+    for row in r["rows"]:
+        print(
+            f"  {row['parser']:>6} 레코드/프레임={row['records_per_frame']:>3} | "
+            f"{row['frames_per_s']:>10,.0f} frames/s | "
+            f"{row['records_per_s']:>10,.0f} records/s"
+        )
+    print(
+        "  제어 프레임 JSON "
+        + " | ".join(f"{name} {us:.2f}µs" for name, us in r["json_us"].items())
+    )
+
+    r = bench_trade_time()
+    print("\n⏱️ 틱당 체결시각 → 분 키 변환")
+    print(
+        f"  datetime {r['datetime_ns']:>7,.0f}ns/tick | 정수 키 {r['int_ns']:>7,.0f}ns/tick "
+        f"({r['datetime_ns'] / r['int_ns']:.1f}x)"
+    )
+
+    print(f"\n📦 분봉 보관 구조 비교 (종목 {args.symbols}개 × 분봉 {args.bars:,}개)")
+    for name, r in bench_history(args.symbols, args.bars).items():
+        print(
+            f"  {name:<6} | {r['bytes_per_bar']:>7,.1f} B/bar | "
+            f"{r['append_per_s']:>11,.0f} append/s | "
+            f"tail(5) {r['tail5_us']:>8,.1f}µs | gc {r['gc_ms']:>7,.1f}ms"
+        )
+
+    r = bench_range()
+    print(f"\n🗂️ 시각 구간 조회 ({r['days']}일치 1분봉, 30분 구간)")
+    print(
+        f"  선형 스캔 {r['scan_us']:>9,.1f}µs | 이진 탐색 {r['bisect_us']:>6,.1f}µs | "
+        f"계층형(1m 1일 + 5m) {r['tiered_us']:>6,.1f}µs | "
+        f"종목당 메모리 {r['tiered_bytes'] / 1024:,.0f} KiB (1분봉 링 {r['plain_bytes'] / 1024:,.0f} KiB, "
+        f"압축 {r['compacted']:,}개)"
+    )
+
+    r = bench_hotpath(args.symbols)
+    print("\n🪶 핫패스 객체")
+    print(
+        f"  캔들 객체 {r['bar_bytes']} B (슬롯) vs {r['dict_bar_bytes']} B (__dict__) | "
+        f"to_dict {r['to_dict_us']:.2f}µs vs asdict {r['asdict_us']:.2f}µs"
+    )
+    print(
+        f"  JSON {r['bars']:,}개 일괄 {r['json_batch_ms']:.2f}ms vs 캔들별 to_dict {r['json_per_bar_ms']:.2f}ms"
+    )
+    for name, d in r["decoded"].items():
+        print(
+            f"  디코딩 튜플 보관 ({name:<8}) {d['bytes_per_tick']:>6,.1f} B/tick | "
+            f"할당 {d['blocks_per_tick']:.2f} 블록/tick"
+        )
+
+    r = bench_reads(args.symbols)
+    print(f"\n👀 스냅샷 읽기 (종목 {args.symbols}개, get_all_candles(5) 읽기 스레드 2개)")
+    print(
+        f"  쓰기 단독 {r['ticks_per_s_alone']:>10,.0f} ticks/s | "
+        f"읽기 동시 {r['ticks_per_s_with_readers']:>10,.0f} ticks/s | "
+        f"읽기 {r['reads_per_s']:>10,.0f} reads/s"
+    )
+
+    r = bench_snapshot(max(args.symbols, 2000), args.frames)
+    print(f"\n🧭 전 종목 스냅샷 (종목 {r['symbols']:,}개, 최근 체결가·현재 분봉·N분 수익률/거래량)")
+    print(
+        f"  종목별 루프 {r['loop_us']:>10,.1f}µs | market_snapshot() {r['snapshot_us']:>8,.1f}µs "
+        f"({r['loop_us'] / r['snapshot_us']:.0f}x)"
+    )
+
+    r = bench_orderbook(args.symbols, args.frames * 5)
+    print(f"\n📚 호가 H0STASP0 (종목 {r['symbols']}개, 10단계, 분별 스프레드·불균형·잔량 집계)")
+    print(
+        f"  {r['frames_per_s']:>10,.0f} frames/s | 시간가중 스프레드 {r['minutes_checked']}분 일치 | "
+        f"프레임 {r['retained_frames']:,}개 처리 후 잔류 메모리 {r['retained_bytes']:,}B"
+    )
+
+    r = bench_store(args.symbols, args.bars)
+    print(f"\n💾 분봉 저장소 (종목 {args.symbols}개 × 분봉 {args.bars:,}개)")
+    print(
+        f"  기록 {r['append_per_s']:>11,.0f} bars/s (분당 배치 + fsync) | "
+        f"30분 구간 조회 {r['query30_us']:,.1f}µs"
+    )
+
+    r = bench_journal(args.symbols, args.frames)
+    print(f"\n🎞️ 틱 저널 (프레임 {args.frames:,}개 × 레코드 5)")
+    print(
+        f"  기록 {r['record_per_s']:>10,.0f} frames/s | "
+        f"재생 {r['replay_per_s']:>10,.0f} frames/s (최대 속도) | "
+        f"압축률 {r['compression_ratio']}x"
+    )
+
+    r = asyncio.run(bench_publish(args.symbols, args.frames))
+    print(f"\n📡 로컬 팬아웃 (Unix 소켓 구독자 {r['clients']}개, 절반은 종목 10%만 구독)")
+    print(
+        f"  발행 {r['ticks_per_s']:>10,.0f} ticks/s | 전달 {r['messages_per_s']:>10,.0f} msgs/s | "
+        f"틱 메시지 {r['bytes_per_tick']}B | 구독자별 거래량 일치"
+    )
+
+    r = asyncio.run(bench_backfill(min(args.symbols, 20)))
+    print(f"\n⏪ 분봉 백필 (종목 {r['symbols']}개, 시뮬레이터 REST 초당 {r['rate_limit']}건 제한)")
+    print(
+        f"  {r['bars']:,}개 분봉 {r['elapsed_s']:.2f}s | 요청 {r['requests']}건 "
+        f"({r['requests_per_s']:.1f}/s, 초과 재시도 {r['retries']}건) | 실시간 분 중복 없음"
+    )
+
+    r = asyncio.run(bench_universe(min(args.symbols, 200)))
+    print(f"\n🔁 종목 구성 변경 (종목 {r['symbols']}개, 구독/해제 초당 {r['rate']}건 제한)")
+    print(
+        f"  전체 등록 {r['initial_s']:.2f}s | 절반 교체(+{r['replaced']} / -{r['replaced']}, 다른 스레드) "
+        f"{r['replace_s']:.2f}s | 요청 {r['requests']}건, 거절 0건"
+    )
+
+    r = bench_indicators(args.bars)
+    if r is None:
+        print("\n📈 지표 벤치마크 생략 (numpy 미설치)")
+    else:
+        print(f"\n📈 스트리밍 지표 6종 (분봉 {r['bars']:,}개)")
+        print(
+            f"  스트리밍 {r['stream_us_per_tick']:.2f}µs/tick (틱 반영 포함) | "
+            f"전체 배치 재계산 {r['batch_ms']:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
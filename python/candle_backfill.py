@@ -0,0 +1,299 @@
+"""
+당일 1분봉 백필 (KIS REST 주식당일분봉조회)
+
+장중에 add_stock한 종목은 버퍼가 비어 있어 지표가 유효해질 때까지 수십 분을
+기다려야 합니다. RealtimeCandleManager(backfill=True)로 만들면 add_stock
+(또는 start) 직후 이 모듈로 당일 09:00부터의 1분봉을 받아
+StockCandleBuffer.backfill로 병합합니다. 실시간 스트림이 이어받은 분
+(현재 캔들의 분)과 그 이후는 병합하지 않으므로 같은 분이 두 번 들어가지 않습니다.
+
+KIS API:
+  POST /oauth2/tokenP                                         → access_token
+  GET  /uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice
+       (tr_id FHKST03010200) FID_INPUT_HOUR_1 시각부터 과거로 30개씩 (내림차순)
+
+여러 종목은 concurrency개씩 동시에 받되, 모든 요청은 하나의 토큰 버킷
+(rate_limit회/초)을 거치고 커넥션 풀(requests.Session)을 공유합니다.
+초당 거래건수 초과(EGW00201) 응답은 잠시 쉬었다가 다시 요청합니다.
+
+사용법:
+    client = MinuteChartBackfill(app_key, app_secret, rest_url)
+    columns = await client.fetch_many(["005930", "000660"])  # 종목코드 → 컬럼 배열
+    buffer.backfill(columns["005930"], before=to_epoch_minute(datetime.now()))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from realtime_candle import CANDLE_COLUMNS, to_epoch_minute
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedError(RuntimeError):
+    """KIS 초당 거래건수 초과 응답 (EGW00201)"""
+
+
+class RateLimiter:
+    """
+    비동기 토큰 버킷 (초당 rate회, 최대 burst회 연속).
+    KIS는 초 단위 창으로 요청 수를 세므로 기본 burst=1로 요청 간격을 고르게 둔다.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:  # 대기 순서 보장 (먼저 온 요청이 먼저 나감)
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class MinuteChartBackfill:
+    """
+    KIS 주식당일분봉조회로 당일 1분봉을 받아 CANDLE_COLUMNS 컬럼 배열로 돌려주는 클라이언트.
+    REST 분봉에는 체결 건수가 없으므로 거래량이 있는 분봉은 trade_count=1,
+    거래량 0인 분봉은 빈 분봉(trade_count=0)으로 채운다.
+
+    Parameters
+    ----------
+    app_key, app_secret : str
+        KIS Open API appkey / appsecret
+    rest_url : str
+        KIS REST URL
+    rate_limit : float
+        초당 최대 요청 수 (기본 15, KIS 실전 한도 20/s에 여유를 둠)
+    concurrency : int
+        동시에 받는 종목 수 (= 요청 스레드 수 = 커넥션 풀 크기)
+    market_open : str
+        장 시작 시각 HHMMSS (이 시각 분봉까지 받으면 멈춤)
+    """
+
+    CHART_PATH = "/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice"
+    CHART_TR_ID = "FHKST03010200"
+    RATE_LIMIT_MSG_CD = "EGW00201"
+
+    # 접근 토큰 만료 전 재발급 여유 (초)
+    ACCESS_TOKEN_REFRESH_MARGIN = 10 * 60
+    # 초당 건수 초과 시 재시도 횟수 / 대기 시간 (초)
+    RETRIES = 5
+    RETRY_DELAY = 0.5
+    # 09:00~15:30 = 391분 → 30개씩 14페이지
+    MAX_PAGES = 14
+
+    def __init__(
+        self,
+        app_key: str,
+        app_secret: str,
+        rest_url: str,
+        rate_limit: float = 15.0,
+        concurrency: int = 4,
+        market_open: str = "090000",
+    ):
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.rest_url = rest_url
+        self.concurrency = max(1, concurrency)
+        self.market_open = market_open
+        self.rate_limit = rate_limit
+        self._limiter: Optional[RateLimiter] = None  # 이벤트 루프 안에서 생성
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="backfill"
+        )
+        self._token: Optional[str] = None
+        self._token_expires: float = 0
+        self._token_lock = threading.Lock()
+
+        # 통계
+        self.requests = 0
+        self.retries = 0
+        self.bars = 0
+        self.errors = 0
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._http.close()
+
+    # ──────── REST (블로킹 — executor에서 실행) ────────
+    def _access_token(self) -> str:
+        """접근 토큰 (만료 전까지 캐시, 여러 스레드가 동시에 요청해도 발급 1회)"""
+        with self._token_lock:
+            if self._token and time.time() < self._token_expires:
+                return self._token
+            resp = self._http.post(
+                f"{self.rest_url}/oauth2/tokenP",
+                json={
+                    "grant_type": "client_credentials",
+                    "appkey": self.app_key,
+                    "appsecret": self.app_secret,
+                },
+                timeout=10,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            if "access_token" not in data:
+                raise RuntimeError(f"접근 토큰 발급 실패: {data}")
+            self._token = data["access_token"]
+            self._token_expires = (
+                time.time() + int(data.get("expires_in", 86400))
+                - self.ACCESS_TOKEN_REFRESH_MARGIN
+            )
+            logger.info("KIS REST 접근 토큰 발급 완료")
+            return self._token
+
+    def _request_page(self, stock_code: str, hhmmss: str) -> list[dict]:
+        """hhmmss 시각부터 과거로 최대 30개 분봉 (내림차순)"""
+        token = self._access_token()
+        self.requests += 1
+        resp = self._http.get(
+            f"{self.rest_url}{self.CHART_PATH}",
+            headers={
+                "authorization": f"Bearer {token}",
+                "appkey": self.app_key,
+                "appsecret": self.app_secret,
+                "tr_id": self.CHART_TR_ID,
+                "custtype": "P",
+            },
+            params={
+                "FID_ETC_CLS_CODE": "",
+                "FID_COND_MRKT_DIV_CODE": "J",
+                "FID_INPUT_ISCD": stock_code,
+                "FID_INPUT_HOUR_1": hhmmss,
+                "FID_PW_DATA_INCU_YN": "N",
+            },
+            timeout=10,
+        )
+        try:
+            data = resp.json()
+        except ValueError:
+            resp.raise_for_status()
+            raise
+        if data.get("msg_cd") == self.RATE_LIMIT_MSG_CD:
+            raise RateLimitedError(data.get("msg1", ""))
+        resp.raise_for_status()
+        if data.get("rt_cd") != "0":
+            raise RuntimeError(f"[{stock_code}] 분봉 조회 실패: {data.get('msg1')}")
+        return data.get("output2") or []
+
+    # ──────── 비동기 조회 ────────
+    async def _page(self, stock_code: str, hhmmss: str) -> list[dict]:
+        """토큰 버킷을 거쳐 페이지 1개 요청 (초당 건수 초과 시 재시도)"""
+        if self._limiter is None:
+            self._limiter = RateLimiter(self.rate_limit)
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.RETRIES + 1):
+            await self._limiter.acquire()
+            try:
+                return await loop.run_in_executor(
+                    self._executor, self._request_page, stock_code, hhmmss
+                )
+            except RateLimitedError:
+                if attempt == self.RETRIES:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.RETRY_DELAY * (attempt + 1))
+        return []
+
+    async def fetch(
+        self, stock_code: str, until: Optional[datetime] = None
+    ) -> dict[str, array]:
+        """
+        until(기본 현재 시각) 당일의 장 시작 ~ until 직전 분까지 완성 1분봉.
+        until이 속한 분은 아직 진행 중이므로 제외한다.
+        반환값: CANDLE_COLUMNS 컬럼 배열 (분 오름차순)
+        """
+        until = until or datetime.now()
+        day = f"{until:%Y%m%d}"
+        day_base = to_epoch_minute(until.replace(hour=0, minute=0))
+        until_minute = to_epoch_minute(until)
+        open_minute = day_base + int(self.market_open[:2]) * 60 + int(self.market_open[2:4])
+
+        bars: dict[int, tuple] = {}
+        hhmmss = f"{until:%H%M%S}"
+        for _ in range(self.MAX_PAGES):
+            rows = await self._page(stock_code, hhmmss)
+            earliest = None
+            for row in rows:
+                if row.get("stck_bsop_date") != day:
+                    continue
+                hour = row["stck_cntg_hour"]
+                minute = day_base + int(hour[:2]) * 60 + int(hour[2:4])
+                if earliest is None or minute < earliest:
+                    earliest = minute
+                if minute >= until_minute or minute in bars:
+                    continue
+                volume = int(row["cntg_vol"])
+                bars[minute] = (
+                    minute, float(row["stck_oprc"]), float(row["stck_hgpr"]),
+                    float(row["stck_lwpr"]), float(row["stck_prpr"]),
+                    volume, 1 if volume > 0 else 0,
+                )
+            if earliest is None or earliest <= open_minute:
+                break
+            prev = earliest - 1 - day_base
+            hhmmss = f"{prev // 60:02d}{prev % 60:02d}00"
+
+        columns = {name: array(typecode) for name, typecode in CANDLE_COLUMNS}
+        cols = [columns[name] for name, _ in CANDLE_COLUMNS]
+        for minute in sorted(bars):
+            for col, value in zip(cols, bars[minute]):
+                col.append(value)
+        self.bars += len(bars)
+        return columns
+
+    async def fetch_many(
+        self, stock_codes: Iterable[str], until: Optional[datetime] = None
+    ) -> dict[str, dict[str, array]]:
+        """
+        여러 종목을 concurrency개씩 동시에 조회.
+        실패한 종목은 로그만 남기고 결과에서 빠진다.
+        반환값: 종목코드 → 컬럼 배열
+        """
+        until = until or datetime.now()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: dict[str, dict[str, array]] = {}
+
+        async def one(code: str) -> None:
+            async with semaphore:
+                try:
+                    results[code] = await self.fetch(code, until)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"[{code}] 분봉 백필 실패: {e}")
+
+        await asyncio.gather(*(one(code) for code in stock_codes))
+        return results
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "bars": self.bars,
+            "errors": self.errors,
+        }
@@ -0,0 +1,482 @@
+"""
+분봉 버퍼용 스트리밍 기술 지표
+
+StockCandleBuffer에 IndicatorEngine을 붙이면 분봉이 마감될 때마다 각 지표를
+O(1)로 갱신합니다. 미완성(현재) 캔들 기준의 잠정값은 provisional()로,
+최근 값 이력은 get_history()로 조회합니다. 등록 시점의 완성 분봉으로
+상태를 미리 채우므로(warm-up) 등록 직후부터 값이 나옵니다.
+
+batch_* 함수는 같은 지표를 전체 이력(NumPy 배열)에 대해 한 번에 계산하며,
+스트리밍 결과와 동일한 값을 냅니다 (numpy 필요).
+
+사용법:
+    engine = IndicatorEngine(manager.get_buffer("005930"), [
+        SMA(20), EMA(12), RSI(14), ATR(14), VWAP(), Bollinger(20, 2.0),
+    ])
+    engine.latest()       # {"sma20": ..., "ema12": ..., ...}
+    engine.provisional()  # 현재 캔들을 반영한 잠정값
+"""
+
+from __future__ import annotations
+
+import copy
+import math
+import threading
+from collections import deque
+from typing import Any, Iterable, Optional
+
+from realtime_candle import CandleView, StockCandleBuffer, to_epoch_minute
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성 (batch_* 전용)
+    np = None
+
+
+# ──────────────────────────────────────────────
+# 스트리밍 지표
+# ──────────────────────────────────────────────
+class Indicator:
+    """
+    스트리밍 지표 기본 클래스.
+    update()는 완성 분봉을 반영하고, peek()는 상태를 바꾸지 않고
+    다음 분봉이 주어졌을 때의 값을 계산한다. 값이 아직 없으면 None.
+    """
+
+    name = "indicator"
+
+    def update(self, minute: int, o: float, h: float, l: float, c: float, v: int) -> Any:
+        raise NotImplementedError
+
+    def peek(self, minute: int, o: float, h: float, l: float, c: float, v: int) -> Any:
+        raise NotImplementedError
+
+    def batch(self, columns: dict) -> Any:
+        """전체 이력에 대한 값 배열 (CandleView.to_numpy() 형식 입력)"""
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    """단순 이동평균 (종가)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.name = f"sma{period}"
+        self._window: deque[float] = deque()
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, minute, o, h, l, c, v):
+        self._window.append(c)
+        self._sum += c
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        self._updates += 1
+        if self._updates % self.period == 0:
+            # 누적 합의 부동소수점 오차가 쌓이지 않도록 주기적으로 다시 계산
+            self._sum = math.fsum(self._window)
+        return self.value
+
+    def peek(self, minute, o, h, l, c, v):
+        n = len(self._window) + 1
+        if n < self.period:
+            return None
+        total = self._sum + c
+        if n > self.period:
+            total -= self._window[0]
+        return total / self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._window) < self.period:
+            return None
+        return self._sum / self.period
+
+    def batch(self, columns):
+        return batch_sma(columns["close"], self.period)
+
+
+class EMA(Indicator):
+    """지수 이동평균 (종가, 첫 period개의 SMA로 시작)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.name = f"ema{period}"
+        self.alpha = 2.0 / (period + 1)
+        self._count = 0
+        self._seed_sum = 0.0
+        self._ema: Optional[float] = None
+
+    def _next(self, c: float) -> tuple[int, float, Optional[float]]:
+        count = self._count + 1
+        if count < self.period:
+            return count, self._seed_sum + c, None
+        if count == self.period:
+            seed = self._seed_sum + c
+            return count, seed, seed / self.period
+        return count, self._seed_sum, self._ema + self.alpha * (c - self._ema)
+
+    def update(self, minute, o, h, l, c, v):
+        self._count, self._seed_sum, self._ema = self._next(c)
+        return self._ema
+
+    def peek(self, minute, o, h, l, c, v):
+        return self._next(c)[2]
+
+    def batch(self, columns):
+        return batch_ema(columns["close"], self.period)
+
+
+class RSI(Indicator):
+    """상대강도지수 (Wilder 평활)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.name = f"rsi{period}"
+        self._prev: Optional[float] = None
+        self._count = 0  # 누적한 변화량 개수
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def _next(self, c: float) -> tuple[Optional[float], int, float, float]:
+        if self._prev is None:
+            return c, 0, 0.0, 0.0
+        change = c - self._prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        count = self._count + 1
+        p = self.period
+        if count <= p:
+            # 첫 period개는 합계를 모았다가 period번째에 평균으로 전환
+            g, lo = self._gain + gain, self._loss + loss
+            if count == p:
+                g, lo = g / p, lo / p
+            return c, count, g, lo
+        return c, count, (self._gain * (p - 1) + gain) / p, (self._loss * (p - 1) + loss) / p
+
+    def _value(self, count: int, gain: float, loss: float) -> Optional[float]:
+        if count < self.period:
+            return None
+        if loss == 0.0:
+            return 50.0 if gain == 0.0 else 100.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def update(self, minute, o, h, l, c, v):
+        self._prev, self._count, self._gain, self._loss = self._next(c)
+        return self._value(self._count, self._gain, self._loss)
+
+    def peek(self, minute, o, h, l, c, v):
+        _, count, gain, loss = self._next(c)
+        return self._value(count, gain, loss)
+
+    def batch(self, columns):
+        return batch_rsi(columns["close"], self.period)
+
+
+class ATR(Indicator):
+    """평균 진폭 (Wilder 평활, 첫 분봉의 TR = 고가 - 저가)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.name = f"atr{period}"
+        self._prev_close: Optional[float] = None
+        self._count = 0
+        self._atr = 0.0  # period개 전까지는 TR 합계
+
+    def _next(self, h: float, l: float, c: float) -> tuple[int, float]:
+        if self._prev_close is None:
+            tr = h - l
+        else:
+            tr = max(h - l, abs(h - self._prev_close), abs(l - self._prev_close))
+        count = self._count + 1
+        p = self.period
+        if count < p:
+            return count, self._atr + tr
+        if count == p:
+            return count, (self._atr + tr) / p
+        return count, (self._atr * (p - 1) + tr) / p
+
+    def update(self, minute, o, h, l, c, v):
+        self._count, self._atr = self._next(h, l, c)
+        self._prev_close = c
+        return self._atr if self._count >= self.period else None
+
+    def peek(self, minute, o, h, l, c, v):
+        count, atr = self._next(h, l, c)
+        return atr if count >= self.period else None
+
+    def batch(self, columns):
+        return batch_atr(columns["high"], columns["low"], columns["close"], self.period)
+
+
+class VWAP(Indicator):
+    """당일 누적 거래량 가중 평균가 (대표가 = (고+저+종)/3, 날짜가 바뀌면 초기화)"""
+
+    name = "vwap"
+
+    def __init__(self):
+        self._day = -1
+        self._pv = 0.0
+        self._vol = 0
+
+    def _next(self, minute: int, h: float, l: float, c: float, v: int) -> tuple[int, float, int]:
+        day = minute // 1440
+        pv, vol = (self._pv, self._vol) if day == self._day else (0.0, 0)
+        return day, pv + (h + l + c) / 3.0 * v, vol + v
+
+    def update(self, minute, o, h, l, c, v):
+        self._day, self._pv, self._vol = self._next(minute, h, l, c, v)
+        return self._pv / self._vol if self._vol else None
+
+    def peek(self, minute, o, h, l, c, v):
+        _, pv, vol = self._next(minute, h, l, c, v)
+        return pv / vol if vol else None
+
+    def batch(self, columns):
+        return batch_vwap(
+            columns["minute"], columns["high"], columns["low"],
+            columns["close"], columns["volume"],
+        )
+
+
+class Bollinger(Indicator):
+    """볼린저 밴드 (중심 = SMA, 폭 = k × 모표준편차). 값: (mid, upper, lower)"""
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.period = period
+        self.k = k
+        self.name = f"bb{period}"
+        self._window: deque[float] = deque()
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._updates = 0
+
+    def _band(self, total: float, total_sq: float) -> tuple[float, float, float]:
+        mid = total / self.period
+        std = math.sqrt(max(total_sq / self.period - mid * mid, 0.0))
+        return mid, mid + self.k * std, mid - self.k * std
+
+    def update(self, minute, o, h, l, c, v):
+        self._window.append(c)
+        self._sum += c
+        self._sumsq += c * c
+        if len(self._window) > self.period:
+            old = self._window.popleft()
+            self._sum -= old
+            self._sumsq -= old * old
+        self._updates += 1
+        if self._updates % self.period == 0:
+            # 누적 합의 부동소수점 오차가 쌓이지 않도록 주기적으로 다시 계산
+            self._sum = math.fsum(self._window)
+            self._sumsq = math.fsum(x * x for x in self._window)
+        if len(self._window) < self.period:
+            return None
+        return self._band(self._sum, self._sumsq)
+
+    def peek(self, minute, o, h, l, c, v):
+        n = len(self._window) + 1
+        if n < self.period:
+            return None
+        total, total_sq = self._sum + c, self._sumsq + c * c
+        if n > self.period:
+            old = self._window[0]
+            total -= old
+            total_sq -= old * old
+        return self._band(total, total_sq)
+
+    def batch(self, columns):
+        return batch_bollinger(columns["close"], self.period, self.k)
+
+
+# ──────────────────────────────────────────────
+# 지표 엔진
+# ──────────────────────────────────────────────
+class IndicatorEngine:
+    """
+    StockCandleBuffer에 붙어 분봉 마감마다 지표를 갱신하는 엔진.
+    등록 시 버퍼의 완성 분봉(빈 분봉 포함)으로 상태를 채운다.
+    """
+
+    def __init__(
+        self,
+        buffer: StockCandleBuffer,
+        indicators: Iterable[Indicator],
+        history: int = 500,
+    ):
+        self.buffer = buffer
+        self.indicators = {ind.name: ind for ind in indicators}
+        self.values: dict[str, Any] = {name: None for name in self.indicators}
+        self.history: dict[str, deque] = {
+            name: deque(maxlen=history) for name in self.indicators
+        }
+        self.minutes: deque[int] = deque(maxlen=history)
+        self._initial = copy.deepcopy(self.indicators)  # on_history_reset용 초기 상태
+        self._lock = threading.Lock()
+        buffer.add_bar_listener(self)
+
+    def on_bar_closed(
+        self, minute: int, o: float, h: float, l: float, c: float, v: int
+    ) -> None:
+        """완성 분봉 반영 (버퍼가 락 안에서 호출)"""
+        with self._lock:
+            self.minutes.append(minute)
+            for name, ind in self.indicators.items():
+                value = ind.update(minute, o, h, l, c, v)
+                self.values[name] = value
+                self.history[name].append(value)
+
+    def on_history_reset(self) -> None:
+        """버퍼 history가 다시 만들어질 때(backfill) 지표 상태를 초기화 (이후 전체 재전달)"""
+        with self._lock:
+            self.indicators = copy.deepcopy(self._initial)
+            for name in self.indicators:
+                self.values[name] = None
+                self.history[name].clear()
+            self.minutes.clear()
+
+    def latest(self) -> dict[str, Any]:
+        """마지막 완성 분봉 기준 지표 값"""
+        with self._lock:
+            return dict(self.values)
+
+    def provisional(self) -> dict[str, Any]:
+        """현재(미완성) 캔들까지 반영한 잠정 값 (현재 캔들이 없으면 latest와 같음)"""
+        cur = self.buffer.get_current()
+        if cur is None or cur.trade_count == 0:
+            return self.latest()
+        minute = to_epoch_minute(cur.dt)
+        with self._lock:
+            return {
+                name: ind.peek(minute, cur.open, cur.high, cur.low, cur.close, cur.volume)
+                for name, ind in self.indicators.items()
+            }
+
+    def get_history(self, name: str, n: Optional[int] = None) -> list:
+        """지표 값 이력 (오래된 것부터, 완성 분봉 기준)"""
+        with self._lock:
+            values = list(self.history[name])
+        return values if n is None else values[-n:] if n > 0 else []
+
+    def detach(self) -> None:
+        self.buffer.remove_bar_listener(self)
+
+
+# ──────────────────────────────────────────────
+# 배치(벡터화) 계산
+# ──────────────────────────────────────────────
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("batch 지표 계산에는 numpy가 필요합니다")
+
+
+def batch_indicators(view: CandleView, indicators: Iterable[Indicator]) -> dict[str, Any]:
+    """CandleView 전체에 대해 지표 값 배열 계산 (지표 이름 → 배열)"""
+    columns = view.to_numpy()
+    return {ind.name: ind.batch(columns) for ind in indicators}
+
+
+def batch_sma(close, period: int):
+    """SMA 배열 (값이 없는 구간은 NaN)"""
+    _require_numpy()
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) >= period:
+        csum = np.cumsum(np.concatenate(([0.0], close)))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def batch_ema(close, period: int):
+    """EMA 배열 (첫 period개 SMA로 시작, 재귀식이라 시드 이후는 순차 계산)"""
+    _require_numpy()
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) < period:
+        return out
+    alpha = 2.0 / (period + 1)
+    ema = close[:period].sum() / period
+    out[period - 1] = ema
+    for i in range(period, len(close)):
+        ema = ema + alpha * (close[i] - ema)
+        out[i] = ema
+    return out
+
+
+def batch_rsi(close, period: int = 14):
+    """RSI 배열 (Wilder 평활)"""
+    _require_numpy()
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    change = np.diff(close)
+    gains = np.maximum(change, 0.0)
+    losses = np.maximum(-change, 0.0)
+    gain = gains[:period].sum() / period
+    loss = losses[:period].sum() / period
+
+    def value(g: float, lo: float) -> float:
+        if lo == 0.0:
+            return 50.0 if g == 0.0 else 100.0
+        return 100.0 - 100.0 / (1.0 + g / lo)
+
+    out[period] = value(gain, loss)
+    for i in range(period, len(change)):
+        gain = (gain * (period - 1) + gains[i]) / period
+        loss = (loss * (period - 1) + losses[i]) / period
+        out[i + 1] = value(gain, loss)
+    return out
+
+
+def batch_atr(high, low, close, period: int = 14):
+    """ATR 배열 (Wilder 평활)"""
+    _require_numpy()
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) < period:
+        return out
+    prev = np.concatenate(([np.nan], close[:-1]))
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    tr[0] = high[0] - low[0]
+    atr = tr[:period].sum() / period
+    out[period - 1] = atr
+    for i in range(period, len(tr)):
+        atr = (atr * (period - 1) + tr[i]) / period
+        out[i] = atr
+    return out
+
+
+def batch_vwap(minute, high, low, close, volume):
+    """당일 누적 VWAP 배열 (날짜별 누적, 거래량이 0이면 NaN)"""
+    _require_numpy()
+    day = np.asarray(minute, dtype=np.int64) // 1440
+    vol = np.asarray(volume, dtype=float)
+    pv = (np.asarray(high, dtype=float) + np.asarray(low, dtype=float)
+          + np.asarray(close, dtype=float)) / 3.0 * vol
+    if len(day) == 0:
+        return np.array([])
+    # 날짜가 바뀌는 지점마다 누적 합을 다시 시작
+    starts = np.flatnonzero(np.concatenate(([True], day[1:] != day[:-1])))
+    cum_pv = np.cumsum(pv)
+    cum_vol = np.cumsum(vol)
+    seg = np.repeat(starts, np.diff(np.concatenate((starts, [len(day)]))))
+    base_pv = np.where(seg > 0, cum_pv[seg - 1], 0.0)
+    base_vol = np.where(seg > 0, cum_vol[seg - 1], 0.0)
+    day_pv = cum_pv - base_pv
+    day_vol = cum_vol - base_vol
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(day_vol > 0, day_pv / np.where(day_vol > 0, day_vol, 1.0), np.nan)
+
+
+def batch_bollinger(close, period: int = 20, k: float = 2.0):
+    """볼린저 밴드 배열 (mid, upper, lower), 각 길이 len(close)"""
+    _require_numpy()
+    close = np.asarray(close, dtype=float)
+    mid = np.full(len(close), np.nan)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(close, period)
+        mid[period - 1:] = windows.mean(axis=1)
+        std[period - 1:] = windows.std(axis=1)
+    return mid, mid + k * std, mid - k * std
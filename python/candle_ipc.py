@@ -0,0 +1,414 @@
+"""
+로컬 프로세스용 틱·분봉 팬아웃 (Unix 도메인 소켓)
+
+Node 서버·전략 프로세스마다 RealtimeCandleManager를 띄우면 프로세스마다 KIS
+세션을 하나씩 씁니다. RealtimeCandleManager(publish_path=...)로 만들면 수집
+프로세스 하나가 이 모듈의 CandlePublisher로 같은 호스트의 여러 구독자에게
+고정 길이 바이너리 메시지를 보냅니다. 틱·분봉 이벤트마다 메시지를 한 번만
+인코딩하고 같은 bytes 객체를 필터가 맞는 모든 구독자에게 넘기며, 구독자별
+쓰기는 이벤트 루프 한 바퀴마다 writelines 1회로 모읍니다.
+
+제어 (구독자 → 발행자, ASCII 한 줄씩):
+  SUB 005930 000660\\n    종목 추가 (SUB * = 전 종목). 새로 추가한 종목의
+                          현재(미완성) 분봉을 BAR(flags=0)로 먼저 보낸다
+  UNSUB 005930\\n         종목 제거 (UNSUB * = 전체 해제)
+
+메시지 (발행자 → 구독자, 리틀 엔디언, 첫 바이트 = 종류):
+  TICK  <B8sdqq       종류=1, 종목코드(NUL 패딩), 체결가, 체결량, 체결시각 epoch-second  (33바이트)
+  BAR   <B8sqddddqiB  종류=2, 종목코드, epoch-minute, 시가, 고가, 저가, 종가,
+                      거래량, 체결 건수, flags(1 = 완성 분봉, 0 = 현재 분봉 스냅샷)  (62바이트)
+  epoch 값은 realtime_candle과 같은 벽시계(naive) 기준입니다.
+
+늦게 접속한 구독자가 받는 현재 분봉 스냅샷에는 발행 대기열에 남아 있던 틱이
+이미 반영되어 있으므로, 그 틱들은 해당 구독자에게 다시 보내지 않습니다.
+쓰기 버퍼가 max_buffer를 넘긴 느린 구독자는 연결을 끊습니다 (재접속 시 스냅샷부터).
+
+사용법:
+    manager = RealtimeCandleManager(app_key, app_secret, publish_path="/tmp/kis_candle.sock")
+
+    # 다른 프로세스
+    client = CandleFeedClient("/tmp/kis_candle.sock")
+    await client.connect(["005930"])
+    async for message in client:
+        ...  # ("tick", code, price, qty, second) 또는 CandleBar
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import stat
+import struct
+from collections import Counter
+from typing import AsyncIterator, Iterable, Optional, Union
+
+from realtime_candle import (
+    CandleBar,
+    Subscriber,
+    from_epoch_minute,
+    to_epoch_minute,
+    to_epoch_second,
+)
+
+logger = logging.getLogger(__name__)
+
+MSG_TICK = 1
+MSG_BAR = 2
+TICK = struct.Struct("<B8sdqq")
+BAR = struct.Struct("<B8sqddddqiB")
+MESSAGE_SIZES = {MSG_TICK: TICK.size, MSG_BAR: BAR.size}
+
+BAR_CLOSED = 1
+
+
+def encode_bar(bar: CandleBar, code: Optional[bytes] = None) -> bytes:
+    """CandleBar → BAR 메시지 (is_closed가 flags)"""
+    return BAR.pack(
+        MSG_BAR, code or bar.stock_code.encode(), to_epoch_minute(bar.dt),
+        bar.open, bar.high, bar.low, bar.close, bar.volume, bar.trade_count,
+        BAR_CLOSED if bar.is_closed else 0,
+    )
+
+
+def decode_messages(buf: bytearray) -> list[Union[tuple, CandleBar]]:
+    """
+    buf 앞쪽의 완성된 메시지를 모두 디코딩하고 buf에서 제거한다 (남는 건 잘린 메시지).
+    TICK → ("tick", 종목코드, 체결가, 체결량, 체결시각 epoch-second), BAR → CandleBar
+    """
+    out: list[Union[tuple, CandleBar]] = []
+    pos, end = 0, len(buf)
+    while pos < end:
+        kind = buf[pos]
+        size = MESSAGE_SIZES.get(kind)
+        if size is None:
+            raise ValueError(f"알 수 없는 메시지 종류: {kind}")
+        if pos + size > end:
+            break
+        if kind == MSG_TICK:
+            _, code, price, qty, second = TICK.unpack_from(buf, pos)
+            out.append(("tick", code.rstrip(b"\0").decode(), price, qty, second))
+        else:
+            _, code, minute, o, h, l, c, v, tc, flags = BAR.unpack_from(buf, pos)
+            out.append(CandleBar(
+                stock_code=code.rstrip(b"\0").decode(),
+                dt=from_epoch_minute(minute),
+                open=o, high=h, low=l, close=c, volume=v, trade_count=tc,
+                is_closed=bool(flags & BAR_CLOSED),
+            ))
+        pos += size
+    del buf[:pos]
+    return out
+
+
+# ──────────────────────────────────────────────
+# 발행자
+# ──────────────────────────────────────────────
+class _Client(asyncio.Protocol):
+    """구독자 연결 1개 (종목 필터 + 보낼 메시지 묶음)"""
+
+    def __init__(self, publisher: CandlePublisher):
+        self.publisher = publisher
+        self.transport: Optional[asyncio.Transport] = None
+        self.codes: set[str] = set()
+        self.all_codes = False
+        self.skip: Counter = Counter()  # 종목별로 건너뛸 대기열 틱 수 (스냅샷에 반영됨)
+        self.pending: list[bytes] = []
+        self._line = b""
+        self.sent = 0
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.publisher._clients.append(self)
+        logger.info(f"구독자 접속 ({len(self.publisher._clients)}개)")
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.publisher._remove(self)
+
+    def data_received(self, data: bytes) -> None:
+        *lines, self._line = (self._line + data).split(b"\n")
+        for line in lines:
+            parts = line.decode("ascii", "replace").split()
+            if not parts:
+                continue
+            command, codes = parts[0].upper(), parts[1:]
+            if command == "SUB":
+                self.publisher._subscribe(self, codes)
+            elif command == "UNSUB":
+                self.publisher._unsubscribe(self, codes)
+            else:
+                logger.warning(f"알 수 없는 구독 명령: {line[:100]!r}")
+
+    def send(self, message: bytes) -> None:
+        if not self.pending:
+            self.publisher._schedule_flush(self)
+        self.pending.append(message)
+
+
+class CandlePublisher:
+    """
+    RealtimeCandleManager의 tick / candle_closed 이벤트를 Unix 도메인 소켓
+    구독자들에게 보내는 발행자. 매니저 subscribe()의 async 구독자로 등록되므로
+    수신 루프와 분리되고, 구독자 소켓 쓰기는 모두 이벤트 루프 스레드에서 일어난다.
+
+    Parameters
+    ----------
+    manager : RealtimeCandleManager
+    path : str
+        소켓 경로 (이미 있는 소켓 파일은 지우고 다시 만듦)
+    max_buffer : int
+        구독자별 쓰기 버퍼 한도 (바이트). 넘으면 연결을 끊는다
+    maxsize : int
+        매니저 쪽 이벤트 대기열 길이 (넘으면 오래된 이벤트부터 버림)
+    """
+
+    def __init__(
+        self,
+        manager,
+        path: str,
+        max_buffer: int = 4 * 1024 * 1024,
+        maxsize: int = 65536,
+    ):
+        self.manager = manager
+        self.path = path
+        self.max_buffer = max_buffer
+        self.maxsize = maxsize
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: list[_Client] = []
+        self._all: list[_Client] = []               # SUB * 구독자
+        self._by_code: dict[str, list[_Client]] = {}
+        self._codes: dict[str, bytes] = {}          # 종목코드 → 인코딩 캐시
+        self._flush_scheduled: list[_Client] = []
+        self._subscribers: list[Subscriber] = []
+        self._tick_sub: Optional[Subscriber] = None
+        self._last_dt = None
+        self._last_second = 0
+
+        # 통계
+        self.ticks = 0
+        self.bars = 0
+        self.bytes_sent = 0
+        self.slow_disconnects = 0
+
+    async def start(self) -> None:
+        """소켓 서버 시작 + 매니저 이벤트 구독"""
+        try:
+            if stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_unix_server(lambda: _Client(self), self.path)
+        self._tick_sub = self.manager.subscribe("tick", self._on_tick, maxsize=self.maxsize)
+        self._subscribers = [
+            self._tick_sub,
+            self.manager.subscribe("candle_closed", self._on_candle_closed, maxsize=self.maxsize),
+        ]
+        logger.info(f"분봉 발행 소켓: {self.path}")
+
+    async def close(self) -> None:
+        for sub in self._subscribers:
+            self.manager.unsubscribe(sub)
+        self._subscribers = []
+        self._tick_sub = None
+        for client in list(self._clients):
+            client.transport.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    # ──────── 구독 관리 ────────
+    def _subscribe(self, client: _Client, codes: list[str]) -> None:
+        if "*" in codes:
+            added = [c for c in self.manager._buffers if c not in client.codes]
+            if not client.all_codes:
+                client.all_codes = True
+                self._all.append(client)
+                for code in client.codes:
+                    self._by_code[code].remove(client)
+        else:
+            added = [c for c in codes if c not in client.codes]
+            if not client.all_codes:
+                for code in added:
+                    self._by_code.setdefault(code, []).append(client)
+        client.codes.update(added)
+        if not added:
+            return
+
+        # 늦은 접속: 현재 분봉 스냅샷 + 스냅샷에 이미 반영된 대기열 틱은 건너뜀
+        pending = self._tick_sub._queue if self._tick_sub is not None else ()
+        added_set = set(added)
+        for args in pending:
+            if args[0] in added_set:
+                client.skip[args[0]] += 1
+        for code in added:
+            buf = self.manager.get_buffer(code)
+            bar = buf.get_current() if buf is not None else None
+            if bar is not None and bar.trade_count > 0:
+                client.send(encode_bar(bar, self._code(code)))
+
+    def _unsubscribe(self, client: _Client, codes: list[str]) -> None:
+        if client.all_codes:  # 전 종목 구독 → 남은 종목만 개별 구독으로 전환
+            client.all_codes = False
+            self._all.remove(client)
+            for code in client.codes:
+                self._by_code.setdefault(code, []).append(client)
+        if "*" in codes:
+            codes = list(client.codes)
+        for code in codes:
+            if code not in client.codes:
+                continue
+            client.codes.discard(code)
+            client.skip.pop(code, None)
+            clients = self._by_code.get(code)
+            if clients and client in clients:
+                clients.remove(client)
+
+    def _remove(self, client: _Client) -> None:
+        if client in self._clients:
+            self._clients.remove(client)
+        if client.all_codes:
+            self._all.remove(client)
+        for code in client.codes:
+            clients = self._by_code.get(code)
+            if clients and client in clients:
+                clients.remove(client)
+        client.pending.clear()
+        logger.info(f"구독자 종료 ({len(self._clients)}개)")
+
+    def _code(self, stock_code: str) -> bytes:
+        code = self._codes.get(stock_code)
+        if code is None:
+            code = self._codes[stock_code] = stock_code.encode()
+        return code
+
+    # ──────── 발행 ────────
+    async def _on_tick(self, stock_code: str, price: float, qty: int, trade_time) -> None:
+        targets = self._by_code.get(stock_code)
+        if not targets and not self._all:
+            return
+        if trade_time is not self._last_dt:
+            self._last_dt = trade_time
+            self._last_second = to_epoch_second(trade_time)
+        message = TICK.pack(MSG_TICK, self._code(stock_code), price, qty, self._last_second)
+        self.ticks += 1
+        for clients in (targets, self._all):
+            if not clients:
+                continue
+            for client in clients:
+                if client.skip and client.skip.get(stock_code):
+                    client.skip[stock_code] -= 1
+                    continue
+                client.send(message)
+
+    async def _on_candle_closed(self, bar: CandleBar) -> None:
+        targets = self._by_code.get(bar.stock_code)
+        if not targets and not self._all:
+            return
+        message = encode_bar(bar, self._code(bar.stock_code))
+        self.bars += 1
+        for clients in (targets, self._all):
+            if clients:
+                for client in clients:
+                    client.send(message)
+
+    def _schedule_flush(self, client: _Client) -> None:
+        if not self._flush_scheduled:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._flush_scheduled.append(client)
+
+    def _flush(self) -> None:
+        """이벤트 루프 한 바퀴 동안 모은 메시지를 구독자별 writelines 1회로 전송"""
+        clients, self._flush_scheduled = self._flush_scheduled, []
+        for client in clients:
+            messages, client.pending = client.pending, []
+            transport = client.transport
+            if not messages or transport is None or transport.is_closing():
+                continue
+            transport.writelines(messages)
+            client.sent += len(messages)
+            self.bytes_sent += sum(map(len, messages))
+            if transport.get_write_buffer_size() > self.max_buffer:
+                self.slow_disconnects += 1
+                logger.warning(
+                    f"느린 구독자 연결 종료 (쓰기 버퍼 {transport.get_write_buffer_size():,}B)"
+                )
+                transport.abort()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "clients": len(self._clients),
+            "ticks": self.ticks,
+            "bars": self.bars,
+            "bytes_sent": self.bytes_sent,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+
+# ──────────────────────────────────────────────
+# 구독자 (Python 프로세스용)
+# ──────────────────────────────────────────────
+class CandleFeedClient:
+    """
+    CandlePublisher 구독 클라이언트.
+    async for로 ("tick", 종목코드, 체결가, 체결량, epoch-second) 튜플과
+    CandleBar(is_closed=False면 접속·구독 시점의 현재 분봉 스냅샷)를 받는다.
+    """
+
+    READ_SIZE = 65536
+
+    def __init__(self, path: str):
+        self.path = path
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._buf = bytearray()
+
+    async def connect(self, stock_codes: Optional[Iterable[str]] = None) -> None:
+        """접속 후 stock_codes 구독 (None이면 전 종목)"""
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        await self.subscribe(stock_codes)
+
+    async def subscribe(self, stock_codes: Optional[Iterable[str]] = None) -> None:
+        codes = ["*"] if stock_codes is None else list(stock_codes)
+        self._writer.write(f"SUB {' '.join(codes)}\n".encode())
+        await self._writer.drain()
+
+    async def unsubscribe(self, stock_codes: Optional[Iterable[str]] = None) -> None:
+        codes = ["*"] if stock_codes is None else list(stock_codes)
+        self._writer.write(f"UNSUB {' '.join(codes)}\n".encode())
+        await self._writer.drain()
+
+    async def read(self) -> list[Union[tuple, CandleBar]]:
+        """도착한 메시지 묶음 (연결이 끊기면 빈 목록)"""
+        while True:
+            data = await self._reader.read(self.READ_SIZE)
+            if not data:
+                return []
+            self._buf += data
+            messages = decode_messages(self._buf)
+            if messages:
+                return messages
+
+    async def __aiter__(self) -> AsyncIterator[Union[tuple, CandleBar]]:
+        while True:
+            messages = await self.read()
+            if not messages:
+                return
+            for message in messages:
+                yield message
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
@@ -0,0 +1,253 @@
+"""
+RealtimeCandleManager 계측 (단계별 지연 히스토그램·카운터·Prometheus 출력)
+
+RealtimeCandleManager(metrics=True)일 때만 생성되며, 꺼져 있으면 매니저의
+핫패스는 `if metrics is not None` 분기 하나만 거칩니다.
+
+히스토그램은 ns 값을 2의 거듭제곱 구간(bucket i = [2^(i-1), 2^i))에 세는
+로그 버킷 방식이라 관측 1회가 int.bit_length() + 리스트 증가 한 번이며,
+분위수는 버킷 상한으로 추정합니다 (최대 2배 오차).
+
+단계 이름:
+  receive        소켓 수신 → 처리 대기열 적재 (수신 루프 안)
+  queue          대기열 적재 → 처리 시작
+  decode         decode_tick_frame
+  decode.<tr_id> 등록 디코더의 프레임 처리 (예: decode.H0STASP0)
+  buffer         버퍼 반영 (종목별 on_ticks)
+  callback.<name> 콜백 1회 실행 (on_tick, on_candle_closed, ... — start() 전 직접 호출 시.
+                 start() 동안은 디스패처 구독자라 stats["subscribers"]에 집계)
+  exchange_lag   체결시각(거래소, 초 단위) → 수신 (초 절삭으로 0~1초 오차)
+  event_loop_lag 이벤트 루프 지연 (sleep 예정 시각 대비 초과분)
+  reconnect      세션 끊김 감지 → 재연결·재구독 후 첫 체결 프레임
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable, Iterable, Union
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BUCKETS = 64
+# Prometheus로 내보내는 버킷 범위 (2^10ns ≈ 1µs ~ 2^36ns ≈ 69s, 스크레이프마다 고정)
+EXPORT_BUCKETS = range(10, 37)
+
+
+class Histogram:
+    """로그(2배) 버킷 ns 히스토그램"""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        self.buckets[min(ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> int:
+        """q 분위수 추정값 (ns, 해당 버킷 상한과 max 중 작은 값)"""
+        if self.count == 0:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(1 << i, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """ms 단위 요약"""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) / 1e6,
+            "p90_ms": self.percentile(0.90) / 1e6,
+            "p99_ms": self.percentile(0.99) / 1e6,
+            "max_ms": self.max / 1e6,
+        }
+
+
+class SymbolLag:
+    """종목별 체결시각 → 수신 지연 (초)"""
+
+    __slots__ = ("last", "max", "ewma")
+
+    def __init__(self, lag: float):
+        self.last = lag
+        self.max = lag
+        self.ewma = lag
+
+    def update(self, lag: float, alpha: float = 0.1) -> None:
+        self.last = lag
+        if lag > self.max:
+            self.max = lag
+        self.ewma += alpha * (lag - self.ewma)
+
+
+class CandleMetrics:
+    """매니저 핫패스 계측 저장소 (이벤트 루프 스레드에서만 갱신)"""
+
+    def __init__(self):
+        self.histograms: dict[str, Histogram] = {}
+        self.frames = 0
+        self.records = 0
+        self.parse_errors = 0
+        self.lag: dict[str, SymbolLag] = {}
+        self._started = time.monotonic()
+        self._rate_mark = (self._started, 0, 0)  # (시각, frames, records)
+        # epoch-second(벽시계 기준) → UTC 기준 time.time() 보정값
+        self._utc_offset = time.localtime().tm_gmtoff
+
+    def observe(self, stage: str, ns: int) -> None:
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = Histogram()
+        hist.observe(ns)
+
+    def observe_frame(self, raw: Union[str, bytes], decoded: int) -> None:
+        """프레임 1개 디코딩 결과 (헤더 레코드 수보다 적게 나오면 파싱 오류로 집계)"""
+        self.frames += 1
+        self.records += decoded
+        if isinstance(raw, bytes):
+            parts = raw.split(b"|", 3)
+            header = (b"0", b"H0STCNT0")
+        else:
+            parts = raw.split("|", 3)
+            header = ("0", "H0STCNT0")
+        if len(parts) == 4 and (parts[0], parts[1]) == header:
+            try:
+                expected = int(parts[2])
+            except ValueError:
+                expected = 1
+            if decoded < expected:
+                self.parse_errors += expected - decoded
+
+    def observe_lag(self, ticks: Iterable[tuple], recv_ns: int) -> None:
+        """
+        체결 배치의 체결시각 → 수신 지연.
+        ticks: decode_tick_frame 결과 (체결시각 = 벽시계 기준 epoch-second)
+        recv_ns: 수신 시각 time.time_ns()
+        """
+        recv = recv_ns / 1e9 + self._utc_offset
+        lag_map = self.lag
+        hist = self.histograms.get("exchange_lag")
+        if hist is None:
+            hist = self.histograms["exchange_lag"] = Histogram()
+        for tick in ticks:
+            stock_code, second = tick[0], tick[3]
+            lag = recv - second
+            hist.observe(int(lag * 1e9))
+            entry = lag_map.get(stock_code)
+            if entry is None:
+                lag_map[stock_code] = SymbolLag(lag)
+            else:
+                entry.update(lag)
+
+    def rates(self) -> dict:
+        """직전 rates() 호출 이후 초당 프레임·레코드 수와 전체 평균"""
+        now = time.monotonic()
+        mark_t, mark_frames, mark_records = self._rate_mark
+        dt = now - mark_t
+        self._rate_mark = (now, self.frames, self.records)
+        uptime = now - self._started
+        return {
+            "frames_per_s": (self.frames - mark_frames) / dt if dt > 0 else 0.0,
+            "records_per_s": (self.records - mark_records) / dt if dt > 0 else 0.0,
+            "avg_frames_per_s": self.frames / uptime if uptime > 0 else 0.0,
+            "avg_records_per_s": self.records / uptime if uptime > 0 else 0.0,
+        }
+
+    def snapshot(self) -> dict:
+        result = {
+            "frames": self.frames,
+            "records": self.records,
+            "parse_errors": self.parse_errors,
+        }
+        result.update(self.rates())
+        result["stages"] = {name: h.snapshot() for name, h in sorted(self.histograms.items())}
+        result["exchange_lag_s"] = {
+            code: {"last": e.last, "ewma": e.ewma, "max": e.max}
+            for code, e in self.lag.items()
+        }
+        return result
+
+    def prometheus(self, prefix: str = "kis_candle") -> str:
+        """Prometheus 텍스트 형식 (histogram 단위: 초)"""
+        lines = [
+            f"# TYPE {prefix}_frames_total counter",
+            f"{prefix}_frames_total {self.frames}",
+            f"# TYPE {prefix}_records_total counter",
+            f"{prefix}_records_total {self.records}",
+            f"# TYPE {prefix}_parse_errors_total counter",
+            f"{prefix}_parse_errors_total {self.parse_errors}",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for name, hist in sorted(self.histograms.items()):
+            cumulative = sum(hist.buckets[:EXPORT_BUCKETS.start])
+            for i in EXPORT_BUCKETS:
+                cumulative += hist.buckets[i]
+                lines.append(
+                    f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{(1 << i) / 1e9:.9g}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {hist.total / 1e9:.9g}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {hist.count}')
+        lines.append(f"# TYPE {prefix}_exchange_lag_seconds gauge")
+        for code, e in sorted(self.lag.items()):
+            lines.append(f'{prefix}_exchange_lag_seconds{{symbol="{code}"}} {e.ewma:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+async def event_loop_lag_loop(
+    metrics: CandleMetrics, interval: float = 0.5, running: Callable[[], bool] = lambda: True
+) -> None:
+    """interval초 sleep의 초과분을 event_loop_lag로 기록"""
+    interval_ns = int(interval * 1e9)
+    while running():
+        t0 = time.perf_counter_ns()
+        await asyncio.sleep(interval)
+        metrics.observe("event_loop_lag", time.perf_counter_ns() - t0 - interval_ns)
+
+
+async def serve_prometheus(
+    render: Callable[[], str], host: str = "127.0.0.1", port: int = 9100
+) -> asyncio.AbstractServer:
+    """GET /metrics 에 render() 결과를 돌려주는 최소 HTTP 서버"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split(" ")
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].startswith("/metrics"):
+                status, body = "200 OK", render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Prometheus 메트릭 서버: http://{host}:{port}/metrics")
+    return server
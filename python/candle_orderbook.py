@@ -0,0 +1,428 @@
+"""
+실시간 호가(H0STASP0) 디코더 · 분 단위 호가 집계
+
+RealtimeCandleManager(decoders=[OrderBookDecoder()])로 등록하면 매니저가 종목마다
+H0STCNT0(체결)와 함께 H0STASP0(호가)도 구독하고, 호가 프레임을 이 디코더로 넘깁니다.
+
+종목별 최신 10단계 호가는 미리 할당한 타입 배열(OrderBook)에 제자리로 덮어쓰고,
+분봉과 같은 epoch-minute 단위로 다음 값을 집계해 DepthRing에 쌓습니다.
+  spread     시간가중 평균 스프레드 (매도호가1 - 매수호가1)
+  imbalance  호가 갱신마다의 잔량 불균형 평균 ((매수 - 매도) / (매수 + 매도), 상위 depth단계)
+  bid_depth  시간가중 평균 매수 잔량 (상위 depth단계 합)
+  ask_depth  시간가중 평균 매도 잔량 (상위 depth단계 합)
+  updates    그 분의 호가 갱신 수 (0이면 직전 호가를 이어받은 분)
+minute 컬럼이 분봉(CandleRing.minute)과 같은 값이라 캔들과 분 단위로 맞춰 볼 수 있습니다.
+
+사용법:
+    books = OrderBookDecoder(depth=5)
+    manager = RealtimeCandleManager(decoders=[books])
+    books.get_book("005930")           # 최신 호가 (복사본 dict)
+    books.get_stats("005930", n=30)    # 최근 30분 호가 집계 컬럼 (array)
+
+H0STASP0 필드 순서 (^-구분, 레코드 기준 오프셋):
+  [0]      MKSC_SHRN_ISCD     종목코드
+  [1]      BSOP_HOUR          영업시간 (HHMMSS)
+  [2]      HOUR_CLS_CODE      시간구분코드
+  [3..12]  ASKP1-10           매도호가 1~10
+  [13..22] BIDP1-10           매수호가 1~10
+  [23..32] ASKP_RSQN1-10      매도호가 잔량 1~10
+  [33..42] BIDP_RSQN1-10      매수호가 잔량 1~10
+  [43]     TOTAL_ASKP_RSQN    총 매도호가 잔량
+  [44]     TOTAL_BIDP_RSQN    총 매수호가 잔량
+  ...                          (예상체결 등, 레코드당 59개 필드)
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import Callable, Optional, TypeVar
+
+from realtime_candle import (
+    _SESSION_DATE,
+    SNAPSHOT_RETRIES,
+    CandleRing,
+    FrameDecoder,
+    SessionDate,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+NAN = math.nan
+
+ORDERBOOK_LEVELS = 10
+# 읽는 마지막 필드(TOTAL_BIDP_RSQN, [44])까지의 최소 필드 수
+H0STASP0_MIN_FIELDS = 45
+_ASK, _BID, _ASK_QTY, _BID_QTY = 3, 13, 23, 33
+
+# (컬럼명, array typecode) — DepthRing 분 단위 호가 집계
+DEPTH_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("minute", "q"),     # epoch-minute (분봉과 같은 키)
+    ("spread", "d"),     # 시간가중 평균 스프레드 (양쪽 호가가 없으면 NaN)
+    ("imbalance", "d"),  # 갱신별 잔량 불균형 평균 (-1 ~ 1)
+    ("bid_depth", "d"),  # 시간가중 평균 상위 N단계 매수 잔량
+    ("ask_depth", "d"),  # 시간가중 평균 상위 N단계 매도 잔량
+    ("updates", "i"),    # 호가 갱신 수
+)
+
+# 호가 갱신 없이 이만큼(분) 지나면 빈 분 채우기를 멈춤 (장 마감 후 등)
+STALE_MINUTES = 30
+
+
+class DepthRing(CandleRing):
+    """분 단위 호가 집계 링 버퍼 (CandleRing과 같은 컬럼형 배치)"""
+
+    columns = DEPTH_COLUMNS
+
+    def append(
+        self,
+        minute: int,
+        spread: float,
+        imbalance: float,
+        bid_depth: float,
+        ask_depth: float,
+        updates: int,
+    ) -> None:
+        i = self._next_slot()
+        if i < 0:
+            return
+        self.minute[i] = minute
+        self.spread[i] = spread
+        self.imbalance[i] = imbalance
+        self.bid_depth[i] = bid_depth
+        self.ask_depth[i] = ask_depth
+        self.updates[i] = updates
+
+    def __getitem__(self, i: int) -> dict:
+        p = self._physical(i)
+        return {name: getattr(self, name)[p] for name, _ in self.columns}
+
+    def __iter__(self):
+        return (self[i] for i in range(self._size))
+
+
+class OrderBook:
+    """
+    단일 종목의 최신 호가와 진행 중인 분의 집계 상태.
+    ask/bid/ask_qty/bid_qty는 10단계 고정 배열이며 갱신은 제자리 덮어쓰기다.
+    쓰기는 이벤트 루프 스레드 한 곳에서만 하고, 쓰는 동안 _lock을 잡고 _seq를 홀수로
+    만든다 (락은 재시도를 다 쓴 읽기와의 배제용).
+    """
+
+    __slots__ = (
+        "stock_code", "depth", "ask", "bid", "ask_qty", "bid_qty",
+        "total_ask", "total_bid", "second", "spread", "bid_depth", "ask_depth",
+        "imbalance", "minute", "mark", "last_update_minute", "weight", "spread_weight",
+        "spread_w", "bid_depth_w", "ask_depth_w", "imbalance_sum", "updates",
+        "history", "_seq", "_lock",
+    )
+
+    def __init__(self, stock_code: str, depth: int, max_history: int):
+        self.stock_code = stock_code
+        self.depth = depth
+        self.ask = array("d", bytes(8 * ORDERBOOK_LEVELS))
+        self.bid = array("d", bytes(8 * ORDERBOOK_LEVELS))
+        self.ask_qty = array("q", bytes(8 * ORDERBOOK_LEVELS))
+        self.bid_qty = array("q", bytes(8 * ORDERBOOK_LEVELS))
+        self.total_ask = 0
+        self.total_bid = 0
+        self.second = 0  # 최근 호가 시각 (epoch-second, 없으면 0)
+        self.spread = NAN
+        self.bid_depth = 0
+        self.ask_depth = 0
+        self.imbalance = 0.0
+        # 진행 중인 분 (-1 = 없음)과 그 분의 누적값
+        self.minute = -1
+        self.mark = 0  # 현재 호가가 적용되기 시작한 epoch-second
+        self.last_update_minute = -1
+        self._reset_minute()
+        self.history = DepthRing(stock_code, max_history)
+        self._seq = 0  # 홀수 = 쓰기 중
+        self._lock = threading.Lock()
+
+    def _reset_minute(self) -> None:
+        self.weight = 0
+        self.spread_weight = 0
+        self.spread_w = 0.0
+        self.bid_depth_w = 0.0
+        self.ask_depth_w = 0.0
+        self.imbalance_sum = 0.0
+        self.updates = 0
+
+    def _accumulate(self, until: int) -> None:
+        """mark ~ until(epoch-second) 동안 현재 호가가 유지된 만큼 가중 누적"""
+        dt = until - self.mark
+        if dt <= 0:
+            return
+        self.weight += dt
+        if not math.isnan(self.spread):
+            self.spread_weight += dt
+            self.spread_w += self.spread * dt
+        self.bid_depth_w += self.bid_depth * dt
+        self.ask_depth_w += self.ask_depth * dt
+        self.mark = until
+
+    def _close_minute(self) -> None:
+        """진행 중인 분을 마감해 history에 기록하고 다음 분으로 넘어감"""
+        minute = self.minute
+        self._accumulate(minute * 60 + 60)
+        weight, updates = self.weight, self.updates
+        self.history.append(
+            minute,
+            self.spread_w / self.spread_weight if self.spread_weight else self.spread,
+            self.imbalance_sum / updates if updates else self.imbalance,
+            self.bid_depth_w / weight if weight else self.bid_depth,
+            self.ask_depth_w / weight if weight else self.ask_depth,
+            updates,
+        )
+        self._reset_minute()
+        self.minute = minute + 1
+        self.mark = self.minute * 60
+
+    def advance(self, minute: int) -> None:
+        """
+        epoch-minute이 minute 이전인 분을 모두 마감 (호출 측에서 _seq 관리).
+        갱신 없는 분은 직전 호가로 채우되, STALE_MINUTES 동안 갱신이 없으면 멈춘다.
+        """
+        while 0 <= self.minute < minute:
+            if self.updates == 0 and self.minute - self.last_update_minute >= STALE_MINUTES:
+                self.minute = -1
+                self._reset_minute()
+                return
+            self._close_minute()
+
+    def update(self, fields: list[str], base: int, second: int) -> None:
+        """레코드(fields[base:])의 10단계 호가로 갱신 (배열은 제자리 덮어쓰기)"""
+        minute = second // 60
+        if self.minute < 0:
+            self.minute = minute
+            self.mark = second
+        elif minute > self.minute:
+            self.advance(minute)
+            if self.minute < 0:  # 오래 쉬었다 다시 시작
+                self.minute = minute
+                self.mark = second
+        if second < self.mark:
+            second = self.mark  # 이미 지난 시각에 도착한 호가는 지금 적용
+        self._accumulate(second)
+
+        ask, bid, ask_qty, bid_qty = self.ask, self.bid, self.ask_qty, self.bid_qty
+        for k in range(ORDERBOOK_LEVELS):
+            ask[k] = float(fields[base + _ASK + k])
+            bid[k] = float(fields[base + _BID + k])
+            ask_qty[k] = int(fields[base + _ASK_QTY + k])
+            bid_qty[k] = int(fields[base + _BID_QTY + k])
+        self.total_ask = int(fields[base + 43])
+        self.total_bid = int(fields[base + 44])
+        bid_depth = ask_depth = 0
+        for k in range(self.depth):
+            bid_depth += bid_qty[k]
+            ask_depth += ask_qty[k]
+        self.second = second
+        self.spread = ask[0] - bid[0] if ask[0] > 0 and bid[0] > 0 else NAN
+        self.bid_depth = bid_depth
+        self.ask_depth = ask_depth
+        total = bid_depth + ask_depth
+        self.imbalance = (bid_depth - ask_depth) / total if total else 0.0
+        self.imbalance_sum += self.imbalance
+        self.updates += 1
+        self.last_update_minute = self.minute
+
+    def current_row(self) -> Optional[tuple]:
+        """
+        진행 중인 분의 지금까지 집계값 (DEPTH_COLUMNS 순서, 없으면 None).
+        마지막 갱신 이후 구간은 아직 가중치에 들어가지 않았다.
+        """
+        if self.minute < 0:
+            return None
+        weight, updates = self.weight, self.updates
+        return (
+            self.minute,
+            self.spread_w / self.spread_weight if self.spread_weight else self.spread,
+            self.imbalance_sum / updates if updates else self.imbalance,
+            self.bid_depth_w / weight if weight else self.bid_depth,
+            self.ask_depth_w / weight if weight else self.ask_depth,
+            updates,
+        )
+
+
+class OrderBookDecoder(FrameDecoder):
+    """
+    H0STASP0(실시간 호가) 디코더.
+
+    Parameters
+    ----------
+    depth : int
+        imbalance·bid_depth·ask_depth를 계산할 상위 호가 단계 수 (1~10)
+    max_history : int
+        종목별 분 단위 집계 보관 개수
+    """
+
+    tr_id = "H0STASP0"
+
+    def __init__(
+        self,
+        depth: int = 5,
+        max_history: int = 1440,
+        session_date: SessionDate = _SESSION_DATE,
+    ):
+        if not 1 <= depth <= ORDERBOOK_LEVELS:
+            raise ValueError(f"depth는 1~{ORDERBOOK_LEVELS} 사이여야 합니다: {depth}")
+        self.depth = depth
+        self.max_history = max_history
+        self.session_date = session_date
+        self.books: dict[str, OrderBook] = {}
+        self.messages = 0
+        self.errors = 0
+
+    def add_stock(self, stock_code: str) -> None:
+        if stock_code not in self.books:
+            self.books[stock_code] = OrderBook(stock_code, self.depth, self.max_history)
+
+    def remove_stock(self, stock_code: str) -> None:
+        self.books.pop(stock_code, None)
+
+    # ──────── 디코딩 ────────
+    def decode(self, raw: str, recv_ns: int = 0) -> None:
+        """
+        호가 프레임 1개 반영. 형식: 0|H0STASP0|001|rec0_field0^...^rec0_field58^...
+        decode_tick_frame과 같이 한 번 분할한 뒤 레코드 폭(stride) 단위로 읽는다.
+        """
+        parts = raw.split("|", 3)
+        if len(parts) < 4 or parts[0] == "1" or parts[1] != self.tr_id:
+            return
+        fields = parts[3].split("^")
+        try:
+            count = int(parts[2])
+        except ValueError:
+            count = 1
+        if count <= 0:
+            return
+        width, remainder = divmod(len(fields), count)
+        if remainder or width < H0STASP0_MIN_FIELDS:
+            self.errors += count
+            logger.warning(
+                f"호가 프레임 형식 오류: count={count} fields={len(fields)} | raw={raw[:100]}"
+            )
+            return
+
+        day_base, now_sod = self.session_date.current()
+        books = self.books
+        for base in range(0, count * width, width):
+            book = books.get(fields[base])
+            if book is None:
+                continue
+            try:
+                second = _hhmmss_second(fields[base + 1], day_base, now_sod)
+                with book._lock:
+                    book._seq += 1
+                    try:
+                        book.update(fields, base, second)
+                    finally:
+                        book._seq += 1
+            except (ValueError, IndexError) as e:
+                self.errors += 1
+                logger.warning(f"호가 파싱 오류: {e} | raw={raw[:100]}")
+                continue
+            self.messages += 1
+
+    def close_before(self, minute: int) -> None:
+        """분 경계 타이머: 모든 종목의 minute 이전 분 마감"""
+        for book in self.books.values():
+            if 0 <= book.minute < minute:
+                with book._lock:
+                    book._seq += 1
+                    book.advance(minute)
+                    book._seq += 1
+
+    # ──────── 읽기 ────────
+    @staticmethod
+    def _read(book: OrderBook, read: Callable[[], T]) -> T:
+        """
+        락 없이 일관된 읽기 (쓰기 중이거나 읽는 동안 갱신되면 다시 읽음).
+        SNAPSHOT_RETRIES번 실패하면 종목 락을 잡고 읽는다.
+        """
+        for _ in range(SNAPSHOT_RETRIES):
+            seq = book._seq
+            if seq & 1:
+                time.sleep(0)  # 쓰는 스레드에 GIL 양보
+                continue
+            try:
+                result = read()
+            except (IndexError, ValueError):
+                continue
+            if book._seq == seq:
+                return result
+        with book._lock:
+            return read()
+
+    def get_book(self, stock_code: str) -> Optional[dict]:
+        """최신 호가 복사본 (ask/bid/ask_qty/bid_qty는 1~10단계 list, 호가가 없으면 None)"""
+        book = self.books.get(stock_code)
+        if book is None:
+            return None
+
+        def read() -> Optional[dict]:
+            if book.second == 0:
+                return None
+            return {
+                "second": book.second,
+                "ask": book.ask.tolist(),
+                "bid": book.bid.tolist(),
+                "ask_qty": book.ask_qty.tolist(),
+                "bid_qty": book.bid_qty.tolist(),
+                "total_ask": book.total_ask,
+                "total_bid": book.total_bid,
+                "spread": book.spread,
+                "imbalance": book.imbalance,
+            }
+
+        return self._read(book, read)
+
+    def get_stats(
+        self, stock_code: str, n: Optional[int] = None, include_current: bool = True
+    ) -> dict[str, array]:
+        """
+        최근 n개 분의 호가 집계 컬럼 (DEPTH_COLUMNS, n=None이면 전체).
+        include_current면 진행 중인 분을 지금까지의 값으로 마지막 행에 붙인다.
+        """
+        book = self.books.get(stock_code)
+        if book is None:
+            return {name: array(typecode) for name, typecode in DEPTH_COLUMNS}
+
+        def read() -> dict[str, array]:
+            row = book.current_row() if include_current and n != 0 else None
+            k = n if n is None or row is None else n - 1
+            columns = book.history.tail_columns(k)
+            if row is not None:
+                for (name, _), value in zip(DEPTH_COLUMNS, row):
+                    columns[name].append(value)
+            return columns
+
+        return self._read(book, read)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self.books),
+            "messages": self.messages,
+            "errors": self.errors,
+        }
+
+
+def _hhmmss_second(hhmmss: str, day_base: int, now_sod: float) -> int:
+    """HHMMSS → epoch-second (decode_tick_frame과 같은 자정 처리)"""
+    v = int(hhmmss)
+    h, m, sec = v // 10000, v // 100 % 100, v % 100
+    if len(hhmmss) != 6 or h >= 24 or m >= 60 or sec >= 60:
+        raise ValueError(f"호가시간 형식 오류: {hhmmss!r}")
+    sod = h * 3600 + m * 60 + sec
+    second = day_base + sod
+    if sod - now_sod > 43200:
+        second -= 86400  # 자정을 넘겨 도착한 전날 호가
+    return second
@@ -0,0 +1,355 @@
+"""
+체결 프레임 파서 백엔드 · 수신 경로 선택 (RealtimeCandleManager(parser=...))
+
+수신 루프가 받은 H0STCNT0 프레임을 decode_tick_frame 형식의 체결 튜플로 바꾸는
+구현을 교체할 수 있게 합니다. 모든 백엔드는 check_conformance()의 공통 프레임
+묶음에서 참조 구현(PythonParser)과 같은 결과를 내야 합니다.
+
+  python  PythonParser  str 프레임을 decode_tick_frame으로 처리 (참조 구현, 기본값)
+  bytes   BytesParser   WebSocket 텍스트 프레임을 UTF-8 디코딩 없이 bytes로 받아
+                        그대로 분할한다. 종목코드만 bytes → intern된 str 캐시로 바꾸고
+                        숫자 필드는 bytes에서 바로 int/float로 변환한다
+  auto    websockets.connect의 연결이 recv(decode=False)를 지원하면(websockets 14.0+)
+          bytes, 아니면 python. bytes를 직접 지정했는데 지원하지 않으면 ValueError
+
+선택 의존성 (설치되어 있으면 자동으로 사용, requirements-optional.txt):
+  orjson  제어 프레임(PINGPONG·구독 응답) JSON 파싱 (loads_json)
+  uvloop  run()이 uvloop 이벤트 루프로 실행
+
+사용법:
+    manager = RealtimeCandleManager(..., parser="bytes")
+    run(manager.start())                 # uvloop이 있으면 uvloop으로
+    check_conformance(BytesParser())     # 참조 구현과 결과 비교 (불일치 시 AssertionError)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+from typing import Any, Awaitable, Optional, Union
+
+import websockets
+
+from realtime_candle import (
+    _SESSION_DATE,
+    H0STCNT0_EXT_MIN_FIELDS,
+    H0STCNT0_MIN_FIELDS,
+    SessionDate,
+    SymbolTable,
+    decode_tick_frame,
+)
+
+try:
+    import orjson
+except ImportError:  # orjson은 선택 의존성 (없으면 json)
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # uvloop은 선택 의존성 (없으면 asyncio 기본 루프)
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+Frame = Union[str, bytes]
+
+# 제어 프레임 JSON 파싱 (orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스)
+loads_json = orjson.loads if orjson is not None else json.loads
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def run(main: Awaitable) -> Any:
+    """코루틴 실행 (uvloop이 있으면 uvloop 이벤트 루프, 없으면 asyncio.run)"""
+    if uvloop is None:
+        return asyncio.run(main)
+    if hasattr(uvloop, "run"):  # uvloop 0.18+
+        return uvloop.run(main)
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(main)
+
+
+def recv_supports_bytes() -> bool:
+    """
+    매니저가 쓰는 websockets.connect의 연결이 텍스트 프레임을 디코딩 없이 받을 수
+    있는지 (recv(decode=False)). websockets 13.x에도 새 asyncio 구현이 있지만
+    websockets.connect는 14.0부터 그 구현을 가리키고, 그 전에는 decode가 없는
+    legacy 프로토콜을 돌려준다.
+    """
+    if not getattr(websockets.connect, "__module__", "").startswith("websockets.asyncio."):
+        return False
+    from websockets.asyncio.client import ClientConnection
+
+    return recv_accepts_decode(ClientConnection)
+
+
+def recv_accepts_decode(ws: Any) -> bool:
+    """연결 객체(또는 클래스)의 recv가 decode 인자를 받는지"""
+    try:
+        return "decode" in inspect.signature(ws.recv).parameters
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+# ──────────────────────────────────────────────
+# 파서 백엔드
+# ──────────────────────────────────────────────
+class FrameParser:
+    """
+    체결 프레임 파서 백엔드의 기반 클래스.
+    binary=True면 매니저 수신 루프가 텍스트 프레임을 bytes 그대로 넘기고,
+    디코더·워커처럼 str이 필요한 곳에는 text()로 바꿔 넘긴다.
+    """
+
+    name = ""
+    binary = False
+
+    def decode(
+        self,
+        raw: Frame,
+        session_date: SessionDate = _SESSION_DATE,
+        extended: bool = False,
+        symbols: Optional[SymbolTable] = None,
+    ) -> list[tuple]:
+        """프레임 1개 → 체결 튜플 목록 (형식은 decode_tick_frame과 같음)"""
+        raise NotImplementedError
+
+    def tr_id(self, raw: Frame) -> str:
+        """프레임의 TR ID (디코더 라우팅용)"""
+        return raw[2:10]
+
+    def text(self, raw: Frame) -> str:
+        return raw
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class PythonParser(FrameParser):
+    """참조 구현: decode_tick_frame (str 프레임)"""
+
+    name = "python"
+    decode = staticmethod(decode_tick_frame)
+
+
+class BytesParser(FrameParser):
+    """
+    bytes 프레임을 str로 바꾸지 않고 분할·변환 (decode_tick_frame과 같은 절차).
+    int()/float()는 ASCII 숫자 bytes를 바로 받으므로 str로 바뀌는 필드는 종목코드뿐이며,
+    SymbolTable에 등록된 종목은 bytes → intern된 str 캐시로 찾는다.
+    str 프레임(저널 재생 등)도 받는다.
+    """
+
+    name = "bytes"
+    binary = True
+
+    def __init__(self):
+        self._codes: dict[bytes, str] = {}  # 등록 종목 bytes → SymbolTable의 str
+
+    def tr_id(self, raw: Frame) -> str:
+        tr_id = raw[2:10]
+        return tr_id.decode("ascii", "replace") if isinstance(tr_id, bytes) else tr_id
+
+    def text(self, raw: Frame) -> str:
+        return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+
+    def decode(
+        self,
+        raw: Frame,
+        session_date: SessionDate = _SESSION_DATE,
+        extended: bool = False,
+        symbols: Optional[SymbolTable] = None,
+    ) -> list[tuple]:
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        parts = raw.split(b"|", 3)
+        if len(parts) < 4:
+            return []
+
+        encrypted, tr_id, count_str, payload = parts
+        if encrypted == b"1" or tr_id != b"H0STCNT0":
+            return []
+
+        fields = payload.split(b"^")
+        try:
+            count = int(count_str)
+        except ValueError:
+            count = 1
+        if count <= 0:
+            return []
+
+        width, remainder = divmod(len(fields), count)
+        if remainder or width < (H0STCNT0_EXT_MIN_FIELDS if extended else H0STCNT0_MIN_FIELDS):
+            logger.warning(
+                f"틱 프레임 형식 오류: count={count} fields={len(fields)} "
+                f"| raw={raw[:100].decode('utf-8', 'replace')}"
+            )
+            return []
+
+        day_base, now_sod = session_date.current()
+        last_hhmmss = None
+        second = 0
+        codes = self._codes
+        names = None if symbols is None else symbols.names
+
+        ticks: list[tuple] = []
+        for base in range(0, count * width, width):
+            try:
+                code_bytes = fields[base]
+                stock_code = codes.get(code_bytes)
+                if stock_code is None:
+                    stock_code = code_bytes.decode("utf-8")
+                    if names is not None and stock_code in names:
+                        stock_code = codes[code_bytes] = names[stock_code]
+                hhmmss = fields[base + 1]
+                price = abs(float(fields[base + 2]))
+                cntg_vol = abs(int(fields[base + 12]))
+
+                if hhmmss != last_hhmmss:
+                    v = int(hhmmss)
+                    h, m, sec = v // 10000, v // 100 % 100, v % 100
+                    if len(hhmmss) != 6 or h >= 24 or m >= 60 or sec >= 60:
+                        raise ValueError(f"체결시간 형식 오류: {hhmmss.decode('utf-8', 'replace')!r}")
+                    sod = h * 3600 + m * 60 + sec
+                    second = day_base + sod
+                    if sod - now_sod > 43200:
+                        second -= 86400  # 자정을 넘겨 도착한 전날 체결
+                    last_hhmmss = hhmmss
+                if extended:
+                    ticks.append((
+                        stock_code, price, cntg_vol, second,
+                        int(fields[base + 21]),               # 체결구분
+                        abs(float(fields[base + 10])),        # 매도호가1
+                        abs(float(fields[base + 11])),        # 매수호가1
+                        float(fields[base + 18]),             # 체결강도
+                        int(fields[base + 13]),               # 누적거래량
+                        int(fields[base + 14]),               # 누적거래대금
+                    ))
+                    continue
+            except (ValueError, IndexError, UnicodeDecodeError) as e:
+                logger.warning(f"틱 파싱 오류: {e} | raw={raw[:100].decode('utf-8', 'replace')}")
+                continue
+            ticks.append((stock_code, price, cntg_vol, second))
+
+        return ticks
+
+
+PARSERS: dict[str, type[FrameParser]] = {
+    PythonParser.name: PythonParser,
+    BytesParser.name: BytesParser,
+}
+
+
+def get_parser(parser: Union[str, FrameParser] = "python") -> FrameParser:
+    """
+    이름("python" / "bytes" / "auto") 또는 FrameParser 인스턴스 → 파서.
+    binary 파서는 websockets.connect가 bytes 수신을 지원할 때만 쓸 수 있다 (아니면 ValueError)
+    """
+    if parser == "auto":
+        parser = BytesParser.name if recv_supports_bytes() else PythonParser.name
+    if not isinstance(parser, FrameParser):
+        try:
+            parser = PARSERS[parser]()
+        except KeyError:
+            raise ValueError(
+                f"알 수 없는 파서: {parser} (지원: auto, {', '.join(PARSERS)})"
+            ) from None
+    if parser.binary and not recv_supports_bytes():
+        raise ValueError(
+            f"{parser.name} 파서는 websockets 14.0 이상이 필요합니다 "
+            f"(설치됨: {websockets.__version__}, recv(decode=False) 미지원)"
+        )
+    return parser
+
+
+# ──────────────────────────────────────────────
+# 공통 적합성 검사
+# ──────────────────────────────────────────────
+H0STCNT0_FIELDS = 46
+
+
+def _record(
+    code: str, hhmmss: str, price: str, qty: str = "10", side: str = "1", strength: str = "101.50"
+) -> list[str]:
+    """H0STCNT0 레코드 필드 46개 (읽는 필드 외에는 0)"""
+    fields = ["0"] * H0STCNT0_FIELDS
+    fields[0], fields[1], fields[2] = code, hhmmss, price
+    fields[10], fields[11], fields[12] = "70100", "70000", qty
+    fields[13], fields[14] = "123456", "8650000000"
+    fields[18], fields[21] = strength, side
+    return fields
+
+
+def _frame(records: list[list[str]], count: Optional[str] = None, head: str = "0|H0STCNT0") -> str:
+    payload = "^".join("^".join(r) for r in records)
+    return f"{head}|{count if count is not None else len(records):0>3}|{payload}"
+
+
+def conformance_frames() -> list[tuple[str, str]]:
+    """(설명, 프레임) 목록: 정상·다건·경계·오류 프레임"""
+    a = _record("005930", "090000", "70000", "15")
+    b = _record("000660", "090001", "-180500", "3", side="5", strength="88.25")
+    c = _record("005930", "090001", "+70100", "-7")
+    unknown = _record("999999", "153000", "1234", "1")
+    late = _record("005930", "235959", "70000")
+    bad_time = _record("005930", "256000", "70000")
+    bad_price = _record("005930", "090002", "7O000")
+    return [
+        ("단건", _frame([a])),
+        ("다건 (같은 체결시각 재사용)", _frame([a, b, c])),
+        ("미등록 종목 포함", _frame([a, unknown])),
+        ("자정 전 체결", _frame([late])),
+        ("체결시간 오류 레코드만 건너뜀", _frame([a, bad_time, b])),
+        ("가격 오류 레코드만 건너뜀", _frame([bad_price, c])),
+        ("레코드 수 오류 → 1건", _frame([a], count="abc")),
+        ("레코드 수 0", _frame([a], count="0")),
+        ("필드 수가 레코드 수로 나눠지지 않음", _frame([a, b], count="3")),
+        ("레코드 폭 부족", _frame([a[:12]])),
+        ("기본 폭 (확장 필드 없음)", _frame([a[:13], b[:13]])),
+        ("암호화 프레임", _frame([a], head="1|H0STCNT0")),
+        ("다른 TR", _frame([a], head="0|H0STASP0")),
+        ("구분자 부족", "0|H0STCNT0|001"),
+        ("빈 프레임", ""),
+    ]
+
+
+def check_conformance(parser: FrameParser, reference: Optional[FrameParser] = None) -> int:
+    """
+    conformance_frames() 전부를 (extended, SymbolTable 유무) 조합마다 reference
+    (기본 PythonParser)와 같은 결과를 내는지 확인. binary 파서에는 bytes와 str 둘 다 넣는다.
+    등록 종목코드는 SymbolTable의 객체 그대로여야 한다. 불일치 시 AssertionError
+    (python -O에서도 검사), 반환값: 확인한 경우 수 (tests/test_parser_conformance.py)
+    """
+    reference = reference or PythonParser()
+    session = SessionDate()
+    symbols = SymbolTable()
+    for code in ("005930", "000660"):
+        symbols.intern(code)
+    cases = 0
+    for label, frame in conformance_frames():
+        inputs: list[Frame] = [frame.encode("utf-8"), frame] if parser.binary else [frame]
+        for extended in (False, True):
+            for table in (None, symbols):
+                expected = reference.decode(frame, session, extended, table)
+                for raw in inputs:
+                    got = parser.decode(raw, session, extended, table)
+                    if got != expected:
+                        raise AssertionError(
+                            f"{parser.name} [{label}] extended={extended} {type(raw).__name__}: "
+                            f"{got} != {expected}"
+                        )
+                    for tick in got:
+                        if type(tick[0]) is not str:
+                            raise AssertionError(f"{parser.name} [{label}] 종목코드가 str 아님: {tick}")
+                        if table is not None and tick[0] in table and tick[0] is not table.names[tick[0]]:
+                            raise AssertionError(
+                                f"{parser.name} [{label}] SymbolTable 객체가 아님: {tick[0]}"
+                            )
+                    cases += 1
+        for raw in inputs:
+            if len(frame) >= 10 and parser.tr_id(raw) != frame[2:10]:
+                raise AssertionError(f"{parser.name} [{label}] tr_id 불일치")
+            if parser.text(raw) != frame:
+                raise AssertionError(f"{parser.name} [{label}] text 불일치")
+    return cases
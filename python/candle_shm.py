@@ -0,0 +1,571 @@
+"""
+공유 메모리 기반 멀티 프로세스 분봉 집계
+
+RealtimeCandleManager(workers=N) 모드에서 사용합니다. 수신한 원본 프레임을
+종목코드 기준으로 N개 워커 프로세스에 나눠 보내고, 각 워커는 자신이 맡은
+종목의 분봉 버퍼를 공유 메모리 세그먼트에 직접 기록합니다. 부모 프로세스와
+다른 로컬 프로세스는 같은 세그먼트를 매핑하여 복사·피클링 없이 읽습니다.
+
+세그먼트 이름: {prefix}_{종목코드} (Linux: /dev/shm/{prefix}_{종목코드})
+prefix 기본값은 kiscandle_{부모 PID}라서 같은 호스트의 여러 매니저가 서로의
+세그먼트를 건드리지 않는다. 같은 이름의 세그먼트가 이미 있으면 FileExistsError
+(비정상 종료로 남은 세그먼트는 cleanup_stale=True로 지운 뒤 다시 만든다).
+
+세그먼트 레이아웃 (리틀 엔디언, 헤더 128바이트 + 컬럼 배열):
+  int64[0]   seq          시퀀스 락 (홀수 = 기록 중)
+  int64[1]   capacity     링 버퍼 용량 (분봉 수)
+  int64[2]   start        가장 오래된 분봉의 물리 인덱스
+  int64[3]   size         저장된 완성 분봉 수
+  int64[4]   cur_minute   현재 캔들 epoch-minute (-1 = 없음)
+  int64[5]   cur_volume
+  int64[6]   cur_trades
+  int64[7]   late_ticks
+  float64[8..11]  현재 캔들 open / high / low / close
+  이후 CANDLE_COLUMNS 순서로 컬럼 배열 (각 capacity개, 8바이트 정렬)
+
+읽는 쪽은 seq를 읽고(홀수면 재시도) 데이터를 복사한 뒤 seq를 다시 읽어
+값이 같을 때만 결과를 사용합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+import zlib
+from array import array
+from multiprocessing import shared_memory
+from typing import Callable, Optional, TypeVar
+
+from realtime_candle import (
+    CANDLE_COLUMNS,
+    CandleBar,
+    CandleRing,
+    CandleView,
+    StockCandleBuffer,
+    H0STCNT0_MIN_FIELDS,
+    append_bar_columns,
+    decode_tick_frame,
+    from_epoch_minute,
+    to_epoch_minute,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEADER_BYTES = 128
+H_SEQ, H_CAPACITY, H_START, H_SIZE = 0, 1, 2, 3
+H_CUR_MINUTE, H_CUR_VOLUME, H_CUR_TRADES, H_LATE = 4, 5, 6, 7
+H_CUR_OHLC = 8  # float64 슬롯 시작 (8..11)
+
+SEQLOCK_RETRIES = 10_000
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def segment_size(capacity: int) -> int:
+    """용량 capacity인 종목 세그먼트의 바이트 크기"""
+    size = HEADER_BYTES
+    for _, typecode in CANDLE_COLUMNS:
+        size += _align8(array(typecode).itemsize * capacity)
+    return size
+
+
+def segment_name(prefix: str, stock_code: str) -> str:
+    return f"{prefix}_{stock_code}"
+
+
+# ──────────────────────────────────────────────
+# 공유 메모리 링 버퍼
+# ──────────────────────────────────────────────
+class SharedCandleRing(CandleRing):
+    """
+    공유 메모리 세그먼트 위의 CandleRing.
+    컬럼은 세그먼트를 캐스팅한 memoryview이고 start/size는 헤더에 기록되어
+    다른 프로세스에서도 같은 링을 그대로 읽을 수 있다.
+    """
+
+    def __init__(self, stock_code: str, buf: memoryview):
+        self.stock_code = stock_code
+        self._buf = buf
+        self._header = buf[:HEADER_BYTES].cast("q")
+        self._header_f = buf[:HEADER_BYTES].cast("d")
+        self.capacity = self._header[H_CAPACITY]
+        self._offsets: dict[str, tuple[int, int]] = {}
+        offset = HEADER_BYTES
+        for name, typecode in CANDLE_COLUMNS:
+            itemsize = array(typecode).itemsize
+            nbytes = itemsize * self.capacity
+            setattr(self, name, buf[offset:offset + nbytes].cast(typecode))
+            self._offsets[name] = (offset, itemsize)
+            offset += _align8(nbytes)
+
+    @property
+    def _start(self) -> int:
+        return self._header[H_START]
+
+    @_start.setter
+    def _start(self, value: int) -> None:
+        self._header[H_START] = value
+
+    @property
+    def _size(self) -> int:
+        return self._header[H_SIZE]
+
+    @_size.setter
+    def _size(self, value: int) -> None:
+        self._header[H_SIZE] = value
+
+    def tail_columns(self, n: Optional[int] = None) -> dict[str, array]:
+        """최근 n개 분봉을 프로세스 로컬 배열로 복사 (공유 메모리와 분리)"""
+        ranges = self._ranges(n)
+        out: dict[str, array] = {}
+        for name, typecode in CANDLE_COLUMNS:
+            offset, itemsize = self._offsets[name]
+            col = array(typecode)
+            for b, e in ranges:
+                col.frombytes(self._buf[offset + b * itemsize:offset + e * itemsize])
+            out[name] = col
+        return out
+
+    def release(self) -> None:
+        """세그먼트를 닫기 전에 memoryview 해제"""
+        for name, _ in CANDLE_COLUMNS:
+            getattr(self, name).release()
+        self._header.release()
+        self._header_f.release()
+        self._buf.release()
+
+
+def _init_segment(buf: memoryview, capacity: int) -> None:
+    header = buf[:HEADER_BYTES].cast("q")
+    header[H_CAPACITY] = capacity
+    header[H_CUR_MINUTE] = -1
+    header.release()
+
+
+# ──────────────────────────────────────────────
+# 워커 측: 공유 메모리에 기록하는 버퍼
+# ──────────────────────────────────────────────
+class SharedStockCandleBuffer(StockCandleBuffer):
+    """
+    워커 프로세스가 소유하는 StockCandleBuffer.
+    history는 SharedCandleRing이며, 쓰기 전후(_begin_write/_end_write)로
+    공유 메모리의 seq도 올리고 현재 캔들을 헤더에 게시한다.
+    """
+
+    def __init__(self, stock_code: str, shm: shared_memory.SharedMemory):
+        self.shm = shm
+        ring = SharedCandleRing(stock_code, shm.buf)
+        super().__init__(stock_code, ring.capacity)
+        self.history = ring
+
+    def _begin_write(self) -> None:
+        super()._begin_write()
+        self.history._header[H_SEQ] += 1
+
+    def _end_write(self) -> None:
+        super()._end_write()
+        header, ohlc = self.history._header, self.history._header_f
+        cur = self.current
+        if cur is None or cur.trade_count == 0:
+            header[H_CUR_MINUTE] = -1
+        else:
+            header[H_CUR_MINUTE] = to_epoch_minute(cur.dt)
+            header[H_CUR_VOLUME] = cur.volume
+            header[H_CUR_TRADES] = cur.trade_count
+            ohlc[H_CUR_OHLC] = cur.open
+            ohlc[H_CUR_OHLC + 1] = cur.high
+            ohlc[H_CUR_OHLC + 2] = cur.low
+            ohlc[H_CUR_OHLC + 3] = cur.close
+        header[H_LATE] = self.late_ticks
+        header[H_SEQ] += 1
+
+    def release(self) -> None:
+        self.history.release()
+        self.shm.close()
+
+
+# ──────────────────────────────────────────────
+# 읽기 측: 부모·외부 프로세스용 리더
+# ──────────────────────────────────────────────
+class SharedCandleReader:
+    """
+    공유 메모리 세그먼트를 읽는 StockCandleBuffer 호환 리더.
+    get_current / get_history / get_all_candles는 시퀀스 락으로
+    일관된 스냅샷을 보장한다.
+
+    다른 프로세스에서는 SharedCandleReader.attach(종목코드, 풀의 prefix)로 연결한다.
+    """
+
+    def __init__(self, stock_code: str, shm: shared_memory.SharedMemory):
+        self.stock_code = stock_code
+        self.shm = shm
+        self.history = SharedCandleRing(stock_code, shm.buf)
+        self.max_history = self.history.capacity
+
+    @classmethod
+    def attach(cls, stock_code: str, prefix: str) -> SharedCandleReader:
+        """이미 생성된 세그먼트에 연결 (prefix: ShmWorkerPool.prefix / manager.shm_prefix)"""
+        shm = shared_memory.SharedMemory(name=segment_name(prefix, stock_code))
+        return cls(stock_code, shm)
+
+    def _snapshot(self, read: Callable[[], T]) -> T:
+        header = self.history._header
+        for _ in range(SEQLOCK_RETRIES):
+            seq = header[H_SEQ]
+            if seq & 1:
+                time.sleep(0)  # 기록 중인 워커에 CPU 양보
+                continue
+            result = read()
+            if header[H_SEQ] == seq:
+                return result
+            time.sleep(0)
+        raise RuntimeError(f"공유 메모리 스냅샷 읽기 실패: {self.stock_code}")
+
+    def _read_current(self) -> Optional[CandleBar]:
+        header, ohlc = self.history._header, self.history._header_f
+        minute = header[H_CUR_MINUTE]
+        if minute < 0:
+            return None
+        return CandleBar(
+            stock_code=self.stock_code,
+            dt=from_epoch_minute(minute),
+            open=ohlc[H_CUR_OHLC],
+            high=ohlc[H_CUR_OHLC + 1],
+            low=ohlc[H_CUR_OHLC + 2],
+            close=ohlc[H_CUR_OHLC + 3],
+            volume=header[H_CUR_VOLUME],
+            trade_count=header[H_CUR_TRADES],
+        )
+
+    @property
+    def current(self) -> Optional[CandleBar]:
+        return self.get_current()
+
+    @property
+    def late_ticks(self) -> int:
+        return self.history._header[H_LATE]
+
+    def get_current(self) -> Optional[CandleBar]:
+        """현재(미완성) 캔들 반환"""
+        return self._snapshot(self._read_current)
+
+    def get_history(self, n: Optional[int] = None) -> CandleView:
+        """최근 n개의 완성 캔들 반환 (n=None이면 전체)"""
+        return CandleView(
+            self.stock_code, self._snapshot(lambda: self.history.tail_columns(n))
+        )
+
+    def get_all_candles(self, n: Optional[int] = None) -> CandleView:
+        """완성 캔들 + 현재 캔들까지 포함하여 반환"""
+        def read() -> tuple[Optional[CandleBar], dict[str, array]]:
+            cur = self._read_current()
+            if cur is None or n is None:
+                return cur, self.history.tail_columns(n)
+            return cur, self.history.tail_columns(max(0, n - 1))
+
+        cur, columns = self._snapshot(read)
+        if cur is None or (n is not None and n <= 0):
+            return CandleView(self.stock_code, columns)
+        append_bar_columns(columns, cur, to_epoch_minute(cur.dt))
+        return CandleView(self.stock_code, columns, open_pos=len(columns["minute"]) - 1)
+
+    def release(self) -> None:
+        self.history.release()
+        self.shm.close()
+
+
+# ──────────────────────────────────────────────
+# 워커 프로세스
+# ──────────────────────────────────────────────
+def _worker_main(index: int, inbox: mp.Queue, outbox: mp.Queue, prefix: str) -> None:
+    """
+    워커 프로세스 본체.
+    inbox 메시지:
+      ("frames", [raw, ...])  원본 프레임 묶음 → 디코딩 후 버퍼 반영
+      ("add", code)           종목 세그먼트 연결
+      ("remove", code)        종목 세그먼트 해제
+      ("close", minute)       타이머 마감 (minute 이전 캔들 마감)
+      None                    종료
+    닫힌 캔들은 list[CandleBar]로 outbox에 보낸다.
+    """
+    buffers: dict[str, SharedStockCandleBuffer] = {}
+    try:
+        while True:
+            msg = inbox.get()
+            if msg is None:
+                break
+            kind, arg = msg
+            if kind == "frames":
+                by_code: dict[str, list[tuple]] = {}
+                for raw in arg:
+                    for stock_code, price, qty, second in decode_tick_frame(raw):
+                        if stock_code in buffers:
+                            by_code.setdefault(stock_code, []).append((price, qty, second))
+                closed: list[CandleBar] = []
+                for stock_code, batch in by_code.items():
+                    closed.extend(buffers[stock_code].on_ticks(batch))
+                if closed:
+                    outbox.put(closed)
+            elif kind == "close":
+                closed = []
+                for buf in buffers.values():
+                    candle = buf.close_before(arg)
+                    if candle is not None:
+                        closed.append(candle)
+                if closed:
+                    outbox.put(closed)
+            elif kind == "add":
+                if arg not in buffers:
+                    shm = shared_memory.SharedMemory(name=segment_name(prefix, arg))
+                    buffers[arg] = SharedStockCandleBuffer(arg, shm)
+            elif kind == "remove":
+                buf = buffers.pop(arg, None)
+                if buf is not None:
+                    buf.release()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for buf in buffers.values():
+            buf.release()
+        logger.debug(f"분봉 워커 #{index} 종료")
+
+
+# ──────────────────────────────────────────────
+# 워커 풀
+# ──────────────────────────────────────────────
+class ShmWorkerPool:
+    """
+    종목코드 기준으로 프레임을 워커 프로세스에 분배하는 풀.
+    세그먼트 생성·삭제는 부모(풀)가, 기록은 담당 워커가 맡는다.
+
+    Parameters
+    ----------
+    prefix : str | None
+        세그먼트 이름 접두어 (기본 kiscandle_{PID}, 다른 프로세스에서 SharedCandleReader로
+        붙으려면 같은 값을 알려줘야 한다)
+    cleanup_stale : bool
+        같은 이름의 세그먼트가 이미 있을 때 지우고 다시 만든다. 실행 중인 다른 풀의
+        세그먼트일 수도 있으므로 기본 False (FileExistsError)
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        capacity: int,
+        prefix: Optional[str] = None,
+        cleanup_stale: bool = False,
+    ):
+        self.workers = max(1, workers)
+        self.capacity = capacity
+        self.prefix = prefix or f"kiscandle_{os.getpid()}"
+        self.cleanup_stale = cleanup_stale
+        self._ctx = mp.get_context("spawn")
+        self._inboxes = [self._ctx.Queue() for _ in range(self.workers)]
+        self._outbox = self._ctx.Queue()
+        self._procs: list[mp.process.BaseProcess] = []
+        self._segments: dict[str, shared_memory.SharedMemory] = {}
+        self._readers: list[SharedCandleReader] = []
+        self._worker_of: dict[str, int] = {}
+        self._pending: list[list[str]] = [[] for _ in range(self.workers)]
+        self._flush_scheduled = False
+        self.frames_routed = 0
+        self.frames_split = 0
+        self.frames_invalid = 0
+        # 인터프리터 종료 전에 리더의 memoryview를 풀어야 세그먼트를 닫을 수 있다
+        atexit.register(self._release_readers)
+
+    # ──────── 수명 주기 ────────
+    def start(self) -> None:
+        if self._procs:
+            return
+        for i, inbox in enumerate(self._inboxes):
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(i, inbox, self._outbox, self.prefix),
+                name=f"candle-worker-{i}",
+                daemon=True,
+            )
+            proc.start()
+            self._procs.append(proc)
+        logger.info(f"분봉 워커 {self.workers}개 시작")
+
+    def shutdown(self) -> None:
+        """워커 종료 후 세그먼트 이름 삭제 (부모의 리더 매핑은 유지)"""
+        self.flush()
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs.clear()
+        self._outbox.put(None)  # get_closed 대기 해제
+        for shm in self._segments.values():
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _release_readers(self) -> None:
+        for reader in self._readers:
+            reader.release()
+        self._readers.clear()
+
+    # ──────── 종목 관리 ────────
+    def worker_index(self, stock_code: str) -> int:
+        return zlib.crc32(stock_code.encode()) % self.workers
+
+    def add_stock(self, stock_code: str) -> SharedCandleReader:
+        """종목 세그먼트 생성 후 담당 워커에 등록, 부모용 리더 반환"""
+        name = segment_name(self.prefix, stock_code)
+        try:
+            shm = shared_memory.SharedMemory(
+                name=name, create=True, size=segment_size(self.capacity)
+            )
+        except FileExistsError:
+            if not self.cleanup_stale:
+                raise FileExistsError(
+                    f"공유 메모리 세그먼트가 이미 있습니다: {name} (같은 prefix의 풀이 실행 중이면 "
+                    f"prefix를 바꾸고, 이전 실행이 남긴 것이면 cleanup_stale=True)"
+                ) from None
+            # 이전 실행이 남긴 세그먼트: 내용을 덮어쓰지 않고 이름만 지운 뒤 새로 만든다
+            # (기존 매핑은 그대로 유지되고, 크기가 달라도 안전)
+            logger.warning(f"남아 있던 공유 메모리 세그먼트 삭제 후 재생성: {name}")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(
+                name=name, create=True, size=segment_size(self.capacity)
+            )
+        _init_segment(shm.buf, self.capacity)
+        self._segments[stock_code] = shm
+        index = self.worker_index(stock_code)
+        self._worker_of[stock_code] = index
+        self._inboxes[index].put(("add", stock_code))
+        reader = SharedCandleReader(stock_code, shm)
+        self._readers.append(reader)
+        return reader
+
+    def remove_stock(self, stock_code: str) -> None:
+        index = self._worker_of.pop(stock_code, None)
+        if index is None:
+            return
+        self._inboxes[index].put(("remove", stock_code))
+        for reader in [r for r in self._readers if r.stock_code == stock_code]:
+            self._readers.remove(reader)
+            reader.release()
+        shm = self._segments.pop(stock_code)
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    # ──────── 프레임 분배 ────────
+    def submit(self, raw: str) -> None:
+        """
+        원본 프레임을 담당 워커 대기열에 추가.
+        멀티 레코드 프레임의 종목이 여러 워커에 걸치면 워커별로 레코드를
+        나눠 프레임을 다시 만든다. 대기열은 이벤트 루프의 다음 차례에
+        한꺼번에 전송된다 (루프가 없으면 즉시 전송).
+        필드 수가 레코드 수 × 레코드 폭으로 나눠지지 않는 프레임은 decode_tick_frame과
+        같이 버리고 frames_invalid로 센다.
+        """
+        parts = raw.split("|", 3)
+        if len(parts) < 4 or parts[0] != "0" or parts[1] != "H0STCNT0":
+            return
+        payload = parts[3]
+        worker_of = self._worker_of
+
+        try:
+            count = int(parts[2])
+        except ValueError:
+            count = 1
+        if count <= 1 or self.workers == 1:
+            # 전체 형식 검사는 워커의 decode_tick_frame이 한다 (단건은 분할 없이 종목코드만)
+            sep = payload.find("^")
+            if count <= 0 or sep < 0:
+                self._invalid_frame(raw, count, 1 if sep < 0 else None)
+                return
+            index = worker_of.get(payload[:sep])
+            if index is not None:
+                self._pending[index].append(raw)
+        else:
+            fields = payload.split("^")
+            width, remainder = divmod(len(fields), count)
+            if remainder or width < H0STCNT0_MIN_FIELDS:
+                self._invalid_frame(raw, count, len(fields))
+                return
+            groups: dict[int, list[int]] = {}
+            for base in range(0, count * width, width):
+                index = worker_of.get(fields[base])
+                if index is not None:
+                    groups.setdefault(index, []).append(base)
+            if len(groups) == 1 and len(next(iter(groups.values()))) == count:
+                self._pending[next(iter(groups))].append(raw)
+            else:
+                self.frames_split += 1
+                for index, bases in groups.items():
+                    records = "^".join(
+                        "^".join(fields[b:b + width]) for b in bases
+                    )
+                    self._pending[index].append(f"0|H0STCNT0|{len(bases):03d}|{records}")
+        self.frames_routed += 1
+
+        if not self._flush_scheduled:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+                return
+            self._flush_scheduled = True
+            loop.call_soon(self.flush)
+
+    def _invalid_frame(self, raw: str, count: int, n_fields: Optional[int]) -> None:
+        self.frames_invalid += 1
+        logger.warning(f"틱 프레임 형식 오류: count={count} fields={n_fields} | raw={raw[:100]}")
+
+    def flush(self) -> None:
+        self._flush_scheduled = False
+        for index, frames in enumerate(self._pending):
+            if frames:
+                self._inboxes[index].put(("frames", frames))
+                self._pending[index] = []
+
+    def close_before(self, minute: int) -> None:
+        """모든 워커에 타이머 마감 요청 (닫힌 캔들은 get_closed로 수신)"""
+        self.flush()
+        for inbox in self._inboxes:
+            inbox.put(("close", minute))
+
+    def get_closed(self, timeout: float = 0.5) -> Optional[list[CandleBar]]:
+        """
+        워커가 보낸 닫힌 캔들 묶음 수신 (블로킹 — executor에서 호출).
+        대기 시간 초과 시 [], 풀 종료 시 None.
+        """
+        try:
+            return self._outbox.get(timeout=timeout)
+        except queue.Empty:
+            return []
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(p.is_alive() for p in self._procs),
+            "frames_routed": self.frames_routed,
+            "frames_split": self.frames_split,
+            "frames_invalid": self.frames_invalid,
+            "stocks_per_worker": [
+                sum(1 for i in self._worker_of.values() if i == w)
+                for w in range(self.workers)
+            ],
+        }
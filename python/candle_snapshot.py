@@ -0,0 +1,287 @@
+"""
+전 종목 단면(cross-section) 시세 스냅샷
+
+스크리너가 종목마다 get_buffer(code).get_current()를 부르면 종목 수만큼 락을
+잡고 CandleBar를 복사합니다. CrossSection은 종목당 한 행(row)을 가진 컬럼 배열을
+틱 반영·분봉 마감 시점에 증분으로 갱신해 두고, snapshot()은 배열을 통째로
+복사(memcpy)만 하므로 2,000종목 조회도 수 µs~수십 µs에 끝납니다.
+
+RealtimeCandleManager가 종목마다 행을 만들고(add_stock), 행은 버퍼의 분봉
+리스너로 등록되어 완성 분봉(빈 분봉 포함)으로 N분 수익률·거래량을 갱신합니다.
+현재 분봉 컬럼은 매니저가 종목별 틱 배치를 반영한 직후 한 번 갱신합니다.
+
+사용법:
+    snap = manager.market_snapshot()
+    snap["change"]              # 종목별 시가(당일 첫 체결) 대비 등락률 (array)
+    snap.to_numpy()["return_n"] # numpy 배열 (복사 없음, numpy 필요)
+    snap.get("005930")          # 한 종목의 컬럼 값 dict
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Callable, Optional, TypeVar
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성 (MarketSnapshot.to_numpy 전용)
+    np = None
+
+T = TypeVar("T")
+
+NAN = math.nan
+
+# (컬럼명, array typecode) — snapshot()이 돌려주는 컬럼
+SNAPSHOT_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("last", "d"),         # 최근 체결가 (체결·분봉이 없으면 NaN)
+    ("open", "d"),         # 현재(미완성) 분봉 시가 (현재 분봉이 없으면 NaN)
+    ("high", "d"),
+    ("low", "d"),
+    ("volume", "q"),       # 현재 분봉 거래량
+    ("trade_count", "i"),  # 현재 분봉 체결 건수
+    ("day_open", "d"),     # 당일 첫 분봉 시가
+    ("change", "d"),       # last / day_open - 1
+    ("return_n", "d"),     # last / N분 전 종가 - 1 (분봉이 N개 미만이면 NaN)
+    ("volume_n", "q"),     # 최근 N분 거래량 (현재 분봉 포함)
+    ("second", "q"),       # 최근 체결시각 (epoch-second, 없으면 0)
+)
+# 내부 컬럼: N분 전 종가, 현재 분봉을 뺀 최근 N-1분 거래량
+_STATE_COLUMNS: tuple[tuple[str, str], ...] = (("ref_close", "d"), ("closed_volume", "q"))
+_EMPTY = {"d": NAN, "q": 0, "i": 0}
+
+# 읽기 쪽 seqlock 재시도 한도 (넘으면 락을 잡고 읽음)
+SNAPSHOT_RETRIES = 100
+
+
+class SnapshotRow:
+    """
+    CrossSection의 한 종목 행. StockCandleBuffer 분봉 리스너로 등록된다.
+    closes / volumes: 최근 N개 완성 분봉의 종가·거래량
+    """
+
+    __slots__ = ("table", "stock_code", "index", "closes", "volumes", "day")
+
+    def __init__(self, table: CrossSection, stock_code: str, index: int):
+        self.table = table
+        self.stock_code = stock_code
+        self.index = index
+        self.closes: deque[float] = deque(maxlen=table.window)
+        self.volumes: deque[int] = deque(maxlen=table.window)
+        self.day = -1  # 마지막으로 반영한 거래일 (epoch-day)
+
+    def on_bar_closed(
+        self, minute: int, o: float, h: float, l: float, c: float, v: int
+    ) -> None:
+        self.table._bar_closed(self, minute, o, c, v)
+
+    def on_history_reset(self) -> None:
+        self.closes.clear()
+        self.volumes.clear()
+        self.day = -1
+        self.table._reset_row(self.index)
+
+
+class CrossSection:
+    """
+    종목별 행을 가진 컬럼형 시세 표 (쓰기는 이벤트 루프 스레드 한 곳에서만).
+    갱신할 때마다 _lock을 잡고 _seq를 홀수로 만들고, snapshot()은 복사 전후 seq가
+    같을 때만 결과를 돌려준다 (StockCandleBuffer와 같은 seqlock, 재시도를 다 쓰면
+    락을 잡고 읽음).
+
+    Parameters
+    ----------
+    window : int
+        return_n / volume_n의 기간(분)
+    """
+
+    def __init__(self, window: int = 5):
+        if window < 1:
+            raise ValueError(f"window는 1 이상이어야 합니다: {window}")
+        self.window = window
+        self.codes: list[str] = []
+        self.rows: dict[str, SnapshotRow] = {}
+        for name, typecode in SNAPSHOT_COLUMNS + _STATE_COLUMNS:
+            setattr(self, name, array(typecode))
+        self._seq = 0
+        self._lock = threading.Lock()  # 쓰기끼리, 그리고 재시도를 다 쓴 읽기와 배제
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # ──────── 행 관리 ────────
+    def add(self, stock_code: str) -> SnapshotRow:
+        """종목 행 추가 (이미 있으면 기존 행)"""
+        row = self.rows.get(stock_code)
+        if row is not None:
+            return row
+        with self._lock:
+            self._seq += 1
+            for name, typecode in SNAPSHOT_COLUMNS + _STATE_COLUMNS:
+                getattr(self, name).append(_EMPTY[typecode])
+            row = self.rows[stock_code] = SnapshotRow(self, stock_code, len(self.codes))
+            self.codes.append(stock_code)
+            self._seq += 1
+        return row
+
+    def remove(self, stock_code: str) -> None:
+        """종목 행 제거 (마지막 행을 빈자리로 옮김)"""
+        row = self.rows.pop(stock_code, None)
+        if row is None:
+            return
+        with self._lock:
+            self._seq += 1
+            i, last = row.index, len(self.codes) - 1
+            for name, _ in SNAPSHOT_COLUMNS + _STATE_COLUMNS:
+                col = getattr(self, name)
+                col[i] = col[last]
+                col.pop()
+            moved = self.codes.pop()
+            if i != last:
+                self.codes[i] = moved
+                self.rows[moved].index = i
+            self._seq += 1
+
+    def _reset_row(self, i: int) -> None:
+        with self._lock:
+            self._seq += 1
+            for name, typecode in SNAPSHOT_COLUMNS + _STATE_COLUMNS:
+                getattr(self, name)[i] = _EMPTY[typecode]
+            self._seq += 1
+
+    # ──────── 갱신 ────────
+    def tick(
+        self,
+        row: SnapshotRow,
+        o: float,
+        h: float,
+        l: float,
+        c: float,
+        v: int,
+        tc: int,
+        second: int,
+    ) -> None:
+        """틱 배치 반영 후 현재 분봉(o/h/l/c/v/tc)과 최근 체결시각으로 행 갱신"""
+        with self._lock:
+            self._seq += 1
+            i = row.index
+            self.last[i] = c
+            self.open[i] = o
+            self.high[i] = h
+            self.low[i] = l
+            self.volume[i] = v
+            self.trade_count[i] = tc
+            self.second[i] = second
+            day = second // 86400
+            day_open = self.day_open[i]
+            if day != row.day or math.isnan(day_open):  # 당일 첫 체결
+                row.day = day
+                day_open = self.day_open[i] = o
+            self.change[i] = c / day_open - 1 if day_open else NAN
+            ref = self.ref_close[i]
+            self.return_n[i] = c / ref - 1 if ref else NAN
+            self.volume_n[i] = self.closed_volume[i] + v
+            self._seq += 1
+
+    def _bar_closed(self, row: SnapshotRow, minute: int, o: float, c: float, v: int) -> None:
+        """완성 분봉(빈 분봉 포함) 반영: N분 기준값 갱신, 현재 분봉 컬럼 비움"""
+        with self._lock:
+            self._seq += 1
+            i = row.index
+            closes, volumes = row.closes, row.volumes
+            closes.append(c)
+            volumes.append(v)
+            day = minute // 1440
+            if day != row.day:
+                row.day = day
+                self.day_open[i] = o if v else NAN
+            elif v and math.isnan(self.day_open[i]):  # 당일 첫 거래 분봉 (앞은 빈 분봉)
+                self.day_open[i] = o
+            if len(closes) == self.window:
+                ref = self.ref_close[i] = closes[0]
+                closed_volume = sum(volumes) - volumes[0]
+            else:
+                ref = self.ref_close[i] = NAN
+                closed_volume = sum(volumes)
+            self.closed_volume[i] = closed_volume
+            self.last[i] = c
+            self.open[i] = self.high[i] = self.low[i] = NAN
+            self.volume[i] = 0
+            self.trade_count[i] = 0
+            day_open = self.day_open[i]
+            self.change[i] = c / day_open - 1 if day_open else NAN
+            self.return_n[i] = c / ref - 1 if ref else NAN
+            self.volume_n[i] = closed_volume
+            self._seq += 1
+
+    # ──────── 읽기 ────────
+    def _read(self, read: Callable[[], T]) -> T:
+        """
+        락 없이 일관된 읽기 (쓰기 중이거나 읽는 동안 갱신되면 다시 읽음).
+        SNAPSHOT_RETRIES번 실패하면 락을 잡고 읽는다 (검증 안 된 결과는 돌려주지 않음).
+        """
+        for _ in range(SNAPSHOT_RETRIES):
+            seq = self._seq
+            if seq & 1:
+                time.sleep(0)  # 쓰는 스레드에 GIL 양보
+                continue
+            try:
+                result = read()
+            except (IndexError, ValueError):  # 행 추가·제거 도중 → 재시도
+                continue
+            if self._seq == seq:
+                return result
+        with self._lock:
+            return read()
+
+    def snapshot(self) -> MarketSnapshot:
+        """전 종목 컬럼 배열 복사본"""
+
+        def read() -> MarketSnapshot:
+            columns = {
+                name: array(typecode, getattr(self, name)) for name, typecode in SNAPSHOT_COLUMNS
+            }
+            return MarketSnapshot(list(self.codes), columns, self.window)
+
+        return self._read(read)
+
+
+class MarketSnapshot:
+    """
+    CrossSection.snapshot() 결과 (읽기 전용 복사본).
+    codes[i] 종목의 값은 columns[name][i]에 있다.
+    """
+
+    def __init__(self, codes: list[str], columns: dict[str, array], window: int):
+        self.codes = codes
+        self.columns = columns
+        self.window = window
+        self._index: Optional[dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, name: str) -> array:
+        return self.columns[name]
+
+    def index(self, stock_code: str) -> int:
+        if self._index is None:
+            self._index = {code: i for i, code in enumerate(self.codes)}
+        return self._index[stock_code]
+
+    def get(self, stock_code: str) -> dict:
+        """한 종목의 컬럼 값 dict"""
+        i = self.index(stock_code)
+        return {name: col[i] for name, col in self.columns.items()}
+
+    def to_numpy(self) -> dict:
+        """컬럼별 NumPy 배열 (복사 없음). numpy 필요"""
+        if np is None:
+            raise ImportError("to_numpy()를 사용하려면 numpy를 설치해주세요")
+        return {name: np.frombuffer(col, dtype=col.typecode) for name, col in self.columns.items()}
+
+    def __repr__(self) -> str:
+        return f"MarketSnapshot({len(self.codes)} stocks, window={self.window}m)"
@@ -0,0 +1,419 @@
+"""
+분봉 영구 저장소 (append-only 고정폭 바이너리 파일 + mmap 읽기)
+
+RealtimeCandleManager(store=CandleStore(...))로 연결하면 마감된 분봉을
+종목·거래일별 파일 끝에 추가하고, 재시작 시 add_stock에서 당일 파일을
+다시 읽어 get_candles가 곧바로 하루치 분봉을 돌려주도록 합니다.
+
+파일 경로: {root}/{YYYYMMDD}/{종목코드}.candles
+
+파일 레이아웃 (리틀 엔디언):
+  헤더 16바이트  : MAGIC(8) + record_size(uint32) + reserved(uint32)
+  레코드 52바이트: minute(int64) open/high/low/close(float64)
+                   volume(int64) trade_count(int32)   ← CANDLE_COLUMNS 순서
+레코드는 분(minute) 오름차순으로만 추가되므로 시간 구간 조회는 이진 탐색으로
+처리합니다. 백필처럼 이미 저장된 분 이전·사이를 채울 때는 rewrite_many가 기존
+레코드와 병합한 파일을 새로 써서 원자적으로 바꿉니다. 쓰기 도중 종료되어 남은 불완전한 꼬리 레코드는 읽을 때 무시하고,
+다음에 파일을 열어 쓸 때 잘라냅니다.
+
+쓰기는 os.write 1회/배치로 커널 페이지 캐시까지 바로 내려가므로 프로세스가
+죽어도 유실되지 않으며, 전원 장애 대비용 fsync는 sync()에서 모아서 수행합니다
+(매니저는 fsync_interval초마다 executor에서 호출).
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from datetime import date, datetime
+from typing import Iterable, Optional, Union
+
+from realtime_candle import (
+    CANDLE_COLUMNS,
+    CandleBar,
+    CandleView,
+    to_epoch_minute,
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성 (StoredCandles.to_numpy 전용)
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KISCNDL1"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<q4dqi")  # CANDLE_COLUMNS 순서, 패딩 없음
+HEADER_BYTES = HEADER.size
+RECORD_BYTES = RECORD.size
+_MINUTE = struct.Struct("<q")
+
+DayLike = Union[date, datetime, str, None]
+
+
+def day_key(day: DayLike = None) -> str:
+    """거래일 → 'YYYYMMDD' (None이면 오늘)"""
+    if day is None:
+        day = date.today()
+    if isinstance(day, str):
+        return day.replace("-", "")
+    return day.strftime("%Y%m%d")
+
+
+def numpy_dtype():
+    """레코드 레이아웃과 같은 NumPy structured dtype (numpy 필요)"""
+    if np is None:
+        raise ImportError("to_numpy()를 사용하려면 numpy를 설치해주세요")
+    return np.dtype([
+        ("minute", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+        ("close", "<f8"), ("volume", "<i8"), ("trade_count", "<i4"),
+    ])
+
+
+def _fsync_dir(path: str) -> None:
+    """디렉터리 fsync (os.replace로 바꾼 이름을 디스크에 남김, 지원하지 않는 OS는 무시)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# ──────────────────────────────────────────────
+# 읽기 (mmap)
+# ──────────────────────────────────────────────
+class StoredCandles:
+    """
+    분봉 파일 1개의 읽기 전용 mmap 뷰.
+    열어 둔 시점의 완성 레코드만 보이며, 이후 추가된 분봉은 다시 열어야 보인다.
+    records()/to_numpy()는 mmap을 복사 없이 참조하므로 close() 전까지만 유효하다.
+    """
+
+    def __init__(self, stock_code: str, path: str):
+        self.stock_code = stock_code
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_BYTES:
+                return
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, record_size, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or record_size != RECORD_BYTES:
+            self.close()
+            raise ValueError(f"분봉 파일 형식 불일치: {path}")
+        self._count = (size - HEADER_BYTES) // RECORD_BYTES
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> StoredCandles:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def minute_at(self, i: int) -> int:
+        return _MINUTE.unpack_from(self._mm, HEADER_BYTES + i * RECORD_BYTES)[0]
+
+    def bisect(self, minute: int) -> int:
+        """minute 이상인 첫 레코드 위치 (레코드는 분 오름차순)"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.minute_at(mid) < minute:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def span(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> tuple[int, int]:
+        """[start, end) 시간 구간의 레코드 위치 범위 (None이면 처음/끝까지)"""
+        lo = 0 if start is None else self.bisect(to_epoch_minute(start))
+        hi = self._count if end is None else self.bisect(to_epoch_minute(end))
+        return lo, max(lo, hi)
+
+    def records(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> memoryview:
+        """[start, end) 구간 레코드의 원시 바이트 (mmap을 복사 없이 참조)"""
+        if self._mm is None:
+            return memoryview(b"")
+        lo, hi = self.span(start, end)
+        return memoryview(self._mm)[
+            HEADER_BYTES + lo * RECORD_BYTES:HEADER_BYTES + hi * RECORD_BYTES
+        ]
+
+    def to_numpy(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ):
+        """[start, end) 구간 structured array (mmap을 복사 없이 참조). numpy 필요"""
+        return np.frombuffer(self.records(start, end), dtype=numpy_dtype())
+
+    def columns(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> dict[str, array]:
+        """[start, end) 구간의 컬럼 배열 복사본 (CandleView용)"""
+        out = {name: array(typecode) for name, typecode in CANDLE_COLUMNS}
+        cols = [out[name] for name, _ in CANDLE_COLUMNS]
+        view = self.records(start, end)
+        for rec in RECORD.iter_unpack(view):
+            for col, value in zip(cols, rec):
+                col.append(value)
+        view.release()
+        return out
+
+    def view(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> CandleView:
+        return CandleView(self.stock_code, self.columns(start, end))
+
+
+# ──────────────────────────────────────────────
+# 쓰기 (append-only)
+# ──────────────────────────────────────────────
+class CandleStore:
+    """
+    종목·거래일별 append-only 분봉 파일 저장소.
+
+    Parameters
+    ----------
+    root : str
+        저장 디렉터리
+    fsync_interval : float
+        매니저가 sync()를 호출하는 주기(초). 0이면 append마다 fsync
+    """
+
+    def __init__(self, root: str, fsync_interval: float = 1.0):
+        self.root = root
+        self.fsync_interval = fsync_interval
+        self._fds: dict[tuple[str, str], int] = {}   # (day, 종목코드) → fd
+        self._last_minute: dict[tuple[str, str], int] = {}
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._records_written = 0
+        self._fsync_count = 0
+        self._last_sync = time.monotonic()
+
+    def path(self, stock_code: str, day: DayLike = None) -> str:
+        return os.path.join(self.root, day_key(day), f"{stock_code}.candles")
+
+    def _open_for_append(self, day: str, stock_code: str) -> int:
+        """파일 열기 (없으면 헤더 기록, 불완전한 꼬리 레코드는 잘라냄)"""
+        # 거래일이 바뀌면 지난 거래일 파일은 fsync 후 닫는다
+        for key in [k for k in self._fds if k[0] < day]:
+            fd = self._fds.pop(key)
+            self._last_minute.pop(key, None)
+            self._dirty.discard(fd)
+            os.fsync(fd)
+            os.close(fd)
+
+        path = self.path(stock_code, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        size = os.fstat(fd).st_size
+        last_minute = -1
+        if size < HEADER_BYTES:
+            os.ftruncate(fd, 0)
+            os.write(fd, HEADER.pack(MAGIC, RECORD_BYTES, 0))
+        else:
+            whole = HEADER_BYTES + (size - HEADER_BYTES) // RECORD_BYTES * RECORD_BYTES
+            if whole != size:
+                logger.warning(f"분봉 파일 꼬리 {size - whole}바이트 잘라냄: {path}")
+                os.ftruncate(fd, whole)
+            if whole > HEADER_BYTES:
+                last_minute = _MINUTE.unpack(
+                    os.pread(fd, _MINUTE.size, whole - RECORD_BYTES)
+                )[0]
+        self._fds[(day, stock_code)] = fd
+        self._last_minute[(day, stock_code)] = last_minute
+        return fd
+
+    def append(self, bar: CandleBar) -> None:
+        self.append_many((bar,))
+
+    def append_many(self, bars: Iterable[CandleBar]) -> int:
+        """
+        마감된 분봉 추가 (종목·거래일별로 묶어 파일당 write 1회).
+        이미 저장된 분 이전/같은 분의 분봉은 건너뛴다 (재적재 후 중복 방지).
+        반환값: 기록한 분봉 수
+        """
+        grouped: dict[tuple[str, str], list[bytes]] = {}
+        with self._lock:
+            for bar in bars:
+                key = (bar.dt.strftime("%Y%m%d"), bar.stock_code)
+                if key not in self._fds:
+                    self._open_for_append(*key)
+                minute = to_epoch_minute(bar.dt)
+                if minute <= self._last_minute[key]:
+                    continue
+                self._last_minute[key] = minute
+                grouped.setdefault(key, []).append(RECORD.pack(
+                    minute, bar.open, bar.high, bar.low, bar.close,
+                    bar.volume, bar.trade_count,
+                ))
+            written = 0
+            for key, chunks in grouped.items():
+                fd = self._fds[key]
+                os.write(fd, b"".join(chunks))
+                self._dirty.add(fd)
+                written += len(chunks)
+            self._records_written += written
+        if self.fsync_interval <= 0:
+            self.sync()
+        return written
+
+    def rewrite_many(self, bars: Iterable[CandleBar]) -> int:
+        """
+        이미 저장된 분 이전·사이의 분봉까지 반영 (백필 병합 결과 저장용).
+        종목·거래일 파일의 기존 레코드와 병합해(같은 분은 bars 쪽) 임시 파일에 쓰고
+        fsync 후 os.replace로 바꾸고 디렉터리까지 fsync하므로, 도중에 종료되어도
+        기존 파일은 온전하고 교체 후에는 이름 변경도 디스크에 남는다 (블로킹 — executor에서 호출).
+        열려 있던 추가 기록용 fd는 닫고, 다음 append에서 새 파일을 다시 연다.
+        반환값: 새로 들어가거나 값이 바뀐 분봉 수
+        """
+        grouped: dict[tuple[str, str], dict[int, bytes]] = {}
+        for bar in bars:
+            key = (bar.dt.strftime("%Y%m%d"), bar.stock_code)
+            grouped.setdefault(key, {})[to_epoch_minute(bar.dt)] = RECORD.pack(
+                to_epoch_minute(bar.dt), bar.open, bar.high, bar.low, bar.close,
+                bar.volume, bar.trade_count,
+            )
+        changed = 0
+        with self._lock:
+            for (day, stock_code), records in grouped.items():
+                fd = self._fds.pop((day, stock_code), None)
+                if fd is not None:
+                    self._dirty.discard(fd)
+                    os.close(fd)
+                self._last_minute.pop((day, stock_code), None)
+
+                path = self.path(stock_code, day)
+                stored = self._read_records(path)
+                changed += sum(1 for minute, rec in records.items() if stored.get(minute) != rec)
+                stored.update(records)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(HEADER.pack(MAGIC, RECORD_BYTES, 0))
+                    f.write(b"".join(stored[minute] for minute in sorted(stored)))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+                _fsync_dir(os.path.dirname(path))
+            self._records_written += changed
+        return changed
+
+    @staticmethod
+    def _read_records(path: str) -> dict[int, bytes]:
+        """파일의 완성 레코드 (분 → 레코드 바이트, 파일이 없으면 빈 dict)"""
+        if not os.path.exists(path):
+            return {}
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER_BYTES:
+            return {}
+        magic, record_size, _ = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or record_size != RECORD_BYTES:
+            raise ValueError(f"분봉 파일 형식 불일치: {path}")
+        end = HEADER_BYTES + (len(data) - HEADER_BYTES) // RECORD_BYTES * RECORD_BYTES
+        return {
+            _MINUTE.unpack_from(data, offset)[0]: data[offset:offset + RECORD_BYTES]
+            for offset in range(HEADER_BYTES, end, RECORD_BYTES)
+        }
+
+    def sync(self) -> int:
+        """기록 후 아직 fsync하지 않은 파일을 모두 fsync. 반환값: fsync한 파일 수"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        for fd in dirty:
+            try:
+                os.fsync(fd)
+            except OSError as e:  # 거래일 전환으로 이미 닫힌 fd
+                logger.debug(f"fsync 건너뜀 (fd={fd}): {e}")
+        self._fsync_count += len(dirty)
+        self._last_sync = time.monotonic()
+        return len(dirty)
+
+    def release(self, stock_code: str) -> None:
+        """종목 파일을 fsync 후 닫기 (종목 제거 시, 이후 기록하면 다시 연다)"""
+        self.release_many((stock_code,))
+
+    def release_many(self, stock_codes: Iterable[str]) -> None:
+        """여러 종목 파일을 fsync 후 닫기 (블로킹 — 매니저는 executor에서 호출)"""
+        codes = set(stock_codes)
+        with self._lock:
+            keys = [key for key in self._fds if key[1] in codes]
+            fds = [self._fds.pop(key) for key in keys]
+            for key in keys:
+                self._last_minute.pop(key, None)
+            self._dirty.difference_update(fds)
+        try:
+            for fd in fds:
+                os.fsync(fd)
+        finally:
+            for fd in fds:
+                os.close(fd)
+        self._fsync_count += len(fds)
+
+    def close(self) -> None:
+        self.sync()
+        with self._lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+            self._last_minute.clear()
+
+    # ──────── 읽기 ────────
+    def open(self, stock_code: str, day: DayLike = None) -> Optional[StoredCandles]:
+        """종목·거래일 파일의 mmap 뷰 (파일이 없으면 None)"""
+        path = self.path(stock_code, day)
+        if not os.path.exists(path):
+            return None
+        return StoredCandles(stock_code, path)
+
+    def read(
+        self,
+        stock_code: str,
+        day: DayLike = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> CandleView:
+        """종목·거래일의 [start, end) 구간 분봉 (파일이 없으면 빈 CandleView)"""
+        stored = self.open(stock_code, day)
+        if stored is None:
+            return CandleView(
+                stock_code, {name: array(typecode) for name, typecode in CANDLE_COLUMNS}
+            )
+        with stored:
+            return stored.view(start, end)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "open_files": len(self._fds),
+            "records_written": self._records_written,
+            "pending_sync": len(self._dirty),
+            "fsync_count": self._fsync_count,
+            "seconds_since_sync": round(time.monotonic() - self._last_sync, 3),
+        }
@@ -0,0 +1,575 @@
+"""
+로컬 KIS 실시간 시세 시뮬레이터
+
+실제 KIS 계정 없이 RealtimeCandleManager를 부하 시험하기 위한 로컬 서버입니다.
+KIS 프로토콜 중 매니저가 사용하는 부분만 흉내 냅니다.
+  - REST  POST /oauth2/Approval        → {"approval_key": ...}
+  - REST  POST /oauth2/tokenP          → {"access_token": ...}
+  - REST  GET  .../inquire-time-itemchartprice (주식당일분봉조회)
+                                        → 종목·분마다 결정적인 09:00~15:30 분봉 30개씩
+                                          (rest_rate_limit 초과 시 EGW00201)
+  - WS    구독/해제 요청 (tr_type 1/2) → SUBSCRIBE / UNSUBSCRIBE SUCCESS 응답
+                                        (세션당 max_per_session 초과 시 MAX SUBSCRIBE OVER,
+                                         ws_rate_limit 초과 시 거절)
+  - WS    PINGPONG                      → ping_interval초마다 전송, 응답 수 집계
+  - WS    H0STCNT0 체결 프레임          → 0|H0STCNT0|NNN|... (프레임당 레코드 N개)
+  - WS    H0STASP0 호가 프레임          → 0|H0STASP0|001|... (books_per_symbol > 0일 때)
+
+사용법:
+    sim = KisSimulator(ticks_per_symbol=20, records_per_frame=5)
+    await sim.start()
+    manager = RealtimeCandleManager("sim", "sim", ws_url=sim.ws_url, rest_url=sim.rest_url)
+    ...
+    await sim.stop()
+
+    # 단독 실행 (다른 프로세스의 매니저가 접속)
+    python kis_simulator.py --ws-port 21000 --rest-port 9443 --rate 50
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+# H0STCNT0 / H0STASP0 레코드 1건의 필드 수
+H0STCNT0_FIELDS = 46
+H0STASP0_FIELDS = 59
+
+# 주식당일분봉조회 경로 / 페이지당 분봉 수 / 장 시간 (분)
+CHART_PATH = "/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice"
+CHART_PAGE_SIZE = 30
+MARKET_OPEN_MINUTE = 9 * 60
+MARKET_CLOSE_MINUTE = 15 * 60 + 30
+
+
+# ──────────────────────────────────────────────
+# 프레임 생성
+# ──────────────────────────────────────────────
+def make_record(
+    stock_code: str,
+    hhmmss: str,
+    price: int,
+    qty: int,
+    side: int = 1,
+    strength: float = 0.0,
+    acml_vol: int = 0,
+    acml_value: int = 0,
+) -> str:
+    """H0STCNT0 레코드 1건 (^-구분 46필드) 생성 (side: 체결구분 1=매수, 5=매도)"""
+    fields = ["0"] * H0STCNT0_FIELDS
+    fields[0] = stock_code
+    fields[1] = hhmmss
+    fields[2] = str(price)
+    fields[10] = str(price + 100)  # ASKP1
+    fields[11] = str(price)        # BIDP1
+    fields[12] = str(qty)
+    fields[13] = str(acml_vol)     # ACML_VOL
+    fields[14] = str(acml_value)   # ACML_TR_PBMN
+    fields[18] = f"{strength:.2f}"  # CTTR
+    fields[21] = str(side)
+    return "^".join(fields)
+
+
+def make_book_record(
+    stock_code: str,
+    hhmmss: str,
+    price: int,
+    spread: int,
+    ask_qty: list[int],
+    bid_qty: list[int],
+) -> str:
+    """
+    H0STASP0 레코드 1건 (^-구분 59필드) 생성.
+    매수호가1 = price, 매도호가1 = price + spread, 이후 호가 단위 10원.
+    """
+    fields = ["0"] * H0STASP0_FIELDS
+    fields[0] = stock_code
+    fields[1] = hhmmss
+    for k in range(10):
+        fields[3 + k] = str(price + spread + k * 10)  # ASKP1-10
+        fields[13 + k] = str(price - k * 10)          # BIDP1-10
+        fields[23 + k] = str(ask_qty[k])              # ASKP_RSQN1-10
+        fields[33 + k] = str(bid_qty[k])              # BIDP_RSQN1-10
+    fields[43] = str(sum(ask_qty))
+    fields[44] = str(sum(bid_qty))
+    return "^".join(fields)
+
+
+def make_frame(records: list[str], tr_id: str = "H0STCNT0") -> str:
+    """레코드 목록 → 0|H0STCNT0|NNN|... 프레임"""
+    return f"0|{tr_id}|{len(records):03d}|" + "^".join(records)
+
+
+def chart_bar(stock_code: str, day: str, minute_of_day: int) -> dict:
+    """
+    주식당일분봉조회 output2 항목 1개 (종목·거래일·분에 대해 항상 같은 값).
+    10분에 한 번꼴로 거래량 0인 분봉을 섞는다.
+    """
+    rng = random.Random(zlib.crc32(f"{stock_code}{day}{minute_of_day}".encode()))
+    base = 1_000 + zlib.crc32(stock_code.encode()) % 5_000 * 10
+    open_ = base + rng.randint(-20, 20) * 10
+    close = base + rng.randint(-20, 20) * 10
+    volume = 0 if rng.random() < 0.1 else rng.randint(1, 50_000)
+    return {
+        "stck_bsop_date": day,
+        "stck_cntg_hour": f"{minute_of_day // 60:02d}{minute_of_day % 60:02d}00",
+        "stck_prpr": str(close),
+        "stck_oprc": str(open_),
+        "stck_hgpr": str(max(open_, close) + rng.randint(0, 5) * 10),
+        "stck_lwpr": str(min(open_, close) - rng.randint(0, 5) * 10),
+        "cntg_vol": str(volume),
+        "acml_tr_pbmn": "0",
+    }
+
+
+def _response(tr_id: str, tr_key: str, rt_cd: str, msg1: str) -> str:
+    """구독/해제 요청에 대한 KIS 형식 JSON 응답"""
+    return json.dumps({
+        "header": {"tr_id": tr_id, "tr_key": tr_key, "encrypt": "N"},
+        "body": {
+            "rt_cd": rt_cd,
+            "msg_cd": "OPSP0000" if rt_cd == "0" else "OPSP0008",
+            "msg1": msg1,
+        },
+    })
+
+
+# ──────────────────────────────────────────────
+# 시뮬레이터
+# ──────────────────────────────────────────────
+class SimSession:
+    """시뮬레이터에 접속한 WebSocket 연결 1개"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.subscribed: list[str] = []
+        self.books: list[str] = []  # H0STASP0 구독 종목
+        self.connected_at = time.perf_counter()
+        self.pongs = 0
+
+
+class KisSimulator:
+    """
+    로컬 KIS WebSocket + Approval REST 서버.
+
+    Parameters
+    ----------
+    host : str
+        바인드 주소 (기본 127.0.0.1)
+    ws_port, rest_port : int
+        포트 (0이면 임의 포트, 시작 후 ws_url / rest_url 참고)
+    ticks_per_symbol : float
+        구독 종목당 초당 체결 수
+    records_per_frame : int
+        프레임당 최대 레코드 수 (1이면 단건 프레임)
+    interval : float
+        체결 생성 주기(초). 주기마다 밀린 체결을 프레임으로 묶어 보낸다
+    ping_interval : float
+        PINGPONG 전송 주기(초, 0이면 보내지 않음)
+    max_per_session : int
+        세션당 실시간 등록 한도 (KIS: 41, 체결·호가 구독을 합산)
+    latency_probe : bool
+        True면 체결량 필드에 일련번호를 넣고 전송 시각을 sent_ns에 기록한다
+        (on_tick의 qty로 전송 → 콜백 지연 측정)
+    rest_rate_limit : int
+        분봉 조회 초당 허용 건수 (0이면 무제한). 같은 초에 넘으면 KIS처럼
+        HTTP 500 + msg_cd EGW00201로 거절한다
+    books_per_symbol : float
+        호가(H0STASP0) 구독 종목당 초당 호가 갱신 수 (0이면 보내지 않음)
+    ws_rate_limit : int
+        전 세션 합산 구독/해제 요청 초당 허용 건수 (0이면 무제한). 같은 초에 넘으면
+        요청을 반영하지 않고 rt_cd "1"로 거절한다
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        ws_port: int = 0,
+        rest_port: int = 0,
+        ticks_per_symbol: float = 10.0,
+        records_per_frame: int = 1,
+        interval: float = 0.01,
+        ping_interval: float = 10.0,
+        max_per_session: int = 41,
+        latency_probe: bool = False,
+        seed: int = 42,
+        rest_rate_limit: int = 0,
+        books_per_symbol: float = 0.0,
+        ws_rate_limit: int = 0,
+    ):
+        self.host = host
+        self.ws_port = ws_port
+        self.rest_port = rest_port
+        self.ticks_per_symbol = ticks_per_symbol
+        self.records_per_frame = max(1, records_per_frame)
+        self.interval = interval
+        self.ping_interval = ping_interval
+        self.max_per_session = max_per_session
+        self.latency_probe = latency_probe
+        self.rest_rate_limit = rest_rate_limit
+        self.books_per_symbol = books_per_symbol
+        self.ws_rate_limit = ws_rate_limit
+        self.approval_key = uuid.uuid4().hex
+        self.access_token = uuid.uuid4().hex
+        self._rest_window = (0, 0)  # (초, 그 초의 분봉 조회 수)
+        self._ws_window = (0, 0)    # (초, 그 초의 구독/해제 요청 수)
+        self.sessions: set[SimSession] = set()
+        self.sent_ns: dict[int, int] = {}  # 일련번호 → 전송 시각 (perf_counter_ns)
+        self._rng = random.Random(seed)
+        self._prices: dict[str, int] = {}
+        # 종목별 당일 누적 [거래량, 거래대금, 매수 체결량, 매도 체결량]
+        self._totals: dict[str, list[int]] = {}
+        self._seq = 0
+        self._ws_server = None
+        self._rest_server: Optional[asyncio.AbstractServer] = None
+
+        # 통계
+        self.ticks_sent = 0
+        self.frames_sent = 0
+        self.books_sent = 0
+        self.approval_requests = 0
+        self.token_requests = 0
+        self.chart_requests = 0
+        self.chart_rejected = 0
+        self.subscribe_requests = 0
+        self.subscribe_rejected = 0
+        self.connections = 0
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}"
+
+    @property
+    def rest_url(self) -> str:
+        return f"http://{self.host}:{self.rest_port}"
+
+    @property
+    def subscribed_count(self) -> int:
+        """현재 모든 세션에 구독된 종목 수"""
+        return sum(len(s.subscribed) for s in self.sessions)
+
+    async def start(self) -> None:
+        self._ws_server = await websockets.serve(
+            self._handle_ws, self.host, self.ws_port, max_size=None, ping_interval=None
+        )
+        self.ws_port = self._ws_server.sockets[0].getsockname()[1]
+        self._rest_server = await asyncio.start_server(
+            self._handle_rest, self.host, self.rest_port
+        )
+        self.rest_port = self._rest_server.sockets[0].getsockname()[1]
+        logger.info(f"KIS 시뮬레이터 시작: {self.ws_url} / {self.rest_url}")
+
+    async def stop(self) -> None:
+        if self._ws_server is not None:
+            self._ws_server.close()
+            await self._ws_server.wait_closed()
+        if self._rest_server is not None:
+            self._rest_server.close()
+            await self._rest_server.wait_closed()
+
+    async def drop_connections(self) -> int:
+        """접속 중인 모든 WebSocket을 서버 쪽에서 끊음 (재연결 시험용). 반환값: 끊은 수"""
+        sessions = list(self.sessions)
+        await asyncio.gather(
+            *(s.ws.close(code=1011, reason="simulated drop") for s in sessions),
+            return_exceptions=True,
+        )
+        return len(sessions)
+
+    # ──────── REST ────────
+    async def _handle_rest(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Approval·tokenP·분봉 조회만 지원하는 최소 HTTP/1.1 서버 (keep-alive)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                url = urlsplit(target)
+                path = url.path
+                if method == "POST" and path == "/oauth2/Approval":
+                    self.approval_requests += 1
+                    status, body = "200 OK", {"approval_key": self.approval_key}
+                elif method == "POST" and path == "/oauth2/tokenP":
+                    self.token_requests += 1
+                    status, body = "200 OK", {
+                        "access_token": self.access_token,
+                        "token_type": "Bearer",
+                        "expires_in": 86400,
+                    }
+                elif method == "GET" and path == CHART_PATH:
+                    status, body = self._minute_chart(headers, dict(parse_qsl(url.query)))
+                else:
+                    status, body = "404 Not Found", {"error": "not found"}
+                data = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _minute_chart(self, headers: dict, query: dict) -> tuple[str, dict]:
+        """주식당일분봉조회: FID_INPUT_HOUR_1 시각부터 과거로 최대 30개 (내림차순)"""
+        if headers.get("authorization") != f"Bearer {self.access_token}":
+            return "403 Forbidden", {
+                "rt_cd": "1", "msg_cd": "EGW00123", "msg1": "기간이 만료된 token 입니다.",
+            }
+        if self.rest_rate_limit:
+            second = int(time.time())
+            window, count = self._rest_window
+            count = count + 1 if window == second else 1
+            self._rest_window = (second, count)
+            if count > self.rest_rate_limit:
+                self.chart_rejected += 1
+                return "500 Internal Server Error", {
+                    "rt_cd": "1", "msg_cd": "EGW00201", "msg1": "초당 거래건수를 초과하였습니다.",
+                }
+        self.chart_requests += 1
+        code = query.get("FID_INPUT_ISCD", "")
+        hour = query.get("FID_INPUT_HOUR_1", "153000").ljust(6, "0")
+        minute = min(int(hour[:2]) * 60 + int(hour[2:4]), MARKET_CLOSE_MINUTE)
+        day = f"{datetime.now():%Y%m%d}"
+        rows = [
+            chart_bar(code, day, m)
+            for m in range(minute, max(minute - CHART_PAGE_SIZE, MARKET_OPEN_MINUTE - 1), -1)
+        ]
+        return "200 OK", {
+            "rt_cd": "0", "msg_cd": "MCA00000", "msg1": "정상처리 되었습니다.",
+            "output1": {"hts_kor_isnm": code},
+            "output2": rows,
+        }
+
+    # ──────── WebSocket ────────
+    async def _handle_ws(self, ws) -> None:
+        session = SimSession(ws)
+        self.sessions.add(session)
+        self.connections += 1
+        tasks = [asyncio.ensure_future(self._stream_ticks(session))]
+        if self.books_per_symbol > 0:
+            tasks.append(asyncio.ensure_future(self._stream_books(session)))
+        if self.ping_interval > 0:
+            tasks.append(asyncio.ensure_future(self._ping(session)))
+        try:
+            async for message in ws:
+                reply = self._on_message(session, message)
+                if reply is not None:
+                    await ws.send(reply)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.sessions.discard(session)
+
+    def _on_message(self, session: SimSession, message) -> Optional[str]:
+        """클라이언트 메시지 처리. 반환값: 보낼 응답 (없으면 None)"""
+        try:
+            j = json.loads(message)
+        except (TypeError, json.JSONDecodeError):
+            return None
+        header = j.get("header", {})
+        if header.get("tr_id") == "PINGPONG":
+            session.pongs += 1
+            return None
+        tr_input = j.get("body", {}).get("input", {})
+        tr_id = tr_input.get("tr_id", "")
+        code = tr_input.get("tr_key", "")
+        if header.get("approval_key") != self.approval_key:
+            return _response(tr_id, code, "1", "invalid approval : NOT FOUND")
+        if header.get("tr_type") in ("1", "2"):
+            self.subscribe_requests += 1
+            if self.ws_rate_limit:
+                second = int(time.time())
+                window, count = self._ws_window
+                count = count + 1 if window == second else 1
+                self._ws_window = (second, count)
+                if count > self.ws_rate_limit:
+                    self.subscribe_rejected += 1
+                    return _response(tr_id, code, "1", "초당 거래건수를 초과하였습니다.")
+        codes = session.books if tr_id == "H0STASP0" else session.subscribed
+        if header.get("tr_type") == "1":
+            if code in codes:
+                return _response(tr_id, code, "1", "ALREADY IN SUBSCRIBE")
+            if len(session.subscribed) + len(session.books) >= self.max_per_session:
+                return _response(tr_id, code, "1", "MAX SUBSCRIBE OVER")
+            codes.append(code)
+            self._prices.setdefault(code, self._rng.randint(1_000, 500_000))
+            return _response(tr_id, code, "0", "SUBSCRIBE SUCCESS")
+        if header.get("tr_type") == "2":
+            if code in codes:
+                codes.remove(code)
+            return _response(tr_id, code, "0", "UNSUBSCRIBE SUCCESS")
+        return None
+
+    async def _ping(self, session: SimSession) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await session.ws.send(json.dumps({
+                "header": {"tr_id": "PINGPONG", "datetime": f"{datetime.now():%Y%m%d%H%M%S}"}
+            }))
+
+    async def _stream_ticks(self, session: SimSession) -> None:
+        """interval마다 (구독 종목 수 × ticks_per_symbol × 경과 시간)만큼 체결 전송"""
+        rng = self._rng
+        prices = self._prices
+        owed = 0.0
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            codes = session.subscribed
+            owed += len(codes) * self.ticks_per_symbol * (now - last)
+            last = now
+            n = int(owed)
+            if n == 0 or not codes:
+                continue
+            owed -= n
+            hhmmss = f"{datetime.now():%H%M%S}"
+            frames = []
+            records = []
+            probes = []
+            for _ in range(n):
+                code = codes[rng.randrange(len(codes))]
+                price = prices[code] = max(1, prices[code] + rng.randint(-5, 5) * 10)
+                if self.latency_probe:
+                    self._seq += 1
+                    qty = self._seq
+                    probes.append(qty)
+                else:
+                    qty = rng.randint(1, 500)
+                side = 1 if rng.random() < 0.5 else 5
+                totals = self._totals.setdefault(code, [0, 0, 0, 0])
+                totals[0] += qty
+                totals[1] += price * qty
+                totals[2 if side == 1 else 3] += qty
+                strength = totals[2] / totals[3] * 100 if totals[3] else 0.0
+                records.append(
+                    make_record(code, hhmmss, price, qty, side, strength, totals[0], totals[1])
+                )
+                if len(records) == self.records_per_frame:
+                    frames.append(make_frame(records))
+                    records = []
+            if records:
+                frames.append(make_frame(records))
+            if probes:
+                sent = time.perf_counter_ns()
+                for seq in probes:
+                    self.sent_ns[seq] = sent
+            for frame in frames:
+                await session.ws.send(frame)
+            self.ticks_sent += n
+            self.frames_sent += len(frames)
+
+    async def _stream_books(self, session: SimSession) -> None:
+        """interval마다 (호가 구독 종목 수 × books_per_symbol × 경과 시간)만큼 호가 전송 (단건 프레임)"""
+        rng = self._rng
+        prices = self._prices
+        owed = 0.0
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            codes = session.books
+            owed += len(codes) * self.books_per_symbol * (now - last)
+            last = now
+            n = int(owed)
+            if n == 0 or not codes:
+                continue
+            owed -= n
+            hhmmss = f"{datetime.now():%H%M%S}"
+            for _ in range(n):
+                code = codes[rng.randrange(len(codes))]
+                record = make_book_record(
+                    code, hhmmss, prices[code], rng.randint(1, 3) * 10,
+                    [rng.randint(1, 5_000) for _ in range(10)],
+                    [rng.randint(1, 5_000) for _ in range(10)],
+                )
+                await session.ws.send(make_frame([record], "H0STASP0"))
+            self.books_sent += n
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "active_sessions": len(self.sessions),
+            "subscribed": self.subscribed_count,
+            "book_subscribed": sum(len(s.books) for s in self.sessions),
+            "approval_requests": self.approval_requests,
+            "token_requests": self.token_requests,
+            "chart_requests": self.chart_requests,
+            "chart_rejected": self.chart_rejected,
+            "subscribe_requests": self.subscribe_requests,
+            "subscribe_rejected": self.subscribe_rejected,
+            "ticks_sent": self.ticks_sent,
+            "frames_sent": self.frames_sent,
+            "books_sent": self.books_sent,
+            "pongs": sum(s.pongs for s in self.sessions),
+        }
+
+
+# ──────────────────────────────────────────────
+# 단독 실행
+# ──────────────────────────────────────────────
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="로컬 KIS 실시간 시세 시뮬레이터")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ws-port", type=int, default=21000)
+    parser.add_argument("--rest-port", type=int, default=9443)
+    parser.add_argument("--rate", type=float, default=10.0, help="종목당 초당 체결 수")
+    parser.add_argument("--records", type=int, default=1, help="프레임당 최대 레코드 수")
+    parser.add_argument("--books", type=float, default=0.0, help="종목당 초당 호가 갱신 수")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+    async def _main() -> None:
+        sim = KisSimulator(
+            args.host, args.ws_port, args.rest_port,
+            ticks_per_symbol=args.rate, records_per_frame=args.records,
+            books_per_symbol=args.books,
+        )
+        await sim.start()
+        print(f"WS {sim.ws_url} | REST {sim.rest_url}  (Ctrl+C 로 종료)")
+        while True:
+            await asyncio.sleep(10)
+            print(sim.stats)
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -12,32 +12,144 @@ KIS WebSocket에서 수신하는 실시간 체결(H0STCNT0) 데이터를 집계
     manager.add_stock("005930")  # 삼성전자
     manager.on_candle_closed = lambda candle: print(candle)
     asyncio.run(manager.start())
+
+요구 사항: Python 3.10 이상 (CandleBar 등 @dataclass(slots=True)),
+websockets·requests (requirements.txt)
 """
 
 from __future__ import annotations
 
 import asyncio
+import bisect
 import json
 import logging
+import random
+import sys
 import threading
 import time
+from array import array
 from collections import defaultdict, deque
-from dataclasses import dataclass, field, asdict
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
-from typing import Callable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar, Union
 
 import requests
 import websockets
 
+from candle_metrics import CandleMetrics, event_loop_lag_loop, serve_prometheus
+from candle_snapshot import CrossSection, MarketSnapshot, SnapshotRow
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성 (CandleView.to_numpy 전용)
+    np = None
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+
+def to_epoch_minute(dt: datetime) -> int:
+    """datetime(벽시계 기준, tz 무시) → 1970-01-01 00:00부터 경과한 분"""
+    return (dt.toordinal() - _EPOCH_ORDINAL) * 1440 + dt.hour * 60 + dt.minute
+
+
+def from_epoch_minute(minute: int) -> datetime:
+    """epoch-minute → datetime (to_epoch_minute의 역변환)"""
+    return _EPOCH + timedelta(minutes=minute)
+
+
+def to_epoch_second(dt: datetime) -> int:
+    """datetime(벽시계 기준, tz 무시) → 1970-01-01 00:00:00부터 경과한 초"""
+    return (
+        (dt.toordinal() - _EPOCH_ORDINAL) * 86400
+        + dt.hour * 3600 + dt.minute * 60 + dt.second
+    )
+
+
+def from_epoch_second(second: int) -> datetime:
+    """epoch-second → datetime (to_epoch_second의 역변환)"""
+    return _EPOCH + timedelta(seconds=second)
+
+
+class SessionDate:
+    """
+    체결시각(HHMMSS)을 epoch-second로 바꿀 때 쓰는 당일 기준값 캐시.
+    자정의 epoch-second를 날짜가 바뀔 때만 다시 계산하므로, 프레임마다
+    datetime.now() 대신 time.time() 한 번이면 된다.
+    clock: 현재 시각 함수 (기본 time.time, 저널 재생은 기록 당시 수신 시각으로 고정)
+    """
+
+    __slots__ = ("_day_base", "_day_start", "_next_day", "clock")
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._day_base = 0     # 오늘 00:00:00의 epoch-second (벽시계 기준)
+        self._day_start = 0.0  # 오늘 00:00:00의 time.time() 값
+        self._next_day = 0.0   # 다음 자정의 time.time() 값
+        self.clock = clock
+
+    def current(self) -> tuple[int, float]:
+        """(오늘 자정의 epoch-second, 자정 이후 경과 초)"""
+        now = self.clock()
+        if now >= self._next_day or now < self._day_start:
+            dt = datetime.fromtimestamp(now)
+            elapsed = dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1e6
+            self._day_base = (dt.toordinal() - _EPOCH_ORDINAL) * 86400
+            self._day_start = now - elapsed
+            self._next_day = self._day_start + 86400
+        return self._day_base, now - self._day_start
+
+
+_SESSION_DATE = SessionDate()
+
+
+class SymbolTable:
+    """
+    종목코드 intern 표: 종목코드 → 정수 슬롯.
+    프레임에서 잘라낸 종목코드는 레코드마다 새 str이다. 디코더가 names로 등록된
+    종목코드 객체로 바꿔 두면 이후 dict 조회는 해시 재계산 없이 동일 객체 비교로
+    끝나고, 큐에 쌓인 틱 튜플도 레코드별 문자열을 붙잡지 않는다.
+    슬롯은 등록 순서대로 매기며 재사용하지 않는다.
+    """
+
+    __slots__ = ("ids", "codes", "names")
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.codes: list[str] = []
+        self.names: dict[str, str] = {}  # 종목코드 → 등록된 종목코드 객체
+
+    def intern(self, stock_code: str) -> int:
+        """종목코드 등록 (이미 있으면 기존 슬롯)"""
+        slot = self.ids.get(stock_code)
+        if slot is None:
+            stock_code = sys.intern(stock_code)
+            slot = self.ids[stock_code] = len(self.codes)
+            self.codes.append(stock_code)
+            self.names[stock_code] = stock_code
+        return slot
+
+    def get(self, stock_code: str) -> Optional[int]:
+        return self.ids.get(stock_code)
+
+    def __contains__(self, stock_code: str) -> bool:
+        return stock_code in self.ids
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
 
 # ──────────────────────────────────────────────
 # 데이터 모델
 # ──────────────────────────────────────────────
-@dataclass
+@dataclass(slots=True)
 class CandleBar:
-    """1분봉 캔들 데이터"""
+    """1분봉 캔들 데이터 (__slots__: 인스턴스 dict 없음)"""
     stock_code: str
     dt: datetime          # 분봉 시작 시각 (초·마이크로초 = 0)
     open: float = 0.0
@@ -54,118 +166,1813 @@ class CandleBar:
             self.open = price
             self.high = price
             self.low = price
-        else:
-            self.high = max(self.high, price)
-            self.low = min(self.low, price)
+        elif price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
         self.close = price
         self.volume += qty
         self.trade_count += 1
 
     def to_dict(self) -> dict:
-        d = asdict(self)
-        d["dt"] = self.dt.strftime("%Y-%m-%d %H:%M:%S")
+        """필드 dict (dt는 "YYYY-MM-DD HH:MM:SS"). 여러 개를 JSON으로 내보낼 때는 candles_to_json"""
+        return {
+            "stock_code": self.stock_code,
+            "dt": self.dt.isoformat(" ", "seconds"),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "trade_count": self.trade_count,
+            "is_closed": self.is_closed,
+        }
+
+    def __repr__(self) -> str:
+        sign = "▲" if self.close >= self.open else "▼"
+        return (
+            f"[{self.stock_code}] {self.dt:%H:%M} "
+            f"O={self.open:,.0f} H={self.high:,.0f} "
+            f"L={self.low:,.0f} C={self.close:,.0f} "
+            f"V={self.volume:,} ({self.trade_count}건) {sign}"
+        )
+
+
+@dataclass(repr=False, slots=True)
+class ExtendedCandleBar(CandleBar):
+    """
+    확장 모드(extended=True) 1분봉: 체결 프레임의 호가·체결구분·체결강도까지 집계.
+    cum_volume / cum_value는 마지막 틱의 당일 누적값이며 완성 분봉 컬럼에는
+    보관하지 않는다 (빈 분봉·REST 분봉의 확장 컬럼은 0).
+    """
+    buy_volume: int = 0    # 매수 체결량 (체결구분 1)
+    sell_volume: int = 0   # 매도 체결량 (체결구분 5)
+    turnover: float = 0.0  # 거래대금 (체결가 × 체결량 합)
+    bid: float = 0.0       # 마지막 매수호가1
+    ask: float = 0.0       # 마지막 매도호가1
+    strength: float = 0.0  # 평균 체결강도 (틱 단순 평균)
+    cum_volume: int = 0    # 당일 누적거래량 (ACML_VOL)
+    cum_value: int = 0     # 당일 누적거래대금 (ACML_TR_PBMN)
+
+    @property
+    def vwap(self) -> float:
+        """거래량 가중 평균가 (거래대금이 없는 분봉 — 빈 분봉·REST 분봉 — 은 종가)"""
+        return self.turnover / self.volume if self.turnover else self.close
+
+    def update_ext(self, price: float, qty: int, ext: tuple) -> None:
+        """
+        확장 틱으로 캔들 업데이트.
+        ext: decode_tick_frame(extended=True) 튜플의 5번째 이후
+             (체결구분, 매도호가1, 매수호가1, 체결강도, 누적거래량, 누적거래대금)
+        """
+        self.update(price, qty)
+        side, self.ask, self.bid, strength, self.cum_volume, self.cum_value = ext
+        if side == 1:
+            self.buy_volume += qty
+        elif side == 5:
+            self.sell_volume += qty
+        self.turnover += price * qty
+        self.strength += (strength - self.strength) / self.trade_count
+
+    def extra_values(self) -> tuple:
+        """EXTENDED_COLUMNS 확장 컬럼 순서의 값"""
+        return (
+            self.buy_volume, self.sell_volume, self.turnover,
+            self.bid, self.ask, self.strength,
+        )
+
+    def to_dict(self) -> dict:
+        d = CandleBar.to_dict(self)
+        d["buy_volume"] = self.buy_volume
+        d["sell_volume"] = self.sell_volume
+        d["turnover"] = self.turnover
+        d["bid"] = self.bid
+        d["ask"] = self.ask
+        d["strength"] = self.strength
+        d["cum_volume"] = self.cum_volume
+        d["cum_value"] = self.cum_value
         return d
 
-    def __repr__(self) -> str:
-        sign = "▲" if self.close >= self.open else "▼"
-        return (
-            f"[{self.stock_code}] {self.dt:%H:%M} "
-            f"O={self.open:,.0f} H={self.high:,.0f} "
-            f"L={self.low:,.0f} C={self.close:,.0f} "
-            f"V={self.volume:,} ({self.trade_count}건) {sign}"
+    # slots 데이터클래스는 클래스를 새로 만들어 인자 없는 super()를 쓸 수 없다
+    def __repr__(self) -> str:
+        return (
+            f"{CandleBar.__repr__(self)} 매수 {self.buy_volume:,} / 매도 {self.sell_volume:,} "
+            f"VWAP={self.vwap:,.1f} 강도={self.strength:.1f}"
+        )
+
+
+# ──────────────────────────────────────────────
+# 컬럼형 분봉 저장소
+# ──────────────────────────────────────────────
+# (컬럼명, array typecode) — 분봉 1개당 8+8*4+8+4 = 52바이트
+CANDLE_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("minute", "q"),       # 분봉 시작 시각 (epoch-minute, int64)
+    ("open", "d"),
+    ("high", "d"),
+    ("low", "d"),
+    ("close", "d"),
+    ("volume", "q"),       # int64
+    ("trade_count", "i"),  # int32
+)
+# 확장 모드 컬럼 — 분봉 1개당 52+8*3+4*3 = 88바이트
+# (호가·체결강도는 float32: 원 단위 호가 2^24 미만까지 정확, VWAP = turnover / volume)
+EXTENDED_COLUMNS: tuple[tuple[str, str], ...] = CANDLE_COLUMNS + (
+    ("buy_volume", "q"),
+    ("sell_volume", "q"),
+    ("turnover", "d"),
+    ("bid", "f"),
+    ("ask", "f"),
+    ("strength", "f"),
+)
+_EXTRA_NAMES = tuple(name for name, _ in EXTENDED_COLUMNS[len(CANDLE_COLUMNS):])
+_NO_EXTRA = (0, 0, 0.0, 0.0, 0.0, 0.0)
+
+
+class CandleRing:
+    """
+    완성 분봉 링 버퍼 (컬럼형).
+    분봉마다 CandleBar 객체를 보관하지 않고 미리 할당한 타입 배열에
+    컬럼별로 기록한다. 용량을 넘으면 가장 오래된 분봉부터 덮어쓴다.
+    extended=True면 EXTENDED_COLUMNS 확장 컬럼도 할당한다 (끄면 기존 배치 그대로).
+    분봉은 minute 오름차순으로 쌓이므로 시각 구간 조회는 이진 탐색이다 (range_columns).
+    """
+
+    columns = CANDLE_COLUMNS
+    extended = False
+    overwritten = 0  # 가득 차서 덮어쓴(밀려난) 분봉 수
+
+    def __init__(self, stock_code: str, capacity: int, extended: bool = False):
+        self.stock_code = stock_code
+        self.capacity = capacity
+        self._start = 0
+        self._size = 0
+        if extended:
+            self.columns = EXTENDED_COLUMNS
+            self.extended = True
+        for name, typecode in self.columns:
+            setattr(self, name, array(typecode, bytes(array(typecode).itemsize * capacity)))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(
+        self,
+        minute: int,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: int,
+        trade_count: int,
+        extra: Optional[tuple] = None,
+    ) -> None:
+        """
+        분봉 1개 추가 (가득 차면 가장 오래된 분봉을 덮어씀).
+        extra: 확장 컬럼 값 (extended 링 전용, None이면 0)
+        """
+        i = self._next_slot()
+        if i < 0:
+            return
+        self.minute[i] = minute
+        self.open[i] = open_
+        self.high[i] = high
+        self.low[i] = low
+        self.close[i] = close
+        self.volume[i] = volume
+        self.trade_count[i] = trade_count
+        if self.extended:
+            (
+                self.buy_volume[i], self.sell_volume[i], self.turnover[i],
+                self.bid[i], self.ask[i], self.strength[i],
+            ) = extra or _NO_EXTRA
+
+    def _next_slot(self) -> int:
+        """다음 분봉을 쓸 물리 인덱스 (가득 차면 가장 오래된 칸, 용량 0이면 -1)"""
+        cap = self.capacity
+        if cap == 0:
+            return -1
+        if self._size < cap:
+            i = self._start + self._size
+            if i >= cap:
+                i -= cap
+            self._size += 1
+        else:
+            i = self._start
+            self._start = i + 1 if i + 1 < cap else 0
+            self.overwritten += 1
+        return i
+
+    def _row(self, p: int) -> tuple:
+        """물리 인덱스 p의 분봉 (columns 순서 값 튜플)"""
+        return tuple(getattr(self, name)[p] for name, _ in self.columns)
+
+    def append_bar(self, bar: CandleBar) -> None:
+        self.append(
+            to_epoch_minute(bar.dt), bar.open, bar.high, bar.low,
+            bar.close, bar.volume, bar.trade_count,
+            bar.extra_values() if isinstance(bar, ExtendedCandleBar) else None,
+        )
+
+    def clear(self) -> None:
+        """보관 분봉 비우기 (배열은 그대로 재사용)"""
+        self._start = 0
+        self._size = 0
+
+    def _ranges(self, n: Optional[int]) -> list[tuple[int, int]]:
+        """최근 n개 분봉의 물리 인덱스 구간 (시간순, 최대 2개)"""
+        size = self._size
+        n = size if n is None else max(0, min(n, size))
+        if n == 0:
+            return []
+        begin = (self._start + size - n) % self.capacity
+        end = begin + n
+        if end <= self.capacity:
+            return [(begin, end)]
+        return [(begin, self.capacity), (0, end - self.capacity)]
+
+    def tail_columns(self, n: Optional[int] = None) -> dict[str, array]:
+        """최근 n개 분봉의 컬럼 배열 복사본 (n=None이면 전체)"""
+        ranges = self._ranges(n)
+        out: dict[str, array] = {}
+        for name, typecode in self.columns:
+            col = getattr(self, name)
+            if not ranges:
+                out[name] = array(typecode)
+            elif len(ranges) == 1:
+                b, e = ranges[0]
+                out[name] = col[b:e]
+            else:
+                (b0, e0), (b1, e1) = ranges
+                out[name] = col[b0:e0] + col[b1:e1]
+        return out
+
+    def range_columns(
+        self, start: Optional[int] = None, end: Optional[int] = None, span: int = 1
+    ) -> dict[str, array]:
+        """
+        [start, end) 구간(epoch-minute)과 겹치는 분봉의 컬럼 배열 복사본.
+        span: 봉 하나의 길이(분, 상위 타임프레임 링이면 그 길이). 경계는 이진 탐색으로 찾는다
+        """
+        out = {name: array(typecode) for name, typecode in self.columns}
+        minute = self.minute
+        for b, e in self._ranges(None):
+            lo = b if start is None else bisect.bisect_left(minute, start - span + 1, b, e)
+            hi = e if end is None else bisect.bisect_left(minute, end, lo, e)
+            if lo < hi:
+                for name, _ in self.columns:
+                    out[name] += getattr(self, name)[lo:hi]
+        return out
+
+    @property
+    def memory_bytes(self) -> int:
+        """미리 할당한 컬럼 배열 크기 (바이트)"""
+        return self.capacity * sum(array(typecode).itemsize for _, typecode in self.columns)
+
+    @property
+    def usage(self) -> dict:
+        """보관 분봉 수·용량, 밀려난(evicted)·하위 단계로 압축된(compacted) 분봉 수, 메모리"""
+        return {
+            "bars": self._size,
+            "capacity": self.capacity,
+            "evicted": self.overwritten,
+            "compacted": 0,
+            "memory_bytes": self.memory_bytes,
+        }
+
+    def _physical(self, i: int) -> int:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("CandleRing index out of range")
+        return (self._start + i) % self.capacity
+
+    def __getitem__(self, i: int) -> CandleBar:
+        """CandleBar 호환 접근자 (i번째 완성 분봉, 음수 인덱스 지원)"""
+        p = self._physical(i)
+        bar = CandleBar(
+            stock_code=self.stock_code,
+            dt=from_epoch_minute(self.minute[p]),
+            open=self.open[p],
+            high=self.high[p],
+            low=self.low[p],
+            close=self.close[p],
+            volume=self.volume[p],
+            trade_count=self.trade_count[p],
+            is_closed=True,
+        )
+        if self.extended:
+            bar = _extend_bar(bar, vars(self), p)
+        return bar
+
+    def __iter__(self) -> Iterator[CandleBar]:
+        return iter(CandleView(self.stock_code, self.tail_columns()))
+
+    @property
+    def last_minute(self) -> Optional[int]:
+        """가장 최근 완성 분봉의 epoch-minute (없으면 None)"""
+        if self._size == 0:
+            return None
+        return self.minute[self._physical(-1)]
+
+    @property
+    def last_close(self) -> Optional[float]:
+        """가장 최근 완성 분봉의 종가 (없으면 None)"""
+        if self._size == 0:
+            return None
+        return self.close[self._physical(-1)]
+
+
+class CandleView(Sequence):
+    """
+    get_history / get_all_candles 반환 타입.
+    컬럼 배열 스냅샷만 보관하고, 인덱싱·반복할 때 CandleBar를 만든다.
+    기존 list[CandleBar] 사용 코드(반복, len, 인덱싱, 슬라이싱)와 호환되며
+    columns / to_numpy()로 객체 생성 없이 컬럼 단위로 읽을 수 있다.
+    """
+
+    __slots__ = ("stock_code", "columns", "_open_pos")
+
+    def __init__(
+        self,
+        stock_code: str,
+        columns: dict[str, array],
+        open_pos: int = -1,
+    ):
+        self.stock_code = stock_code
+        self.columns = columns
+        self._open_pos = open_pos  # 미완성(현재) 캔들 위치, 없으면 -1
+
+    def __len__(self) -> int:
+        return len(self.columns["minute"])
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[CandleBar, CandleView]:
+        if isinstance(i, slice):
+            idx = range(*i.indices(len(self)))
+            open_pos = idx.index(self._open_pos) if self._open_pos in idx else -1
+            return CandleView(
+                self.stock_code,
+                {name: col[i] for name, col in self.columns.items()},
+                open_pos,
+            )
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("CandleView index out of range")
+        c = self.columns
+        bar = CandleBar(
+            stock_code=self.stock_code,
+            dt=from_epoch_minute(c["minute"][i]),
+            open=c["open"][i],
+            high=c["high"][i],
+            low=c["low"][i],
+            close=c["close"][i],
+            volume=c["volume"][i],
+            trade_count=c["trade_count"][i],
+            is_closed=i != self._open_pos,
+        )
+        if "buy_volume" in c:
+            bar = _extend_bar(bar, c, i)
+        return bar
+
+    def __iter__(self) -> Iterator[CandleBar]:
+        c = self.columns
+        if "buy_volume" in c:
+            for i in range(len(self)):
+                yield self[i]
+            return
+        code = self.stock_code
+        open_pos = self._open_pos
+        for i, (m, o, h, l, cl, v, tc) in enumerate(zip(
+            c["minute"], c["open"], c["high"], c["low"],
+            c["close"], c["volume"], c["trade_count"],
+        )):
+            yield CandleBar(
+                stock_code=code,
+                dt=from_epoch_minute(m),
+                open=o, high=h, low=l, close=cl,
+                volume=v, trade_count=tc,
+                is_closed=i != open_pos,
+            )
+
+    def to_list(self) -> list[CandleBar]:
+        return list(self)
+
+    def to_numpy(self) -> dict:
+        """컬럼별 NumPy 배열 (스냅샷 버퍼를 복사 없이 참조). numpy 필요"""
+        if np is None:
+            raise ImportError("to_numpy()를 사용하려면 numpy를 설치해주세요")
+        return {name: np.frombuffer(col, dtype=col.typecode) for name, col in self.columns.items()}
+
+    def to_json(self) -> str:
+        """
+        JSON 배열 문자열 (원소는 각 캔들의 to_dict()와 같은 키·값).
+        CandleBar·dict를 만들지 않고 컬럼 배열에서 행 문자열을 바로 만든 뒤 한 번에 join한다
+        """
+        c = self.columns
+        code = json.dumps(self.stock_code, ensure_ascii=False)
+        open_pos = self._open_pos
+        extras = (
+            zip(*(c[name] for name in _EXTRA_NAMES)) if "buy_volume" in c else None
+        )
+        dates: dict[int, str] = {}  # epoch-day → "YYYY-MM-DD"
+        rows = []
+        for i, (m, o, h, l, cl, v, tc) in enumerate(zip(
+            c["minute"], c["open"], c["high"], c["low"],
+            c["close"], c["volume"], c["trade_count"],
+        )):
+            day, mod = divmod(m, 1440)
+            date = dates.get(day)
+            if date is None:
+                date = dates[day] = from_epoch_minute(day * 1440).strftime("%Y-%m-%d")
+            row = (
+                f'{{"stock_code":{code},"dt":"{date} {mod // 60:02d}:{mod % 60:02d}:00",'
+                f'"open":{o!r},"high":{h!r},"low":{l!r},"close":{cl!r},'
+                f'"volume":{v},"trade_count":{tc},'
+                f'"is_closed":{"false" if i == open_pos else "true"}'
+            )
+            if extras is not None:
+                bv, sv, to, bid, ask, st = next(extras)
+                row += (
+                    f',"buy_volume":{bv},"sell_volume":{sv},"turnover":{to!r},'
+                    f'"bid":{bid!r},"ask":{ask!r},"strength":{st!r},"cum_volume":0,"cum_value":0'
+                )
+            rows.append(row + "}")
+        return "[" + ",".join(rows) + "]"
+
+    def __repr__(self) -> str:
+        return f"CandleView({self.stock_code}, {len(self)} bars)"
+
+
+def append_bar_columns(columns: dict[str, array], bar: CandleBar, minute: int) -> None:
+    """컬럼 배열 묶음 끝에 분봉 1개 추가 (minute: bar의 epoch-minute)"""
+    columns["minute"].append(minute)
+    columns["open"].append(bar.open)
+    columns["high"].append(bar.high)
+    columns["low"].append(bar.low)
+    columns["close"].append(bar.close)
+    columns["volume"].append(bar.volume)
+    columns["trade_count"].append(bar.trade_count)
+    if "buy_volume" in columns:
+        extra = bar.extra_values() if isinstance(bar, ExtendedCandleBar) else _NO_EXTRA
+        for name, value in zip(_EXTRA_NAMES, extra):
+            columns[name].append(value)
+
+
+def _extend_bar(bar: CandleBar, columns: dict[str, array], i: int) -> ExtendedCandleBar:
+    """bar에 확장 컬럼 값(columns[name][i])을 더한 ExtendedCandleBar"""
+    return ExtendedCandleBar(
+        bar.stock_code, bar.dt, bar.open, bar.high, bar.low, bar.close,
+        bar.volume, bar.trade_count, bar.is_closed,
+        *(columns[name][i] for name in _EXTRA_NAMES),
+    )
+
+
+def candles_to_json(bars: Iterable[CandleBar]) -> str:
+    """
+    캔들 여러 개 → JSON 배열 문자열 하나 (원소는 to_dict()와 같은 키).
+    CandleView는 컬럼 배열에서 바로 쓰고(CandleView.to_json), 그 밖에는 dict 목록을
+    json.dumps 한 번으로 직렬화한다
+    """
+    if isinstance(bars, CandleView):
+        return bars.to_json()
+    return json.dumps(
+        [bar.to_dict() for bar in bars], ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def candle_view(
+    stock_code: str,
+    ring: CandleRing,
+    current: Optional[CandleBar],
+    n: Optional[int] = None,
+) -> CandleView:
+    """완성 캔들(ring) + 미완성 캔들(current)의 최근 n개 스냅샷"""
+    if current is None or current.trade_count == 0:
+        return CandleView(stock_code, ring.tail_columns(n))
+    if n is not None and n <= 0:
+        return CandleView(stock_code, ring.tail_columns(0))
+    columns = ring.tail_columns(None if n is None else n - 1)
+    append_bar_columns(columns, current, to_epoch_minute(current.dt))
+    return CandleView(stock_code, columns, open_pos=len(columns["minute"]) - 1)
+
+
+# ──────────────────────────────────────────────
+# 상위 타임프레임 버퍼
+# ──────────────────────────────────────────────
+def parse_timeframe(timeframe: str) -> int:
+    """타임프레임 문자열 → 분 단위 길이 ("5m" → 5, "60m" → 60, "1d" → 1440)"""
+    spec = timeframe.strip().lower()
+    try:
+        if spec.endswith("m"):
+            minutes = int(spec[:-1])
+        elif spec.endswith("h"):
+            minutes = int(spec[:-1]) * 60
+        elif spec in ("d", "1d", "daily"):
+            minutes = 1440
+        else:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"지원하지 않는 타임프레임: {timeframe}") from None
+    if minutes <= 0 or 1440 % minutes:
+        raise ValueError(f"지원하지 않는 타임프레임: {timeframe}")
+    return minutes
+
+
+class TimeframeBuffer:
+    """
+    1분봉 스트림을 N분봉(3m/5m/15m/60m) 또는 일봉으로 증분 집계하는 버퍼.
+    - 매 틱: 현재(미완성) 상위 캔들을 갱신
+    - 1분봉 마감: 구간의 마지막 분이면 상위 캔들도 마감
+    구간은 자정 기준으로 정렬된다 (09:00 시작 → 5분봉 09:00, 09:05, ...).
+    StockCandleBuffer가 소유하며 모든 메서드는 버퍼 락 안에서 호출된다.
+    """
+
+    def __init__(self, stock_code: str, timeframe: str, max_history: int = 1440):
+        self.stock_code = stock_code
+        self.timeframe = timeframe
+        self.minutes = parse_timeframe(timeframe)
+        self.current: Optional[CandleBar] = None
+        self.history = CandleRing(stock_code, max_history)
+        self._bucket = -1  # 현재 캔들의 구간 시작 (epoch-minute)
+
+    def on_tick(self, price: float, qty: int, minute: int) -> Optional[CandleBar]:
+        """1분봉에 반영된 틱 (minute: 그 1분봉의 epoch-minute). 반환값: 닫힌 상위 캔들"""
+        bucket = minute - minute % self.minutes
+        closed: Optional[CandleBar] = None
+        if self.current is None or bucket > self._bucket:
+            if self.current is not None:
+                closed = self._close()
+            else:
+                last = self.history.last_minute
+                if last is not None and bucket <= last:
+                    return None  # 이미 마감된 구간 (1분봉 쪽에서 late_ticks로 집계)
+            self._fill_gap(bucket)
+            self.current = CandleBar(stock_code=self.stock_code, dt=from_epoch_minute(bucket))
+            self._bucket = bucket
+        self.current.update(price, qty)
+        return closed
+
+    def on_bar(
+        self,
+        minute: int,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: int,
+        trade_count: int,
+    ) -> None:
+        """완성 1분봉 1개를 통째로 반영 (저장소 재적재용, 마감 판정은 on_minute_closed)"""
+        bucket = minute - minute % self.minutes
+        if self.current is None or bucket > self._bucket:
+            if self.current is not None:
+                self._close()
+            self._fill_gap(bucket)
+            self.current = CandleBar(stock_code=self.stock_code, dt=from_epoch_minute(bucket))
+            self._bucket = bucket
+        cur = self.current
+        if cur.trade_count == 0:
+            cur.open, cur.high, cur.low = open_, high, low
+        else:
+            cur.high = max(cur.high, high)
+            cur.low = min(cur.low, low)
+        cur.close = close
+        cur.volume += volume
+        cur.trade_count += trade_count
+
+    def on_minute_closed(self, minute: int) -> Optional[CandleBar]:
+        """1분봉(minute) 마감 시 호출. 구간의 마지막 분이면 상위 캔들 마감"""
+        if self.current is not None and minute + 1 >= self._bucket + self.minutes:
+            return self._close()
+        return None
+
+    def close_before(self, minute: int) -> Optional[CandleBar]:
+        """구간이 minute(epoch-minute) 이전에 끝났으면 마감 (타이머 마감용)"""
+        if self.current is not None and self._bucket + self.minutes <= minute:
+            return self._close()
+        return None
+
+    def _fill_gap(self, bucket: int) -> None:
+        """틱 없는 구간을 직전 종가로 채움 (일봉은 휴장일이 있으므로 채우지 않음)"""
+        gap = self.history.last_minute
+        if gap is None or self.minutes >= 1440:
+            return
+        close = self.history.last_close
+        gap += self.minutes
+        while gap < bucket:
+            self.history.append(gap, close, close, close, close, 0, 0)
+            gap += self.minutes
+
+    def _close(self) -> CandleBar:
+        closed = self.current
+        closed.is_closed = True
+        self.history.append(
+            self._bucket, closed.open, closed.high, closed.low,
+            closed.close, closed.volume, closed.trade_count,
+        )
+        self.current = None
+        return closed
+
+    def view(self, n: Optional[int] = None, include_current: bool = True) -> CandleView:
+        return candle_view(
+            self.stock_code, self.history, self.current if include_current else None, n
+        )
+
+
+# ──────────────────────────────────────────────
+# 계층형 분봉 보관 (오래된 분봉 → 상위 타임프레임으로 압축)
+# ──────────────────────────────────────────────
+class HistoryTier:
+    """
+    TieredHistory의 한 단계: timeframe 봉 링(keep_minutes 분량) + 집계 중인 구간 1개.
+    하위 단계에서 밀려난 봉을 구간별로 합쳐 링에 쌓는다.
+    """
+
+    def __init__(
+        self, stock_code: str, timeframe: str, keep_minutes: int, extended: bool = False
+    ):
+        self.timeframe = timeframe
+        self.minutes = parse_timeframe(timeframe)
+        self.keep_minutes = keep_minutes
+        self.ring = CandleRing(stock_code, -(-keep_minutes // self.minutes), extended)
+        # 집계 중인 구간 [구간 시작, o, h, l, c, v, tc, *확장 컬럼] (없으면 None)
+        self.pending: Optional[list] = None
+
+    def add(self, row: tuple) -> Optional[tuple]:
+        """
+        하위 단계에서 밀려난 봉 1개(columns 순서 튜플, 시각 오름차순) 반영.
+        반환값: 구간이 바뀌어 링에 넣으면서 이 단계에서 밀려난 봉 (없으면 None)
+        """
+        bucket = row[0] - row[0] % self.minutes
+        pending = self.pending
+        if pending is None or bucket != pending[0]:
+            evicted = self._flush() if pending is not None else None
+            self.pending = [bucket, *row[1:]]
+            return evicted
+        # TimeframeBuffer.on_bar와 같은 규칙 (거래 없는 구간이면 시가·고가·저가를 새로)
+        if pending[6] == 0:
+            pending[1], pending[2], pending[3] = row[1], row[2], row[3]
+        else:
+            if row[2] > pending[2]:
+                pending[2] = row[2]
+            if row[3] < pending[3]:
+                pending[3] = row[3]
+        pending[4] = row[4]
+        pending[5] += row[5]
+        pending[6] += row[6]
+        if len(row) > 7:  # 확장 컬럼: 체결량·거래대금은 합, 호가·체결강도는 마지막 값
+            pending[7] += row[7]
+            pending[8] += row[8]
+            pending[9] += row[9]
+            pending[10:] = row[10:]
+        return None
+
+    def _flush(self) -> Optional[tuple]:
+        """집계 중인 구간을 링에 추가. 반환값: 링이 가득 차 밀려난 봉"""
+        ring = self.ring
+        evicted = ring._row(ring._start) if len(ring) == ring.capacity else None
+        p = self.pending
+        ring.append(p[0], p[1], p[2], p[3], p[4], p[5], p[6], tuple(p[7:]) or None)
+        self.pending = None
+        return evicted
+
+
+class TieredHistory(CandleRing):
+    """
+    1분봉 링(capacity개) 뒤에 상위 타임프레임 단계를 이어 붙인 완성 분봉 보관소.
+    1분봉 링이 가득 차면 가장 오래된 분봉을 버리지 않고 첫 단계(예: 5분봉)로 합치고,
+    그 단계가 가득 차면 다음 단계로 넘긴다. 마지막 단계에서 밀려난 봉만 버린다.
+    모든 단계가 고정 크기 링이라 종목당 메모리는 memory_bytes로 고정된다.
+
+    tail_columns / __getitem__ / last_minute 등 CandleRing 인터페이스는 1분봉 링만 보고,
+    range_columns는 오래된 단계부터 이어 붙인 결과를 돌려준다 (단계 구간은 그 타임프레임 봉,
+    집계 중인 구간은 일부 분만 합친 봉).
+
+    Parameters
+    ----------
+    tiers : Iterable[tuple[str, int]]
+        (타임프레임, 보관 기간(분)) 목록. 타임프레임은 앞 단계의 배수여야 한다.
+        예: (("5m", 7 * 1440), ("30m", 30 * 1440)) → 1분봉 capacity개 이후
+        5분봉으로 7일, 그 이전은 30분봉으로 30일
+    """
+
+    def __init__(
+        self,
+        stock_code: str,
+        capacity: int,
+        tiers: Iterable[tuple[str, int]],
+        extended: bool = False,
+    ):
+        tiers = self.validate_tiers(tiers)
+        super().__init__(stock_code, capacity, extended)
+        self.tiers: list[HistoryTier] = [
+            HistoryTier(stock_code, timeframe, keep_minutes, extended)
+            for timeframe, keep_minutes in tiers
+        ]
+        # 상위 단계로 넘긴 마지막 분 + 1 (이보다 이른 분봉은 다시 받지 않음, backfill 중복 방지)
+        self.floor = 0
+
+    @staticmethod
+    def validate_tiers(tiers: Iterable[tuple[str, int]]) -> list[tuple[str, int]]:
+        """
+        단계 구성 검증 (링을 만들지 않음). 타임프레임은 앞 단계의 배수로 커져야 하고,
+        보관 기간은 봉 하나 이상이어야 한다. 반환값: (타임프레임, 보관 기간(분)) 목록
+        """
+        checked = []
+        minutes = 1
+        for timeframe, keep_minutes in tiers:
+            tier_minutes = parse_timeframe(timeframe)
+            if tier_minutes <= minutes or tier_minutes % minutes:
+                raise ValueError(
+                    f"history_tiers 타임프레임은 앞 단계({minutes}분)의 배수로 커져야 합니다: "
+                    f"{timeframe}"
+                )
+            if keep_minutes < tier_minutes:
+                raise ValueError(f"{timeframe} 단계 보관 기간이 봉 하나보다 짧습니다: {keep_minutes}분")
+            checked.append((timeframe, keep_minutes))
+            minutes = tier_minutes
+        if not checked:
+            raise ValueError("history_tiers가 비어 있습니다")
+        return checked
+
+    def append(
+        self,
+        minute: int,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: int,
+        trade_count: int,
+        extra: Optional[tuple] = None,
+    ) -> None:
+        if minute < self.floor:
+            return
+        if self._size < self.capacity:
+            super().append(minute, open_, high, low, close, volume, trade_count, extra)
+            return
+        if self.capacity:
+            row = self._row(self._start)
+            super().append(minute, open_, high, low, close, volume, trade_count, extra)
+        else:
+            row = (minute, open_, high, low, close, volume, trade_count)
+            if self.extended:
+                row += extra or _NO_EXTRA
+            self.overwritten += 1
+        self.floor = row[0] + 1
+        for tier in self.tiers:
+            row = tier.add(row)
+            if row is None:
+                break
+
+    def range_columns(
+        self, start: Optional[int] = None, end: Optional[int] = None, span: int = 1
+    ) -> dict[str, array]:
+        out = {name: array(typecode) for name, typecode in self.columns}
+        for tier in reversed(self.tiers):
+            for name, col in tier.ring.range_columns(start, end, tier.minutes).items():
+                out[name] += col
+            p = tier.pending
+            if (
+                p is not None
+                and (start is None or p[0] + tier.minutes > start)
+                and (end is None or p[0] < end)
+            ):
+                for (name, _), value in zip(self.columns, p):
+                    out[name].append(value)
+        for name, col in super().range_columns(start, end, span).items():
+            out[name] += col
+        return out
+
+    @property
+    def memory_bytes(self) -> int:
+        return super().memory_bytes + sum(tier.ring.memory_bytes for tier in self.tiers)
+
+    @property
+    def usage(self) -> dict:
+        result = super().usage
+        result["evicted"] = self.tiers[-1].ring.overwritten
+        result["compacted"] = self.overwritten + sum(
+            tier.ring.overwritten for tier in self.tiers[:-1]
+        )
+        result["tiers"] = [
+            {"timeframe": tier.timeframe, "bars": len(tier.ring), "capacity": tier.ring.capacity}
+            for tier in self.tiers
+        ]
+        return result
+
+
+# ──────────────────────────────────────────────
+# 종목별 캔들 버퍼
+# ──────────────────────────────────────────────
+# 읽기 쪽 seqlock 재시도 한도 (넘으면 락을 잡고 읽음)
+SNAPSHOT_RETRIES = 100
+
+
+class StockCandleBuffer:
+    """
+    단일 종목의 분봉 버퍼.
+    - current : 현재 만들어지고 있는 (미완성) 캔들
+    - history : 완성된 과거 캔들 (CandleRing, 최대 max_history개 보관).
+      history_tiers를 주면 TieredHistory가 되어 밀려난 분봉을 상위 타임프레임으로
+      압축해 더 오래 보관한다 (get_range로 조회)
+    - timeframes : 상위 타임프레임 버퍼 ("5m" → TimeframeBuffer)
+    - outages : 실시간 수신이 끊겼던 구간 [(시작, 끝 epoch-minute, 양끝 포함)].
+      이 구간의 분봉은 일부 체결만 반영되었거나 직전 종가로 채운 빈 분봉이며,
+      backfill이 REST 분봉으로 복구하면 목록에서 빠진다
+    - bar_listeners : 완성 분봉(빈 분봉 포함)마다
+      on_bar_closed(minute, open, high, low, close, volume)를 받는 객체
+      (예: candle_indicators.IndicatorEngine). backfill로 history가 다시 만들어지면
+      on_history_reset()(있으면)이 먼저 호출된 뒤 완성 분봉 전체가 다시 전달된다
+    - extended : True면 current가 ExtendedCandleBar이고 history에 확장 컬럼
+      (매수·매도 체결량, 거래대금, 호가, 체결강도)을 둔다. 틱은
+      decode_tick_frame(extended=True) 형식으로 받으며, 상위 타임프레임은 기본 컬럼만 집계한다
+
+    쓰기(on_tick/on_ticks/close_before/restore/backfill)는 _lock으로 서로 배제하고,
+    쓰는 동안 _seq를 홀수로 만든다. get_* 읽기는 락 없이 seq를 확인하며
+    복사하고, 복사 전후 seq가 같을 때만 결과를 돌려준다 (seqlock).
+    읽기가 틱 반영을 막지 않으며, 반환값은 모두 복사본이다.
+    """
+
+    def __init__(
+        self,
+        stock_code: str,
+        max_history: int = 1440,
+        timeframes: Iterable[str] = (),
+        extended: bool = False,
+        history_tiers: Iterable[tuple[str, int]] = (),
+    ):
+        self.stock_code = stock_code
+        self.max_history = max_history
+        self.extended = extended
+        self.current: Optional[CandleBar] = None
+        history_tiers = tuple(history_tiers)
+        self.history = (
+            TieredHistory(stock_code, max_history, history_tiers, extended)
+            if history_tiers
+            else CandleRing(stock_code, max_history, extended)
+        )
+        self.late_ticks = 0  # 이미 마감된 분에 도착해 버려진 틱 수
+        self.timeframes: dict[str, TimeframeBuffer] = {
+            tf: TimeframeBuffer(stock_code, tf, max_history) for tf in timeframes
+        }
+        self._current_minute = -1  # current의 epoch-minute
+        self._timeframe_closed: list[tuple[str, CandleBar]] = []
+        self.bar_listeners: list = []
+        self.outages: list[tuple[int, int]] = []
+        self._lock = threading.Lock()
+        self._seq = 0  # 홀수 = 쓰기 중
+
+    # ──────── seqlock ────────
+    def _begin_write(self) -> None:
+        """쓰기 시작 (호출 측에서 self._lock 보유)"""
+        self._seq += 1
+
+    def _end_write(self) -> None:
+        self._seq += 1
+
+    def _read(self, read: Callable[[], T]) -> T:
+        """
+        락 없이 일관된 스냅샷 읽기. 쓰기 중이거나 읽는 동안 쓰기가 끼어들면
+        다시 읽고, SNAPSHOT_RETRIES번 실패하면 락을 잡고 읽는다.
+        """
+        for _ in range(SNAPSHOT_RETRIES):
+            seq = self._seq
+            if seq & 1:
+                time.sleep(0)  # 쓰는 스레드에 GIL 양보
+                continue
+            try:
+                result = read()
+            except (IndexError, ValueError):  # 쓰기 도중 범위가 바뀜 → 재시도
+                continue
+            if self._seq == seq:
+                return result
+        with self._lock:
+            return read()
+
+    def add_bar_listener(self, listener, replay: bool = True) -> None:
+        """
+        완성 분봉 리스너 등록.
+        replay=True면 등록 전에 보관 중인 완성 분봉을 순서대로 먼저 전달한다.
+        """
+        with self._lock:
+            if replay:
+                c = self.history.tail_columns()
+                for bar in zip(
+                    c["minute"], c["open"], c["high"], c["low"], c["close"], c["volume"]
+                ):
+                    listener.on_bar_closed(*bar)
+            self.bar_listeners.append(listener)
+
+    def remove_bar_listener(self, listener) -> None:
+        with self._lock:
+            if listener in self.bar_listeners:
+                self.bar_listeners.remove(listener)
+
+    def restore(self, columns: dict[str, array]) -> int:
+        """
+        저장소에서 읽은 완성 분봉(컬럼 배열, 분 오름차순)을 history에 다시 채운다.
+        틱 수신 전에 호출하며, 이미 보관 중인 분 이전의 분봉과 빈 분봉 채우기,
+        리스너·상위 타임프레임 반영은 실시간 마감과 같은 방식으로 처리한다.
+        반환값: 채운 분봉 수 (빈 분봉 제외)
+        """
+        restored = 0
+        with self._lock:
+            self._begin_write()
+            try:
+                for bar in zip(
+                    columns["minute"], columns["open"], columns["high"], columns["low"],
+                    columns["close"], columns["volume"], columns["trade_count"],
+                ):
+                    last_minute = self.history.last_minute
+                    if last_minute is not None and bar[0] <= last_minute:
+                        continue
+                    self._append_closed(*bar)
+                    restored += 1
+            finally:
+                self._end_write()
+        return restored
+
+    def mark_outage(self, start: int, end: int) -> None:
+        """실시간 수신이 끊겼던 구간 기록 (epoch-minute, 양끝 포함)"""
+        with self._lock:
+            self.outages.append((start, end))
+
+    def backfill(self, columns: dict[str, array], before: Optional[int] = None) -> int:
+        """
+        REST 등에서 받은 과거 완성 분봉(컬럼 배열, 분 오름차순)을 history에 병합한다.
+        실시간 수신 도중에도 호출할 수 있다.
+        - 현재(미완성) 캔들의 분과 그 이후, before(epoch-minute) 이후의 분봉은 버린다
+          (실시간 스트림이 이어받은 분은 중복 반영하지 않음)
+        - 이미 보관 중인 분은 실시간 분봉을 유지하고, 빈 분봉(거래 없음)과
+          수신 중단 구간(outages)의 분봉만 거래가 있는 분봉으로 교체한다
+          (복구가 끝난 구간은 outages에서 뺀다). 유지한 분봉은 확장 컬럼도 유지한다
+        병합 결과로 history와 상위 타임프레임을 다시 만들고, 리스너에는
+        on_history_reset()(있으면) 호출 후 완성 분봉 전체를 다시 전달한다.
+        반환값: 새로 채운 분봉 수
+        """
+        limit = before
+        with self._lock:
+            self._begin_write()
+            try:
+                if self.current is not None and (limit is None or self._current_minute < limit):
+                    limit = self._current_minute
+                c = self.history.tail_columns()
+                merged = {
+                    bar[0]: bar for bar in zip(*(c[name] for name, _ in self.history.columns))
+                }
+                outages = self.outages
+                added = 0
+                for bar in zip(
+                    columns["minute"], columns["open"], columns["high"], columns["low"],
+                    columns["close"], columns["volume"], columns["trade_count"],
+                ):
+                    minute = bar[0]
+                    if limit is not None and minute >= limit:
+                        break
+                    kept = merged.get(minute)
+                    if kept is None or bar[5] > 0 and (
+                        (kept[5] == 0 and kept[6] == 0)
+                        or any(start <= minute <= end for start, end in outages)
+                    ):
+                        merged[minute] = bar
+                        added += 1
+                if outages and columns["minute"]:
+                    covered = columns["minute"][-1]
+                    if limit is not None:
+                        covered = min(covered, limit - 1)
+                    self.outages = [(start, end) for start, end in outages if end > covered]
+                if not added:
+                    return 0
+
+                # history·상위 타임프레임을 병합 결과로 다시 구성
+                self.history.clear()
+                self.timeframes = {
+                    tf: TimeframeBuffer(self.stock_code, tf, self.max_history)
+                    for tf in self.timeframes
+                }
+                for listener in self.bar_listeners:
+                    reset = getattr(listener, "on_history_reset", None)
+                    if reset is not None:
+                        reset()
+                for minute in sorted(merged):
+                    self._append_closed(*merged[minute])
+                cur = self.current
+                if cur is not None:
+                    self._fill_gap(self._current_minute)
+                    if cur.trade_count > 0:
+                        for tf_buf in self.timeframes.values():
+                            tf_buf.on_bar(
+                                self._current_minute, cur.open, cur.high, cur.low,
+                                cur.close, cur.volume, cur.trade_count,
+                            )
+                return added
+            finally:
+                self._end_write()
+
+    def on_tick(
+        self,
+        price: float,
+        qty: int,
+        trade_time: datetime,
+    ) -> Optional[CandleBar]:
+        """
+        새 체결 틱 수신 시 호출.
+        분이 바뀌면 이전 캔들을 닫고 새 캔들을 시작한다.
+        반환값: 방금 닫힌 캔들 (없으면 None)
+        """
+        second = to_epoch_second(trade_time)
+        with self._lock:
+            self._begin_write()
+            try:
+                return self._apply_tick(price, qty, second)
+            finally:
+                self._end_write()
+
+    def on_ticks(
+        self, ticks: Iterable[tuple[float, int, int]]
+    ) -> list[CandleBar]:
+        """
+        여러 체결 틱을 한 번의 락 획득으로 반영 (멀티 레코드 프레임용).
+        ticks: (price, qty, epoch_second) 튜플 목록 (체결 순서대로,
+               epoch_second는 decode_tick_frame이 돌려주는 체결시각).
+               extended 버퍼는 decode_tick_frame(extended=True) 튜플에서 종목코드를 뺀 형식
+        반환값: 이번 배치에서 닫힌 캔들 목록
+        """
+        closed: list[CandleBar] = []
+        with self._lock:
+            self._begin_write()
+            try:
+                if self.extended:
+                    for tick in ticks:
+                        candle = self._apply_tick(tick[0], tick[1], tick[2], tick[3:])
+                        if candle is not None:
+                            closed.append(candle)
+                else:
+                    for price, qty, second in ticks:
+                        candle = self._apply_tick(price, qty, second)
+                        if candle is not None:
+                            closed.append(candle)
+            finally:
+                self._end_write()
+        return closed
+
+    def _on_decoded(self, ticks: list[tuple]) -> list[CandleBar]:
+        """
+        on_ticks의 매니저 핫패스판: decode_tick_frame 튜플(종목코드 포함)을 잘라 복사하지
+        않고 그대로 반영한다. 상위 타임프레임이 없으면 같은 분의 틱은 현재 캔들만 갱신한다.
+        """
+        closed: list[CandleBar] = []
+        with self._lock:
+            self._begin_write()
+            try:
+                apply = self._apply_tick
+                if self.extended:
+                    for tick in ticks:
+                        candle = apply(tick[1], tick[2], tick[3], tick[4:])
+                        if candle is not None:
+                            closed.append(candle)
+                elif self.timeframes:
+                    for _, price, qty, second in ticks:
+                        candle = apply(price, qty, second)
+                        if candle is not None:
+                            closed.append(candle)
+                else:
+                    cur, minute = self.current, self._current_minute
+                    for _, price, qty, second in ticks:
+                        if cur is not None and second // 60 == minute:
+                            cur.update(price, qty)
+                            continue
+                        candle = apply(price, qty, second)
+                        if candle is not None:
+                            closed.append(candle)
+                        cur, minute = self.current, self._current_minute
+            finally:
+                self._end_write()
+        return closed
+
+    def close_before(self, minute: int) -> Optional[CandleBar]:
+        """
+        현재 캔들의 분(epoch-minute)이 minute 이전이면 마감한다 (타이머 마감용).
+        반환값: 방금 닫힌 캔들 (없으면 None)
+        """
+        with self._lock:
+            self._begin_write()
+            try:
+                cur = self.current
+                closed_candle = None
+                if cur is not None and cur.trade_count > 0 and self._current_minute < minute:
+                    closed_candle = self._close_current()
+                for tf, tf_buf in self.timeframes.items():
+                    tf_closed = tf_buf.close_before(minute)
+                    if tf_closed is not None:
+                        self._timeframe_closed.append((tf, tf_closed))
+                return closed_candle
+            finally:
+                self._end_write()
+
+    def _close_current(self) -> CandleBar:
+        """현재 캔들을 마감하여 history에 추가 (호출 측에서 self._lock 보유)"""
+        closed_candle = self.current
+        closed_candle.is_closed = True
+        self.history.append(
+            self._current_minute, closed_candle.open, closed_candle.high,
+            closed_candle.low, closed_candle.close, closed_candle.volume,
+            closed_candle.trade_count,
+            closed_candle.extra_values() if self.extended else None,
+        )
+        self.current = None
+        for listener in self.bar_listeners:
+            listener.on_bar_closed(
+                self._current_minute, closed_candle.open, closed_candle.high,
+                closed_candle.low, closed_candle.close, closed_candle.volume,
+            )
+        for tf, tf_buf in self.timeframes.items():
+            tf_closed = tf_buf.on_minute_closed(self._current_minute)
+            if tf_closed is not None:
+                self._timeframe_closed.append((tf, tf_closed))
+        return closed_candle
+
+    def _append_closed(
+        self, minute: int, o: float, h: float, l: float, c: float, v: int, tc: int, *extra
+    ) -> None:
+        """
+        완성 분봉 1개를 빈 분봉 채우기·리스너·상위 타임프레임과 함께 추가 (재적재용).
+        extra: 확장 컬럼 값 (없으면 0)
+        """
+        self._fill_gap(minute)
+        self.history.append(minute, o, h, l, c, v, tc, extra or None)
+        for listener in self.bar_listeners:
+            listener.on_bar_closed(minute, o, h, l, c, v)
+        for tf_buf in self.timeframes.values():
+            tf_buf.on_bar(minute, o, h, l, c, v, tc)
+            tf_buf.on_minute_closed(minute)
+
+    def _fill_gap(self, minute: int) -> None:
+        """마지막 완성 분봉 다음 분부터 minute 직전까지 빈 분봉 채우기"""
+        gap_minute = self.history.last_minute
+        if gap_minute is None:
+            return
+        close = self.history.last_close
+        gap_minute += 1
+        while gap_minute < minute:
+            self.history.append(gap_minute, close, close, close, close, 0, 0)
+            for listener in self.bar_listeners:
+                listener.on_bar_closed(gap_minute, close, close, close, close, 0)
+            gap_minute += 1
+
+    def _apply_tick(
+        self, price: float, qty: int, second: int, ext: Optional[tuple] = None
+    ) -> Optional[CandleBar]:
+        """
+        틱 1건 반영 (second: 체결시각 epoch-second, 호출 측에서 self._lock 보유).
+        ext: 확장 필드 (extended 버퍼 전용, ExtendedCandleBar.update_ext 참고)
+        """
+        minute = second // 60
+        closed_candle: Optional[CandleBar] = None
+
+        # ① 첫 틱이거나 분이 바뀐 경우 → 이전 캔들 마감
+        if self.current is None or minute > self._current_minute:
+            if self.current is not None and self.current.trade_count > 0:
+                closed_candle = self._close_current()
+            elif self.current is None:
+                last_minute = self.history.last_minute
+                if last_minute is not None and minute <= last_minute:
+                    # 타이머가 이미 마감한 분의 지연 틱 (grace 초과) → 버림
+                    self.late_ticks += 1
+                    return None
+
+            # 빈 분봉 채우기 (틱 없는 분은 직전 종가로 채움)
+            self._fill_gap(minute)
+
+            # 새 캔들 시작 (datetime은 분마다 한 번만 생성)
+            bar_type = ExtendedCandleBar if self.extended else CandleBar
+            self.current = bar_type(stock_code=self.stock_code, dt=from_epoch_minute(minute))
+            self._current_minute = minute
+
+        # ② 현재 캔들에 틱 반영
+        if ext is None:
+            self.current.update(price, qty)
+        else:
+            self.current.update_ext(price, qty, ext)
+
+        # ③ 상위 타임프레임 반영
+        for tf, tf_buf in self.timeframes.items():
+            tf_closed = tf_buf.on_tick(price, qty, self._current_minute)
+            if tf_closed is not None:
+                self._timeframe_closed.append((tf, tf_closed))
+
+        return closed_candle
+
+    def drain_timeframe_closed(self) -> list[tuple[str, CandleBar]]:
+        """마지막 호출 이후 마감된 상위 타임프레임 캔들 (타임프레임, 캔들) 목록"""
+        with self._lock:
+            closed, self._timeframe_closed = self._timeframe_closed, []
+            return closed
+
+    def get_current(self) -> Optional[CandleBar]:
+        """현재(미완성) 캔들의 복사본 반환"""
+        return self._read(lambda: _copy_bar(self.current))
+
+    def get_history(self, n: Optional[int] = None) -> CandleView:
+        """최근 n개의 완성 캔들 반환 (n=None이면 전체, 복사는 O(n))"""
+        return self._read(lambda: CandleView(self.stock_code, self.history.tail_columns(n)))
+
+    def get_all_candles(self, n: Optional[int] = None) -> CandleView:
+        """완성 캔들 + 현재 캔들까지 포함하여 반환"""
+        return self._read(
+            lambda: candle_view(self.stock_code, self.history, self.current, n)
+        )
+
+    def get_range(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        include_current: bool = True,
+        timeframe: Optional[str] = None,
+    ) -> CandleView:
+        """
+        [start, end) 구간(epoch-minute, None이면 열린 구간)의 캔들 (이진 탐색, O(log n + k)).
+        history_tiers를 쓰면 1분봉 링 이전 구간은 압축된 상위 타임프레임 봉으로 돌려준다.
+        timeframe: 상위 타임프레임 (예: "5m", 구간과 겹치는 봉)
+        """
+        tf_buf = None if timeframe is None else self.timeframes[timeframe]
+        ring = self.history if tf_buf is None else tf_buf.history
+        span = 1 if tf_buf is None else tf_buf.minutes
+
+        def read() -> CandleView:
+            columns = ring.range_columns(start, end, span)
+            if tf_buf is None:
+                bar, minute = self.current, self._current_minute
+            else:
+                bar, minute = tf_buf.current, tf_buf._bucket
+            if (
+                not include_current
+                or bar is None
+                or bar.trade_count == 0
+                or (start is not None and minute + span <= start)
+                or (end is not None and minute >= end)
+            ):
+                return CandleView(self.stock_code, columns)
+            append_bar_columns(columns, bar, minute)
+            return CandleView(self.stock_code, columns, open_pos=len(columns["minute"]) - 1)
+
+        return self._read(read)
+
+    def get_timeframe_current(self, timeframe: str) -> Optional[CandleBar]:
+        """상위 타임프레임의 현재(미완성) 캔들의 복사본 반환"""
+        tf_buf = self.timeframes[timeframe]
+        return self._read(lambda: _copy_bar(tf_buf.current))
+
+    def get_timeframe_candles(
+        self, timeframe: str, n: Optional[int] = None, include_current: bool = True
+    ) -> CandleView:
+        """상위 타임프레임 캔들 반환 (dt = 구간 시작 시각)"""
+        tf_buf = self.timeframes[timeframe]
+        return self._read(lambda: tf_buf.view(n, include_current))
+
+
+def _copy_bar(bar: Optional[CandleBar]) -> Optional[CandleBar]:
+    return None if bar is None else replace(bar)
+
+
+# ──────────────────────────────────────────────
+# 틱 프레임 디코더
+# ──────────────────────────────────────────────
+# H0STCNT0 레코드에서 읽는 마지막 필드(CNTG_VOL, [12])까지의 최소 필드 수
+H0STCNT0_MIN_FIELDS = 13
+# 확장 모드에서 읽는 마지막 필드(CCLD_DVSN, [21])까지의 최소 필드 수
+H0STCNT0_EXT_MIN_FIELDS = 22
+
+
+def decode_tick_frame(
+    raw: str,
+    session_date: SessionDate = _SESSION_DATE,
+    extended: bool = False,
+    symbols: Optional[SymbolTable] = None,
+) -> list[tuple]:
+    """
+    KIS 실시간 체결 프레임 → (종목코드, 체결가, 체결량, 체결시각 epoch-second) 목록.
+    형식: 0|H0STCNT0|005|rec0_field0^...^rec0_field45^rec1_field0^...
+
+    extended=True면 같은 분할 결과에서 확장 필드까지 읽어
+    (종목코드, 체결가, 체결량, 체결시각, 체결구분, 매도호가1, 매수호가1,
+     체결강도, 누적거래량, 누적거래대금) 튜플을 돌려준다 (체결구분 1:매수, 5:매도).
+
+    세 번째 구간은 프레임에 담긴 레코드(체결) 수이며, 각 레코드는
+    동일한 개수의 ^-구분 필드가 연속으로 이어진다. 페이로드를 한 번만
+    분할한 뒤 레코드 폭(stride) 단위로 인덱싱하여 모든 체결을 읽는다.
+
+    체결시각은 datetime을 만들지 않고 epoch-second 정수로 돌려준다
+    (당일 자정 값은 session_date 캐시, 같은 HHMMSS는 직전 결과 재사용).
+    자정 직후 도착한 전날 체결(현재 시각보다 12시간 이상 뒤의 HHMMSS)은
+    전날로 계산한다.
+
+    symbols를 주면 등록된 종목코드는 SymbolTable의 종목코드 객체로 바꿔 돌려준다
+    (레코드마다 잘라낸 새 문자열 대신 intern된 객체, 미등록 종목은 그대로).
+
+    H0STCNT0 필드 순서 (^-구분, 레코드 기준 오프셋):
+      [0]  MKSC_SHRN_ISCD   종목코드
+      [1]  STCK_CNTG_HOUR   체결시간 (HHMMSS)
+      [2]  STCK_PRPR        현재가 (체결가)
+      [3]  PRDY_VRSS_SIGN   전일대비부호
+      [4]  PRDY_VRSS        전일대비
+      [5]  PRDY_CTRT        전일대비율
+      [6]  WGHN_AVRG_STCK_PRC  가중평균가
+      [7]  STCK_OPRC        시가
+      [8]  STCK_HGPR        고가
+      [9]  STCK_LWPR        저가
+      [10] ASKP1            매도호가1
+      [11] BIDP1            매수호가1
+      [12] CNTG_VOL         체결거래량 (이번 틱)
+      [13] ACML_VOL         누적거래량
+      [14] ACML_TR_PBMN     누적거래대금
+      [15] SELN_CNTG_CSNU   매도체결건수
+      [16] SHNU_CNTG_CSNU   매수체결건수
+      [17] NTBY_CNTG_CSNU   순매수체결건수
+      [18] CTTR             체결강도
+      [19] SELN_CNTG_SMTN   총매도수량
+      [20] SHNU_CNTG_SMTN   총매수수량
+      [21] CCLD_DVSN        체결구분 (1:매수, 5:매도)
+      ...
+    """
+    parts = raw.split("|", 3)
+    if len(parts) < 4:
+        return []
+
+    encrypted, tr_id, count_str, payload = parts
+
+    if encrypted == "1":
+        # 암호화 데이터 (체결 통보 등) — 시세가 아니므로 무시
+        return []
+
+    if tr_id != "H0STCNT0":
+        return []
+
+    fields = payload.split("^")
+    try:
+        count = int(count_str)
+    except ValueError:
+        count = 1
+    if count <= 0:
+        return []
+
+    width, remainder = divmod(len(fields), count)
+    if remainder or width < (H0STCNT0_EXT_MIN_FIELDS if extended else H0STCNT0_MIN_FIELDS):
+        logger.warning(
+            f"틱 프레임 형식 오류: count={count} fields={len(fields)} "
+            f"| raw={raw[:100]}"
+        )
+        return []
+
+    # 체결 시각의 날짜 부분은 프레임당 한 번만 계산
+    day_base, now_sod = session_date.current()
+    last_hhmmss = None
+    second = 0
+    names = None if symbols is None else symbols.names
+
+    ticks: list[tuple] = []
+    for base in range(0, count * width, width):
+        try:
+            stock_code = fields[base]
+            if names is not None:
+                stock_code = names.get(stock_code, stock_code)
+            hhmmss = fields[base + 1]  # HHMMSS
+            price = abs(float(fields[base + 2]))
+            cntg_vol = abs(int(fields[base + 12]))  # 체결 거래량 (이번 틱)
+
+            # 체결 시각 → epoch-second (오늘 자정 + HHMMSS)
+            if hhmmss != last_hhmmss:
+                v = int(hhmmss)
+                h, m, sec = v // 10000, v // 100 % 100, v % 100
+                if len(hhmmss) != 6 or h >= 24 or m >= 60 or sec >= 60:
+                    raise ValueError(f"체결시간 형식 오류: {hhmmss!r}")
+                sod = h * 3600 + m * 60 + sec
+                second = day_base + sod
+                if sod - now_sod > 43200:
+                    second -= 86400  # 자정을 넘겨 도착한 전날 체결
+                last_hhmmss = hhmmss
+            if extended:
+                ticks.append((
+                    stock_code, price, cntg_vol, second,
+                    int(fields[base + 21]),               # 체결구분
+                    abs(float(fields[base + 10])),        # 매도호가1
+                    abs(float(fields[base + 11])),        # 매수호가1
+                    float(fields[base + 18]),             # 체결강도
+                    int(fields[base + 13]),               # 누적거래량
+                    int(fields[base + 14]),               # 누적거래대금
+                ))
+                continue
+        except (ValueError, IndexError) as e:
+            logger.warning(f"틱 파싱 오류: {e} | raw={raw[:100]}")
+            continue
+        ticks.append((stock_code, price, cntg_vol, second))
+
+    return ticks
+
+
+class FrameDecoder:
+    """
+    H0STCNT0 외 실시간 TR 디코더의 기반 클래스 (RealtimeCandleManager(decoders=...)).
+    매니저는 종목마다 H0STCNT0와 함께 등록된 tr_id도 구독하고, 해당 tr_id 프레임을
+    decode()로 넘긴다. 호출은 모두 이벤트 루프 스레드에서 일어난다.
+    예: candle_orderbook.OrderBookDecoder (H0STASP0 호가)
+    """
+
+    tr_id = ""
+
+    def add_stock(self, stock_code: str) -> None:
+        """종목 추가 (매니저 add_stock 시)"""
+
+    def remove_stock(self, stock_code: str) -> None:
+        """종목 제거 (매니저 remove_stock 시, 종목 상태 해제)"""
+
+    def decode(self, raw: str, recv_ns: int = 0) -> None:
+        """tr_id 프레임 1개 처리 (recv_ns: 수신 시각 time.time_ns(), 모르면 0)"""
+        raise NotImplementedError
+
+    def close_before(self, minute: int) -> None:
+        """분 경계 타이머 마감: epoch-minute이 minute 이전인 분 단위 집계 마감"""
+
+    @property
+    def stats(self) -> dict:
+        return {}
+
+
+# ──────────────────────────────────────────────
+# 콜백 디스패처
+# ──────────────────────────────────────────────
+# 이벤트별 인자 형태와 coalesce 기본 키
+#   "tick"           (stock_code, price, qty, trade_time)  → 종목코드
+#   "candle_closed"  (CandleBar,)                          → 종목코드
+#   "candles_closed" (list[CandleBar],)                    → 단일 키 (최신 묶음만)
+#   "timeframe_closed" (timeframe, CandleBar)              → (종목코드, 타임프레임)
+DISPATCH_EVENTS: dict[str, Callable[[tuple], Any]] = {
+    "tick": lambda args: args[0],
+    "candle_closed": lambda args: args[0].stock_code,
+    "candles_closed": lambda args: None,
+    "timeframe_closed": lambda args: (args[1].stock_code, args[0]),
+}
+
+
+class Subscriber:
+    """
+    디스패처 구독자 1개 (이벤트 대기열 + 소비 통계).
+
+    policy
+      "drop_oldest" : 대기열이 maxsize를 넘으면 가장 오래된 이벤트를 버림
+      "coalesce"    : 키(key)별 최신 이벤트만 유지 (예: 종목별 마지막 틱)
+      "block"       : 대기열이 maxsize에 차면 프레임 처리를 멈추고 소비를 기다림. 세션
+                      수신 대기열까지 차면 소켓 읽기도 멈춰 TCP로 역압을 건다 (프레임은
+                      버리지 않지만 그동안 PINGPONG 응답도 늦어진다)
+    """
+
+    POLICIES = ("drop_oldest", "coalesce", "block")
+
+    def __init__(
+        self,
+        event: str,
+        callback: Callable,
+        policy: str = "drop_oldest",
+        maxsize: int = 1024,
+        key: Optional[Callable[[tuple], Any]] = None,
+    ):
+        if event not in DISPATCH_EVENTS:
+            raise ValueError(f"알 수 없는 이벤트: {event}")
+        if policy not in self.POLICIES:
+            raise ValueError(f"알 수 없는 정책: {policy}")
+        self.event = event
+        self.callback = callback
+        self.policy = policy
+        self.maxsize = maxsize
+        self.key = key or DISPATCH_EVENTS[event]
+        self.is_async = asyncio.iscoroutinefunction(callback)
+        self.name = getattr(callback, "__qualname__", repr(callback))
+
+        self._queue: deque[tuple] = deque()
+        self._latest: dict[Any, tuple] = {}
+        self._wakeup = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._task: Optional[asyncio.Task] = None
+        self._busy = False  # 꺼낸 묶음을 콜백에 전달하는 중
+
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._latest) if self.policy == "coalesce" else len(self._queue)
+
+    def put(self, args: tuple) -> None:
+        """이벤트 적재 (이벤트 루프 스레드에서 호출)"""
+        if self.policy == "coalesce":
+            k = self.key(args)
+            if k in self._latest:
+                self.coalesced += 1
+            self._latest[k] = args
+        else:
+            self._queue.append(args)
+            if len(self._queue) > self.maxsize and self.policy == "drop_oldest":
+                self._queue.popleft()
+                self.dropped += 1
+            elif len(self._queue) >= self.maxsize and self.policy == "block":
+                self._writable.clear()
+        depth = self.depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self._wakeup.set()
+
+    def _take(self) -> list[tuple]:
+        if self.policy == "coalesce":
+            items = list(self._latest.values())
+            self._latest.clear()
+        else:
+            items = list(self._queue)
+            self._queue.clear()
+        return items
+
+    def _call_batch(self, items: list[tuple]) -> None:
+        """동기 콜백을 묶음으로 호출 (스레드 풀에서 실행)"""
+        for args in items:
+            try:
+                self.callback(*args)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"{self.event} 구독자 에러 ({self.name}): {e}")
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "event": self.event,
+            "callback": self.name,
+            "policy": self.policy,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+
+class CallbackDispatcher:
+    """
+    이벤트를 구독자별 대기열에 넣고, 구독자마다 별도 태스크로 소비한다.
+    동기 콜백은 스레드 풀에서 묶음 단위로, async 콜백은 이벤트 루프에서 실행된다.
+    이벤트 발행(publish)은 대기열 적재만 하므로 수신 루프를 막지 않는다.
+    """
+
+    def __init__(self, max_threads: int = 4):
+        self.max_threads = max_threads
+        self._subscribers: dict[str, list[Subscriber]] = {e: [] for e in DISPATCH_EVENTS}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running = False
+
+    def subscribe(self, subscriber: Subscriber) -> Subscriber:
+        self._subscribers[subscriber.event].append(subscriber)
+        if self._running:
+            self._start_consumer(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subs = self._subscribers[subscriber.event]
+        if subscriber in subs:
+            subs.remove(subscriber)
+        if subscriber._task is not None:
+            subscriber._task.cancel()
+            subscriber._task = None
+        subscriber._writable.set()
+
+    def has(self, event: str) -> bool:
+        return bool(self._subscribers[event])
+
+    def publish(self, event: str, args: tuple) -> None:
+        for sub in self._subscribers[event]:
+            sub.put(args)
+
+    @property
+    def needs_drain(self) -> bool:
+        return any(
+            not sub._writable.is_set()
+            for subs in self._subscribers.values()
+            for sub in subs
+        )
+
+    async def drain(self) -> None:
+        """block 정책 구독자의 대기열에 여유가 생길 때까지 대기"""
+        for subs in self._subscribers.values():
+            for sub in subs:
+                if not sub._writable.is_set():
+                    await sub._writable.wait()
+
+    async def flush(self, subscribers: Iterable[Subscriber], timeout: float = 5.0) -> bool:
+        """구독자들이 대기열의 이벤트를 모두 전달할 때까지 대기 (반환값: 제한 시간 안에 끝났는지)"""
+        deadline = time.monotonic() + timeout
+        for sub in subscribers:
+            while sub.depth or sub._busy:
+                if sub._task is None or time.monotonic() >= deadline:
+                    return False
+                await asyncio.sleep(0.01)
+        return True
+
+    def call(self, callback: Callable[[], Any], name: str) -> asyncio.Future:
+        """인자 없는 동기 콜백을 스레드 풀에서 실행 (예외는 로그로만)"""
+
+        def run() -> None:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"{name} 콜백 에러: {e}")
+
+        return asyncio.get_running_loop().run_in_executor(self._executor, run)
+
+    def start(self) -> None:
+        self._running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_threads, thread_name_prefix="candle-callback"
         )
+        for subs in self._subscribers.values():
+            for sub in subs:
+                self._start_consumer(sub)
+
+    def stop(self) -> None:
+        self._running = False
+        for subs in self._subscribers.values():
+            for sub in subs:
+                if sub._task is not None:
+                    sub._task.cancel()
+                    sub._task = None
+                sub._writable.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _start_consumer(self, sub: Subscriber) -> None:
+        if sub._task is None:
+            sub._task = asyncio.ensure_future(self._consume(sub))
+
+    async def _consume(self, sub: Subscriber) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await sub._wakeup.wait()
+            sub._wakeup.clear()
+            items = sub._take()
+            if not items:
+                continue
+            sub._busy = True
+            try:
+                if sub.is_async:
+                    for args in items:
+                        try:
+                            await sub.callback(*args)
+                        except Exception as e:
+                            sub.errors += 1
+                            logger.error(f"{sub.event} 구독자 에러 ({sub.name}): {e}")
+                else:
+                    await loop.run_in_executor(self._executor, sub._call_batch, items)
+            finally:
+                sub._busy = False
+            sub.delivered += len(items)
+            if sub.depth < sub.maxsize:
+                sub._writable.set()
+
+    @property
+    def stats(self) -> list[dict]:
+        return [sub.stats for subs in self._subscribers.values() for sub in subs]
 
 
 # ──────────────────────────────────────────────
-# 종목별 캔들 버퍼
+# WebSocket 세션
 # ──────────────────────────────────────────────
-class StockCandleBuffer:
+class KisSession:
     """
-    단일 종목의 분봉 버퍼.
-    - current : 현재 만들어지고 있는 (미완성) 캔들
-    - history : 완성된 과거 캔들 (deque, 최대 max_history개 보관)
+    KIS WebSocket 세션 1개의 상태 (세션 풀 모드에서 종목을 나눠 담당).
+    - ws         : 연결된 WebSocket (끊긴 동안 None)
+    - assigned   : 이 세션에 배정된 종목 (연결 시 구독 대상)
+    - subscribed : 현재 연결에서 구독 요청을 보낸 종목
+    - inbound    : 수신했지만 아직 처리하지 않은 체결 프레임 대기열 (inbound_maxsize개 제한)
+    - processor  : inbound를 처리하는 태스크 (끊긴 뒤에도 남은 프레임을 마저 처리)
+    - failures   : 연속 재연결 횟수 (재연결 대기 시간 계산용)
     """
 
-    def __init__(self, stock_code: str, max_history: int = 1440):
-        self.stock_code = stock_code
-        self.max_history = max_history
-        self.current: Optional[CandleBar] = None
-        self.history: deque[CandleBar] = deque(maxlen=max_history)
-        self._lock = threading.Lock()
+    def __init__(self, index: int):
+        self.index = index
+        self.ws: Optional[websockets.WebSocketClientProtocol] = None
+        self.assigned: set[str] = set()
+        self.subscribed: set[str] = set()
+        self.inbound: Optional[asyncio.Queue] = None
+        self.processor: Optional[asyncio.Task] = None
+        self.inbound_stalls = 0  # 대기열이 가득 차 소켓 읽기를 멈춘 횟수 (누적)
+        self.inbound_stall_s = 0.0  # 그동안 읽기를 멈춘 시간 합계 (초)
+        self.connect_count = 0
+        self.failures = 0
+        self.connected_at = 0.0  # 현재 연결 시각 (monotonic, 끊긴 동안 0)
+        self.dropped_ns = 0      # 끊김 감지 시각 (perf_counter_ns, 첫 연결 전·재연결 후 첫 프레임에서 0)
+        self.last_recovery_s: Optional[float] = None  # 끊김 → 재연결 후 첫 체결 프레임
 
-    def _minute_key(self, dt: datetime) -> datetime:
-        """datetime → 해당 분의 시작 시각(초·마이크로초 제거)"""
-        return dt.replace(second=0, microsecond=0)
+    @property
+    def pending(self) -> set[str]:
+        """배정되었지만 아직 구독하지 않은 종목"""
+        return self.assigned - self.subscribed
 
-    def on_tick(
+    def __repr__(self) -> str:
+        state = "connected" if self.ws is not None else "disconnected"
+        return f"KisSession(#{self.index}, {state}, {len(self.assigned)} stocks)"
+
+
+class UniverseChange:
+    """
+    종목 구성 변경 요청 1건 (set_universe / update_universe / add_stock / remove_stock).
+    버퍼·세션 배정은 이벤트 루프에서 요청 순서대로 바로 반영되고, 구독·해제 요청은
+    초당 subscribe_rate건 이하로 응답을 기다리지 않고 이어서 보낸다.
+    - added / removed          : 실제로 추가·제거된 종목 (현재 종목과 비교해 채움)
+    - subscribed / unsubscribed : 보낸 구독·해제 요청 종목 수 (끊긴 세션 종목은 재연결 시 구독)
+    - elapsed_s                : 요청 → 마지막 구독·해제 요청 전송까지 걸린 시간
+    다른 스레드에서는 wait(), 이벤트 루프에서는 await로 완료를 기다린다.
+    """
+
+    def __init__(
         self,
-        price: float,
-        qty: int,
-        trade_time: datetime,
-    ) -> Optional[CandleBar]:
-        """
-        새 체결 틱 수신 시 호출.
-        분이 바뀌면 이전 캔들을 닫고 새 캔들을 시작한다.
-        반환값: 방금 닫힌 캔들 (없으면 None)
-        """
-        minute = self._minute_key(trade_time)
-        closed_candle: Optional[CandleBar] = None
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+        replace: Optional[Iterable[str]] = None,
+        timeframes: Optional[Iterable[str]] = None,
+        persist: bool = True,
+    ):
+        self.add = tuple(add)
+        self.remove = tuple(remove)
+        self.replace = None if replace is None else tuple(replace)
+        self.timeframes = None if timeframes is None else tuple(timeframes)
+        self.persist = persist
+        self.added: list[str] = []
+        self.removed: list[str] = []
+        self.subscribed = 0
+        self.unsubscribed = 0
+        self.error: Optional[BaseException] = None
+        self.elapsed_s: Optional[float] = None
+        self._requested = time.monotonic()
+        # 세션별 보낼 구독·해제 요청 (적용 시 채움)
+        self._subscribe: dict[KisSession, list[str]] = defaultdict(list)
+        self._unsubscribe: dict[KisSession, list[str]] = defaultdict(list)
+        self._done = threading.Event()
+        self._waiter: Optional[asyncio.Future] = None
 
-        with self._lock:
-            # ① 첫 틱이거나 분이 바뀐 경우 → 이전 캔들 마감
-            if self.current is None or minute > self.current.dt:
-                if self.current is not None and self.current.trade_count > 0:
-                    self.current.is_closed = True
-                    closed_candle = self.current
-                    self.history.append(closed_candle)
-
-                # 빈 분봉 채우기 (틱 없는 분은 직전 종가로 채움)
-                if closed_candle is not None:
-                    gap_minute = closed_candle.dt + timedelta(minutes=1)
-                    while gap_minute < minute:
-                        filler = CandleBar(
-                            stock_code=self.stock_code,
-                            dt=gap_minute,
-                            open=closed_candle.close,
-                            high=closed_candle.close,
-                            low=closed_candle.close,
-                            close=closed_candle.close,
-                            volume=0,
-                            trade_count=0,
-                            is_closed=True,
-                        )
-                        self.history.append(filler)
-                        gap_minute += timedelta(minutes=1)
-
-                # 새 캔들 시작
-                self.current = CandleBar(stock_code=self.stock_code, dt=minute)
-
-            # ② 현재 캔들에 틱 반영
-            self.current.update(price, qty)
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
 
-        return closed_candle
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """완료까지 대기 (이벤트 루프 밖의 스레드용). 반환값: 완료 여부"""
+        return self._done.wait(timeout)
 
-    def get_current(self) -> Optional[CandleBar]:
-        """현재(미완성) 캔들 반환"""
-        with self._lock:
-            return self.current
+    def __await__(self):
+        if self._waiter is not None:
+            yield from asyncio.shield(self._waiter).__await__()
+        return self
 
-    def get_history(self, n: Optional[int] = None) -> list[CandleBar]:
-        """최근 n개의 완성 캔들 반환 (n=None이면 전체)"""
-        with self._lock:
-            if n is None:
-                return list(self.history)
-            return list(self.history)[-n:]
+    def _finish(self) -> None:
+        self.elapsed_s = time.monotonic() - self._requested
+        self._done.set()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
 
-    def get_all_candles(self, n: Optional[int] = None) -> list[CandleBar]:
-        """완성 캔들 + 현재 캔들까지 포함하여 반환"""
-        with self._lock:
-            result = list(self.history)
-            if self.current and self.current.trade_count > 0:
-                result.append(self.current)
-            if n is not None:
-                result = result[-n:]
-            return result
+    @property
+    def stats(self) -> dict:
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "subscribed": self.subscribed,
+            "unsubscribed": self.unsubscribed,
+            "elapsed_s": self.elapsed_s,
+            "error": None if self.error is None else repr(self.error),
+        }
+
+    def __repr__(self) -> str:
+        state = "done" if self.done else "pending"
+        return f"UniverseChange(+{len(self.added)} -{len(self.removed)}, {state})"
+
+
+def _log_release_error(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"분봉 저장소 파일 닫기 실패: {future.exception()}")
+
+
+def _event_callback(name: str, event: str) -> property:
+    """start() 동안 디스패처 구독자(block 정책)로 실행되는 on_* 콜백 속성"""
+
+    def fget(self: RealtimeCandleManager) -> Optional[Callable]:
+        return self._callbacks.get(name)
+
+    def fset(self: RealtimeCandleManager, callback: Optional[Callable]) -> None:
+        self._callbacks[name] = callback
+        self._bind_callback(name, event)
+
+    return property(fget, fset)
 
 
 # ──────────────────────────────────────────────
@@ -190,23 +1997,145 @@ class RealtimeCandleManager:
         KIS WebSocket URL (지정하지 않으면 실전 서버 사용)
     rest_url : str | None
         Approval Key 발급용 REST URL
+    auto_close : bool
+        True면 다음 틱을 기다리지 않고 매 분 경계(벽시계)마다 모든 종목의
+        미완성 캔들을 일괄 마감 (기본 True)
+    close_grace : float
+        분 경계 이후 지연 틱을 기다리는 유예 시간(초). 경계 + close_grace
+        시점에 마감하며, 이후 도착한 지난 분의 틱은 버려진다 (기본 2.0)
+    sessions : int
+        동시에 유지할 WebSocket 세션 수 (기본 1). 2 이상이면 add_stock 종목을
+        세션별로 나눠 구독하고, 세션이 끊기면 다른 세션으로 재배치한다.
+    max_per_session : int
+        세션당 최대 실시간 등록 수 (TR × 종목, 기본 MAX_PER_SESSION)
+    workers : int
+        0보다 크면 틱 디코딩·분봉 집계를 워커 프로세스 N개에 종목코드 기준으로
+        나눠 맡기고, 분봉 버퍼를 공유 메모리에 둔다 (candle_shm 참고).
+        이 모드에서는 on_tick이 호출되지 않으며 get_buffer()는
+        SharedCandleReader를 반환한다 (기본 0 = 단일 프로세스)
+    timeframes : Iterable[str]
+        모든 종목에 기본으로 유지할 상위 타임프레임 (예: ("5m", "15m", "60m", "1d")).
+        종목별로는 add_stock(code, timeframes=...)로 지정 (workers 모드 미지원)
+    store : candle_store.CandleStore | None
+        분봉 영구 저장소. 지정하면 마감된 분봉을 종목·거래일별 파일에 추가하고
+        (fsync는 store.fsync_interval초마다 모아서 수행), add_stock 시 당일
+        파일을 다시 읽어 history를 채운다 (workers 모드 미지원)
+    journal : tick_journal.TickJournalWriter | None
+        원본 프레임 저널. 지정하면 수신한 체결 프레임을 수신 시각과 함께
+        기록한다 (tick_journal.JournalReplay로 재생, 종료 시 flush만 하므로
+        close()는 호출 측에서)
+    metrics : bool
+        True면 단계별(수신·대기열·디코딩·버퍼 반영·콜백) 지연 히스토그램,
+        종목별 체결시각→수신 지연, 초당 프레임/레코드 수, 파싱 오류 수,
+        이벤트 루프 지연을 수집한다 (stats["metrics"], metrics_text()).
+        끄면 핫패스 비용은 분기 하나뿐이다 (기본 False, candle_metrics 참고)
+    metrics_port : int | None
+        지정하면 start() 동안 http://metrics_host:metrics_port/metrics 로
+        Prometheus 텍스트를 제공한다 (metrics=True를 포함)
+    backfill : bool
+        True면 add_stock(시작 전에 추가한 종목은 start) 직후 KIS REST
+        주식당일분봉조회로 당일 1분봉을 받아 history에 병합한다. 실시간 스트림이
+        이어받은 분부터는 병합하지 않는다 (candle_backfill 참고, workers 모드 미지원)
+    snapshot_window : int
+        market_snapshot()의 return_n / volume_n 기간(분) (기본 5)
+    extended : bool
+        True면 체결 프레임의 체결구분·호가·체결강도·누적거래량/대금까지 디코딩해
+        분봉마다 매수·매도 체결량, 거래대금(VWAP), 마지막 호가, 평균 체결강도를
+        집계한다 (캔들은 ExtendedCandleBar, 분봉당 52 → 88바이트).
+        저장소·상위 타임프레임에는 기본 컬럼만 남는다 (기본 False, workers 모드 미지원)
+    publish_path : str | None
+        지정하면 start() 동안 이 경로의 Unix 도메인 소켓으로 틱·완성 분봉을
+        같은 호스트의 여러 구독자 프로세스에 보낸다. 구독자별 종목 필터와
+        접속 시 현재 분봉 스냅샷을 지원한다 (candle_ipc 참고)
+    decoders : Iterable[FrameDecoder]
+        H0STCNT0와 함께 구독할 실시간 TR 디코더 (예: candle_orderbook.OrderBookDecoder()).
+        종목마다 TR 수만큼 실시간 등록을 쓰므로 세션당 종목 수는
+        max_per_session // (1 + 디코더 수)가 된다 (workers 모드 미지원)
+    history_tiers : Iterable[tuple[str, int]]
+        max_history개를 넘어 밀려나는 1분봉을 압축해 보관할 (타임프레임, 보관 기간(분)) 단계.
+        예: (("5m", 7 * 1440), ("30m", 30 * 1440)). 종목당 메모리는 단계별 고정 링 크기로
+        정해지며, get_candles(start=, end=)로 전 구간을 조회한다 (TieredHistory 참고,
+        workers 모드 미지원)
+    subscribe_rate : float | None
+        연결 중 종목 구성 변경(add_stock / remove_stock / set_universe / update_universe)의
+        실시간 등록·해제 요청을 전 세션 합산 초당 몇 건까지 보낼지 (기본 SUBSCRIBE_RATE).
+        재연결 시 배정 종목 일괄 구독은 제한하지 않는다
+    inbound_maxsize : int | None
+        세션별 수신 대기열(수신 → 파싱) 최대 프레임 수 (기본 INBOUND_MAXSIZE).
+        block 정책 구독자 등으로 처리가 밀려 가득 차면 자리가 날 때까지 소켓 읽기를 멈춰
+        TCP로 역압을 건다. 프레임은 버리지 않으며(그동안 PINGPONG 응답도 늦어짐),
+        멈춘 횟수·시간은 stats["sessions"][i]["inbound_stalls"] / ["inbound_stall_s"]
+    parser : str | candle_parser.FrameParser
+        체결 프레임 파서 백엔드 "python"(참조 구현, 기본) / "bytes"(UTF-8 디코딩 없이
+        bytes로 수신·분할) / "auto" 또는 FrameParser 인스턴스. 제어 프레임 JSON은
+        orjson이 설치되어 있으면 orjson으로 파싱한다 (candle_parser 참고,
+        workers 모드는 str 파서만 지원)
+    shm_prefix : str | None
+        workers 모드의 공유 메모리 세그먼트 이름 접두어 (기본 kiscandle_{PID}).
+        다른 프로세스는 SharedCandleReader.attach(종목코드, manager.shm_prefix)로 읽는다
+    shm_cleanup_stale : bool
+        같은 이름의 세그먼트가 이미 있으면 지우고 다시 만든다 (비정상 종료로 남은
+        세그먼트 정리용). 기본 False면 add_stock이 FileExistsError를 낸다
 
     Callbacks
     ---------
     on_candle_closed : (CandleBar) -> None
         1분봉이 완성될 때마다 호출
+    on_candles_closed : (list[CandleBar]) -> None
+        한 번에 마감된 분봉 묶음으로 호출 (타이머 마감 시 전 종목 1회)
+    on_timeframe_closed : (timeframe, CandleBar) -> None
+        상위 타임프레임 캔들이 완성될 때마다 호출 (CandleBar.dt = 구간 시작)
     on_tick : (stock_code, price, qty, trade_time) -> None
         매 체결 틱마다 호출
     on_connected : () -> None
-        WebSocket 연결 시 호출
+        WebSocket 연결 시 호출 (세션마다)
     on_disconnected : () -> None
-        WebSocket 연결 끊김 시 호출
+        WebSocket 연결 끊김 시 호출 (세션마다)
+
+    start() 동안 on_tick / on_candle_closed / on_candles_closed / on_timeframe_closed는
+    block 정책 디스패처 구독자(subscribe() 참고, 대기열 CALLBACK_MAXSIZE)로 등록되어
+    수신 루프 밖에서 실행된다: 동기 콜백은 스레드 풀에서 이벤트 순서대로, async 콜백은
+    이벤트 루프의 별도 태스크에서. 이벤트를 버리지 않으므로 콜백이 계속 밀리면 프레임
+    처리가 멈추고 결국 소켓 읽기도 멈춘다 (inbound_maxsize 참고). 종료 시 남은 이벤트는
+    전달한 뒤 멈춘다. on_connected / on_disconnected는 스레드 풀에서 실행하고 끝날 때까지
+    그 세션만 기다린다. start() 전(저널 재생, 종목 제거 등)에는 호출한 자리에서 바로 실행된다.
+    다른 정책(drop_oldest, coalesce)이 필요하면 subscribe()로 등록한다.
     """
 
     # KIS WebSocket URL
     KIS_WS_URL = "ws://ops.koreainvestment.com:21000"
     KIS_REST_URL = "https://openapi.koreainvestment.com:9443"
 
+    # KIS 세션당 실시간 등록 한도
+    MAX_PER_SESSION = 41
+
+    # 실시간 등록·해제 요청 한도 (전 세션 합산, 초당 메시지 수).
+    # KIS는 초 단위 창으로 세므로 연속 전송 없이 간격을 고르게 둔다
+    SUBSCRIBE_RATE = 20.0
+
+    # 세션별 수신 대기열 한도 (프레임 수). 가득 차면 소켓 읽기를 멈춘다 (역압)
+    INBOUND_MAXSIZE = 10_000
+
+    # start() 동안 on_* 이벤트 콜백 구독자의 대기열 한도 (block 정책)
+    CALLBACK_MAXSIZE = 1024
+
+    # on_* 이벤트 콜백 (start() 동안 수신 루프 밖에서 실행, 클래스 docstring 참고)
+    on_tick = _event_callback("on_tick", "tick")
+    on_candle_closed = _event_callback("on_candle_closed", "candle_closed")
+    on_candles_closed = _event_callback("on_candles_closed", "candles_closed")
+    on_timeframe_closed = _event_callback("on_timeframe_closed", "timeframe_closed")
+
+    # 재연결 대기 (지터 포함 지수 백오프): 최소·최대 (초), 이 시간 이상 유지된
+    # 연결이 끊기면 최소 대기부터 다시 시작
+    RECONNECT_DELAY_MIN = 0.5
+    RECONNECT_DELAY_MAX = 30.0
+    RECONNECT_STABLE_SECONDS = 30.0
+
+    # Approval Key 유효 시간 / 백그라운드 갱신 시점(만료 전) / 실패 시 재시도 간격 (초)
+    APPROVAL_KEY_TTL = 23 * 3600
+    APPROVAL_KEY_REFRESH_MARGIN = 30 * 60
+    APPROVAL_KEY_RETRY_DELAY = 60
+
     def __init__(
         self,
         app_key: str,
@@ -215,6 +2144,28 @@ class RealtimeCandleManager:
         max_history: int = 1440,
         ws_url: Optional[str] = None,
         rest_url: Optional[str] = None,
+        auto_close: bool = True,
+        close_grace: float = 2.0,
+        sessions: int = 1,
+        max_per_session: Optional[int] = None,
+        workers: int = 0,
+        timeframes: Iterable[str] = (),
+        store=None,
+        journal=None,
+        metrics: bool = False,
+        metrics_port: Optional[int] = None,
+        metrics_host: str = "127.0.0.1",
+        backfill: bool = False,
+        snapshot_window: int = 5,
+        extended: bool = False,
+        publish_path: Optional[str] = None,
+        decoders: Iterable[FrameDecoder] = (),
+        history_tiers: Iterable[tuple[str, int]] = (),
+        subscribe_rate: Optional[float] = None,
+        inbound_maxsize: Optional[int] = None,
+        parser: Union[str, "FrameParser"] = "python",
+        shm_prefix: Optional[str] = None,
+        shm_cleanup_stale: bool = False,
     ):
         self.app_key = app_key
         self.app_secret = app_secret
@@ -222,21 +2173,107 @@ class RealtimeCandleManager:
         self.max_history = max_history
         self.ws_url = ws_url or self.KIS_WS_URL
         self.rest_url = rest_url or self.KIS_REST_URL
+        self.auto_close = auto_close
+        self.close_grace = close_grace
+        self.max_per_session = max_per_session or self.MAX_PER_SESSION
+        self.timeframes = tuple(timeframes)
+        for tf in self.timeframes:
+            parse_timeframe(tf)
+        if workers > 0 and self.timeframes:
+            raise ValueError("workers 모드에서는 timeframes를 지원하지 않습니다")
+        if workers > 0 and store is not None:
+            raise ValueError("workers 모드에서는 store를 지원하지 않습니다")
+        if workers > 0 and backfill:
+            raise ValueError("workers 모드에서는 backfill을 지원하지 않습니다")
+        if workers > 0 and extended:
+            raise ValueError("workers 모드에서는 extended를 지원하지 않습니다")
+        self.history_tiers = tuple(history_tiers)
+        if workers > 0 and self.history_tiers:
+            raise ValueError("workers 모드에서는 history_tiers를 지원하지 않습니다")
+        if self.history_tiers:
+            TieredHistory.validate_tiers(self.history_tiers)
+        from candle_parser import (  # 순환 import 방지
+            JSON_BACKEND,
+            get_parser,
+            loads_json,
+            recv_accepts_decode,
+        )
 
-        # 종목별 캔들 버퍼
+        self.parser = get_parser(parser)
+        if workers > 0 and self.parser.binary:
+            raise ValueError("workers 모드에서는 bytes 파서를 지원하지 않습니다")
+        self._decode_frame = self.parser.decode
+        # 체결시각(HHMMSS)의 날짜 기준 (JournalReplay가 기록 시각으로 고정한 것으로 바꿔 끼움)
+        self._session_date = _SESSION_DATE
+        self._loads_json = loads_json
+        self._recv_accepts_decode = recv_accepts_decode
+        self._json_backend = JSON_BACKEND
+        self.extended = extended
+        self.store = store
+        self.journal = journal
+        self.metrics: Optional[CandleMetrics] = (
+            CandleMetrics() if metrics or metrics_port is not None else None
+        )
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.backfill_on_add = backfill
+        self.publish_path = publish_path
+        self.publisher = None  # candle_ipc.CandlePublisher (start() 동안)
+        self._decoders: dict[str, FrameDecoder] = {}
+        # candle_backfill.MinuteChartBackfill (첫 백필 때 생성, 교체 가능)
+        self.backfill_client = None
+        self._backfill_pending: set[str] = set()
+        self._backfill_task: Optional[asyncio.Future] = None
+
+        # 종목별 캔들 버퍼 (_slots[슬롯] = (버퍼, 스냅샷 행), 슬롯은 _symbols 기준, 제거되면 None)
         self._buffers: dict[str, StockCandleBuffer] = {}
-        self._subscribed: set[str] = set()
-        self._pending_subscribe: set[str] = set()
-
-        # WebSocket 상태
-        self._ws: Optional[websockets.WebSocketClientProtocol] = None
+        self._symbols = SymbolTable()
+        self._slots: list[Optional[tuple[StockCandleBuffer, Optional[SnapshotRow]]]] = []
+        # 전 종목 단면 스냅샷 (종목별 행은 버퍼의 분봉 리스너)
+        self._cross = CrossSection(snapshot_window)
+
+        # WebSocket 세션 (종목코드 → 담당 세션)
+        self._sessions = [KisSession(i) for i in range(max(1, sessions))]
+        self._session_of: dict[str, KisSession] = {}
+
+        # 멀티 프로세스 집계 (workers > 0)
+        self._pool = None
+        decoders = list(decoders)
+        if workers > 0 and decoders:
+            raise ValueError("workers 모드에서는 decoders를 지원하지 않습니다")
+        if workers > 0:
+            from candle_shm import ShmWorkerPool  # 순환 import 방지
+
+            self._pool = ShmWorkerPool(
+                workers, max_history, prefix=shm_prefix, cleanup_stale=shm_cleanup_stale
+            )
+        self.shm_prefix = None if self._pool is None else self._pool.prefix
         self._approval_key: Optional[str] = None
         self._approval_key_expires: float = 0
+        self._approval_key_future: Optional[asyncio.Future] = None
+        self._http = requests.Session()  # REST 커넥션 풀
         self._running = False
-        self._reconnect_delay = 3
-
-        # 콜백
+        # 끊긴 세션에서 구독 중이던 종목 → 끊긴 시각 (epoch-minute, 재구독 시 버퍼에 기록)
+        self._outage_start: dict[str, int] = {}
+
+        # 종목 구성 변경: 다른 스레드의 요청은 call_soon_threadsafe로 이벤트 루프에 넘기고,
+        # 구독·해제 요청은 _universe_loop가 subscribe_rate로 나눠 보낸다
+        self.subscribe_rate = subscribe_rate or self.SUBSCRIBE_RATE
+        self.inbound_maxsize = inbound_maxsize or self.INBOUND_MAXSIZE
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._universe_changes: deque[UniverseChange] = deque()
+        self._universe_task: Optional[asyncio.Future] = None
+        self._subscribe_limiter = None  # candle_backfill.RateLimiter (첫 변경 때 생성)
+        self._last_universe: Optional[UniverseChange] = None
+
+        # 콜백 (on_* 이벤트 콜백 → start() 동안의 디스패처 구독자)
+        self._dispatcher = CallbackDispatcher()
+        self._callbacks: dict[str, Optional[Callable]] = {}
+        self._callback_subs: dict[str, Subscriber] = {}
+        self._callbacks_dispatched = False
         self.on_candle_closed: Optional[Callable[[CandleBar], None]] = None
+        self.on_candles_closed: Optional[Callable[[list[CandleBar]], None]] = None
+        self.on_timeframe_closed: Optional[Callable[[str, CandleBar], None]] = None
         self.on_tick: Optional[Callable[[str, float, int, datetime], None]] = None
         self.on_connected: Optional[Callable[[], None]] = None
         self.on_disconnected: Optional[Callable[[], None]] = None
@@ -244,313 +2281,1377 @@ class RealtimeCandleManager:
         # 통계
         self._tick_count = 0
         self._candle_count = 0
-        self._last_tick_time: Optional[datetime] = None
+        self._last_tick_second: Optional[int] = None  # epoch-second
 
-    # ──────── Approval Key ────────
-    def _get_approval_key(self) -> str:
-        """KIS WebSocket 접속용 Approval Key 발급 (REST)"""
-        if self._approval_key and time.time() < self._approval_key_expires:
-            return self._approval_key
+        # H0STCNT0 외 실시간 TR 디코더
+        for decoder in decoders:
+            self.register_decoder(decoder)
 
+    # ──────── Approval Key ────────
+    def _request_approval_key(self) -> str:
+        """KIS WebSocket 접속용 Approval Key 발급 (REST, 블로킹 — executor에서 실행)"""
         url = f"{self.rest_url}/oauth2/Approval"
         body = {
             "grant_type": "client_credentials",
             "appkey": self.app_key,
             "secretkey": self.app_secret,
         }
-        resp = requests.post(url, json=body, timeout=10)
+        resp = self._http.post(url, json=body, timeout=10)
         resp.raise_for_status()
         data = resp.json()
 
         if "approval_key" not in data:
             raise RuntimeError(f"Approval key 발급 실패: {data}")
+        return data["approval_key"]
+
+    async def _get_approval_key(self, force: bool = False) -> str:
+        """
+        Approval Key 반환 (캐시 유효 시 즉시 반환).
+        발급 요청은 executor에서 실행되어 이벤트 루프를 막지 않으며,
+        동시에 여러 곳에서 호출해도 진행 중인 요청 하나를 공유한다.
+        """
+        if not force and self._approval_key and time.time() < self._approval_key_expires:
+            return self._approval_key
+
+        if self._approval_key_future is None:
+            self._approval_key_future = asyncio.ensure_future(self._fetch_approval_key())
+        # 호출 측이 취소되어도 공유 중인 발급 요청은 계속 진행
+        return await asyncio.shield(self._approval_key_future)
 
-        self._approval_key = data["approval_key"]
-        self._approval_key_expires = time.time() + 23 * 3600  # ~23시간
-        logger.info("KIS WebSocket Approval Key 발급 완료")
-        return self._approval_key
+    async def _fetch_approval_key(self) -> str:
+        try:
+            loop = asyncio.get_running_loop()
+            key = await loop.run_in_executor(None, self._request_approval_key)
+            self._approval_key = key
+            self._approval_key_expires = time.time() + self.APPROVAL_KEY_TTL
+            logger.info("KIS WebSocket Approval Key 발급 완료")
+            return key
+        finally:
+            self._approval_key_future = None
+
+    async def _approval_key_refresh_loop(self) -> None:
+        """만료 APPROVAL_KEY_REFRESH_MARGIN초 전에 백그라운드에서 키 갱신"""
+        while self._running:
+            delay = self._approval_key_expires - self.APPROVAL_KEY_REFRESH_MARGIN - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self._get_approval_key(force=True)
+            except Exception as e:
+                logger.error(f"Approval Key 갱신 실패: {e}")
+                await asyncio.sleep(self.APPROVAL_KEY_RETRY_DELAY)
 
     # ──────── 종목 관리 ────────
-    def add_stock(self, stock_code: str) -> None:
-        """종목 추가 (연결 전/후 모두 가능)"""
+    def add_stock(
+        self, stock_code: str, timeframes: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        종목 추가 (연결 전/후, 어느 스레드에서나 가능. 연결 중이면 바로 구독 요청).
+        timeframes: 이 종목에 유지할 상위 타임프레임 (None이면 매니저 기본값)
+        실행 중 다른 스레드에서 호출하면 이벤트 루프에서 적용되므로 직후의
+        get_buffer()는 None일 수 있다 (완료를 기다리려면 update_universe)
+        """
+        if self._pool is not None and timeframes:
+            raise ValueError("workers 모드에서는 timeframes를 지원하지 않습니다")
+        self._request_universe(UniverseChange(add=(stock_code,), timeframes=timeframes))
+
+    def remove_stock(self, stock_code: str, persist: bool = True) -> None:
+        """
+        종목 제거: 구독 해제 요청 후 버퍼·스냅샷 행·디코더 상태를 해제한다.
+        persist=True이고 store가 있으면 미완성 캔들을 마감해 일반 마감과 같이 저장·
+        on_candle_closed·구독자에 전달한 뒤 파일을 닫는다 (fsync·close는 executor에서).
+        같은 분 안에 다시 추가하면 그 분의 나머지 체결은 지연 틱으로 버려진다
+        """
+        self._request_universe(UniverseChange(remove=(stock_code,), persist=persist))
+
+    def set_universe(
+        self, stock_codes: Iterable[str], persist: bool = True
+    ) -> UniverseChange:
+        """
+        관심 종목 전체를 stock_codes로 교체 (없던 종목 추가, 빠진 종목 제거).
+        어느 스레드에서나 호출할 수 있으며, 반환된 UniverseChange로 완료·소요 시간을 확인한다
+        """
+        return self._request_universe(UniverseChange(replace=stock_codes, persist=persist))
+
+    def update_universe(
+        self,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+        persist: bool = True,
+    ) -> UniverseChange:
+        """종목 여러 개를 한 번에 추가·제거 (제거 먼저, set_universe 참고)"""
+        return self._request_universe(UniverseChange(add=add, remove=remove, persist=persist))
+
+    def _request_universe(self, change: UniverseChange) -> UniverseChange:
+        """
+        변경 요청 전달: 시작 전이면 바로 적용(구독은 연결 시), 이벤트 루프에서는
+        바로 반영 후 구독·해제를 대기열에, 다른 스레드에서는 루프로 넘긴다
+        """
+        loop = self._loop
+        if loop is None or not self._running:
+            try:
+                self._apply_universe(change)
+            finally:
+                change._finish()
+            if change.error is not None:
+                raise change.error
+            return change
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._submit_universe(change)
+            if change.error is not None:
+                raise change.error
+        else:
+            loop.call_soon_threadsafe(self._submit_universe, change)
+        return change
+
+    def _submit_universe(self, change: UniverseChange) -> None:
+        """(이벤트 루프) 버퍼·세션 배정 반영 후 구독·해제 전송을 _universe_loop에 맡김"""
+        if self._loop is not None:
+            change._waiter = self._loop.create_future()
+        self._apply_universe(change)
+        if (
+            change.error is not None
+            or not (change._subscribe or change._unsubscribe)
+            or not self._running
+        ):
+            self._finish_universe(change)
+            return
+        self._universe_changes.append(change)
+        if self._universe_task is None or self._universe_task.done():
+            self._universe_task = asyncio.ensure_future(self._universe_loop())
+
+    def _apply_universe(self, change: UniverseChange) -> None:
+        """
+        종목 제거·추가를 버퍼와 세션 배정에 반영하고, 보낼 구독·해제 요청을
+        change에 세션별로 모은다 (제거 먼저 — 세션 한도를 비운 뒤 배정)
+        """
+        try:
+            if change.replace is not None:
+                target = dict.fromkeys(change.replace)
+                remove = [code for code in self._buffers if code not in target]
+                add = [code for code in target if code not in self._buffers]
+            else:
+                remove = [code for code in dict.fromkeys(change.remove) if code in self._buffers]
+                add = list(dict.fromkeys(change.add))
+            if change.persist:
+                self._close_removed(remove)
+            try:
+                for code in remove:
+                    session = self._remove_stock(code)
+                    if session is not None:
+                        change._unsubscribe[session].append(code)
+                    change.removed.append(code)
+            finally:
+                self._release_store(change.removed)
+            for code in add:
+                if code in self._buffers and code in self._session_of:
+                    continue
+                session = self._add_stock(code, change.timeframes)
+                if session.ws is not None:
+                    change._subscribe[session].append(code)
+                change.added.append(code)
+        except Exception as e:
+            change.error = e
+            logger.error(f"종목 구성 변경 실패: {e}")
+
+    def _add_stock(
+        self, stock_code: str, timeframes: Optional[Iterable[str]] = None
+    ) -> KisSession:
+        """종목 버퍼 생성과 세션 배정 (이벤트 루프 또는 시작 전). 반환값: 배정된 세션"""
         if stock_code not in self._buffers:
-            self._buffers[stock_code] = StockCandleBuffer(
-                stock_code, self.max_history
+            slot = self._symbols.intern(stock_code)
+            stock_code = self._symbols.codes[slot]
+            if self._pool is not None:
+                if timeframes:
+                    raise ValueError("workers 모드에서는 timeframes를 지원하지 않습니다")
+                buf, row = self._pool.add_stock(stock_code), None
+            else:
+                buf = StockCandleBuffer(
+                    stock_code,
+                    self.max_history,
+                    self.timeframes if timeframes is None else timeframes,
+                    self.extended,
+                    self.history_tiers,
+                )
+                if self.store is not None:
+                    self._restore(buf)
+                row = self._cross.add(stock_code)
+                buf.add_bar_listener(row)
+                for decoder in self._decoders.values():
+                    decoder.add_stock(stock_code)
+                if self.backfill_on_add:
+                    self._queue_backfill((stock_code,))
+            self._buffers[stock_code] = buf
+            if slot == len(self._slots):
+                self._slots.append((buf, row))
+            else:  # 제거됐다가 다시 추가된 종목은 같은 슬롯
+                self._slots[slot] = (buf, row)
+        session = self._session_of.get(stock_code)
+        if session is not None:
+            return session
+        session = self._pick_session()
+        if len(session.assigned) >= self._session_capacity:
+            logger.warning(
+                f"세션 구독 한도 초과: {stock_code} → 세션 #{session.index} "
+                f"({len(session.assigned) + 1}/{self._session_capacity})"
             )
-        if self._ws and stock_code not in self._subscribed:
-            self._pending_subscribe.add(stock_code)
-        elif not self._ws:
-            self._pending_subscribe.add(stock_code)
+        session.assigned.add(stock_code)
+        self._session_of[stock_code] = session
+        return session
+
+    def _restore(self, buf: StockCandleBuffer) -> None:
+        """저장소의 당일 분봉으로 history 채우기 (재시작 직후 get_candles 복원)"""
+        stored = self.store.open(buf.stock_code)
+        if stored is None:
+            return
+        with stored:
+            restored = buf.restore(stored.columns())
+        if restored:
+            logger.info(f"[{buf.stock_code}] 저장소에서 분봉 {restored}개 복원")
 
-    def remove_stock(self, stock_code: str) -> None:
-        """종목 제거"""
-        self._pending_subscribe.discard(stock_code)
-        if stock_code in self._subscribed and self._ws:
-            asyncio.ensure_future(self._unsubscribe(stock_code))
-        self._subscribed.discard(stock_code)
+    def _close_removed(self, stock_codes: list[str]) -> None:
+        """
+        제거할 종목의 미완성 캔들을 마감해 저장소 기록·콜백·구독자 전달까지
+        일반 마감과 같은 경로로 내보낸다 (store가 있을 때만, workers 모드 제외)
+        """
+        if self.store is None or self._pool is not None:
+            return
+        closed_candles: list[CandleBar] = []
+        timeframe_closed: list[tuple[str, CandleBar]] = []
+        for code in stock_codes:
+            buf = self._buffers.get(code)
+            cur = None if buf is None else buf.current
+            if cur is None or cur.trade_count == 0:
+                continue
+            closed_candle = buf.close_before(to_epoch_minute(cur.dt) + 1)
+            if closed_candle is not None:
+                closed_candles.append(closed_candle)
+            if buf.timeframes:
+                timeframe_closed.extend(buf.drain_timeframe_closed())
+        if closed_candles:
+            self._emit_closed(closed_candles)
+        if timeframe_closed:
+            self._emit_timeframe_closed(timeframe_closed)
+
+    def _remove_stock(self, stock_code: str) -> Optional[KisSession]:
+        """
+        세션 배정 해제 후 버퍼 해제 (이벤트 루프 또는 시작 전).
+        반환값: 구독 해제 요청을 보내야 하는 세션 (구독 중이 아니면 None)
+        """
+        self._backfill_pending.discard(stock_code)
+        self._outage_start.pop(stock_code, None)
+        session = self._session_of.pop(stock_code, None)
+        if session is not None:
+            session.assigned.discard(stock_code)
+            if stock_code not in session.subscribed or session.ws is None:
+                session.subscribed.discard(stock_code)
+                session = None
+        self._release_buffer(stock_code)
+        return session
+
+    def _release_buffer(self, stock_code: str) -> None:
+        """종목 버퍼·슬롯·스냅샷 행·디코더 상태 해제 (저장소 파일은 _release_store)"""
+        buf = self._buffers.pop(stock_code, None)
+        if buf is None:
+            return
+        self._slots[self._symbols.ids[stock_code]] = None
+        if self._pool is not None:
+            self._pool.remove_stock(stock_code)
+            return
+        buf.remove_bar_listener(self._cross.rows[stock_code])
+        self._cross.remove(stock_code)
+        for decoder in self._decoders.values():
+            decoder.remove_stock(stock_code)
+
+    def _release_store(self, stock_codes: list[str]) -> None:
+        """제거한 종목의 저장소 파일 fsync 후 닫기 (이벤트 루프에서는 executor에서 한 번에)"""
+        if self.store is None or not stock_codes:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # 시작 전 (다른 스레드의 요청은 루프로 넘어온 뒤 실행)
+            self.store.release_many(stock_codes)
+            return
+        loop.run_in_executor(
+            None, self.store.release_many, list(stock_codes)
+        ).add_done_callback(_log_release_error)
+
+    async def _universe_loop(self) -> None:
+        """대기 중인 종목 구성 변경의 구독·해제 요청을 subscribe_rate로 나눠 전송"""
+        if self._subscribe_limiter is None:
+            from candle_backfill import RateLimiter  # 순환 import 방지
+
+            self._subscribe_limiter = RateLimiter(self.subscribe_rate)
+        while self._universe_changes and self._running:
+            change = self._universe_changes[0]
+            try:
+                await self._send_universe(change)
+            except Exception as e:
+                change.error = e
+                logger.error(f"종목 구성 변경 전송 실패: {e}")
+            self._universe_changes.popleft()
+            self._finish_universe(change)
+        # 종료로 남은 변경은 완료 처리 (끊긴 세션의 종목은 재연결 시 구독)
+        while self._universe_changes:
+            self._finish_universe(self._universe_changes.popleft())
+
+    async def _send_universe(self, change: UniverseChange) -> None:
+        """해제 먼저, 그다음 구독 (세션마다, 한 세션이 끊겨도 나머지 세션은 계속)"""
+        for session, codes in change._unsubscribe.items():
+            change.unsubscribed += await self._send_paced(session, "2", codes)
+        for session, codes in change._subscribe.items():
+            change.subscribed += await self._send_paced(session, "1", codes)
+
+    async def _send_paced(self, session: KisSession, tr_type: str, codes: list[str]) -> int:
+        """
+        한 세션에 종목별 구독("1")·해제("2") 요청을 subscribe_rate 간격으로 전송.
+        응답은 기다리지 않으며, 보내기 직전에 다시 확인해 그사이 다른 변경·재연결·
+        재배치로 이미 처리된 종목은 건너뛴다. 반환값: 요청을 보낸 종목 수
+        """
+        subscribe = tr_type == "1"
+
+        def stale(code: str) -> bool:
+            if session.ws is None or (code in session.subscribed) == subscribe:
+                return True
+            # 구독: 그사이 제거·재배치됨 / 해제: 같은 세션에 다시 추가됨
+            return (self._session_of.get(code) is session) != subscribe
+
+        limiter = self._subscribe_limiter
+        key = await self._get_approval_key()
+        tr_ids = self._tr_ids
+        sent = 0
+        try:
+            for code in codes:
+                if stale(code):
+                    continue
+                for _ in tr_ids:
+                    await limiter.acquire()
+                if stale(code):
+                    continue
+                if subscribe:
+                    session.subscribed.add(code)
+                else:
+                    session.subscribed.discard(code)
+                ws = session.ws
+                for tr_id in tr_ids:
+                    await ws.send(self._subscription_message(key, tr_type, code, tr_id))
+                sent += 1
+        except websockets.ConnectionClosed:
+            pass  # 남은 종목은 assigned에 있으므로 재연결 시 구독
+        return sent
+
+    def _finish_universe(self, change: UniverseChange) -> None:
+        change._finish()
+        self._last_universe = change
+        if change.added or change.removed:
+            logger.info(
+                f"종목 구성 변경: +{len(change.added)} / -{len(change.removed)} "
+                f"(구독 {change.subscribed}건 · 해제 {change.unsubscribed}건, "
+                f"{change.elapsed_s:.2f}s, 현재 {len(self._buffers)}개)"
+            )
+
+    def _pick_session(self, exclude: Optional[KisSession] = None) -> KisSession:
+        """
+        종목을 배정할 세션 선택.
+        여유가 있는 세션 > 연결된 세션 > 배정 종목이 적은 세션 순으로 고른다.
+        """
+        candidates = [s for s in self._sessions if s is not exclude] or self._sessions
+        return min(
+            candidates,
+            key=lambda s: (
+                len(s.assigned) >= self._session_capacity,
+                s.ws is None,
+                len(s.assigned),
+                s.index,
+            ),
+        )
+
+    def _rebalance(self, dropped: KisSession) -> None:
+        """끊긴 세션의 종목을 여유 있는 연결 세션으로 옮겨 즉시 구독"""
+        moved: dict[KisSession, list[str]] = defaultdict(list)
+        for code in sorted(dropped.assigned):
+            target = self._pick_session(exclude=dropped)
+            if (
+                target is dropped
+                or target.ws is None
+                or len(target.assigned) >= self._session_capacity
+            ):
+                break
+            dropped.assigned.discard(code)
+            target.assigned.add(code)
+            self._session_of[code] = target
+            moved[target].append(code)
+        for target, codes in moved.items():
+            asyncio.ensure_future(self._subscribe_many(codes, target))
+        if moved:
+            logger.info(
+                f"세션 #{dropped.index} 끊김 → {sum(map(len, moved.values()))}개 종목 재배치 "
+                f"(잔여 {len(dropped.assigned)}개는 재연결 시 구독)"
+            )
+
+    # ──────── 백필 ────────
+    async def backfill(
+        self,
+        stock_codes: Optional[Iterable[str]] = None,
+        until: Optional[datetime] = None,
+    ) -> dict[str, int]:
+        """
+        KIS REST로 당일 완성 1분봉을 받아 종목 버퍼에 병합 (기본: 모든 종목).
+        until(기본 현재 시각)이 속한 분과 실시간 현재 캔들의 분부터는 병합하지 않는다.
+        store가 있으면 병합 구간으로 당일 파일을 다시 쓴다 (이미 저장된 실시간 분봉보다
+        앞선 분봉도 남도록 CandleStore.rewrite_many로 병합, 종목마다 executor에서 실행).
+        반환값: 종목코드 → 새로 채운 분봉 수
+        """
+        if self._pool is not None:
+            raise ValueError("workers 모드에서는 backfill을 지원하지 않습니다")
+        if stock_codes is None:
+            stock_codes = list(self._buffers)
+        codes = [code for code in stock_codes if code in self._buffers]
+        if not codes:
+            return {}
+        if self.backfill_client is None:
+            from candle_backfill import MinuteChartBackfill  # 순환 import 방지
+
+            self.backfill_client = MinuteChartBackfill(
+                self.app_key, self.app_secret, self.rest_url
+            )
+        until = until or datetime.now()
+        t0 = time.perf_counter()
+        fetched = await self.backfill_client.fetch_many(codes, until)
+        before = to_epoch_minute(until)
+        filled: dict[str, int] = {}
+        loop = asyncio.get_running_loop()
+        persisting: dict[str, asyncio.Future] = {}
+        for code, columns in fetched.items():
+            buf = self._buffers.get(code)
+            if buf is None:  # 받는 동안 제거됨
+                continue
+            row = self._cross.rows[code]
+            second = self._cross.second[row.index]
+            filled[code] = added = buf.backfill(columns, before)
+            cur = buf.current
+            if added and cur is not None:  # 스냅샷 행이 초기화·재전달됨 → 현재 분봉 다시 반영
+                self._cross.tick(
+                    row, cur.open, cur.high, cur.low, cur.close,
+                    cur.volume, cur.trade_count, second,
+                )
+            if added and self.store is not None:
+                # 병합 구간 [받은 첫 분, before)만 다시 쓴다 (파일 읽기·fsync는 executor에서)
+                view = buf.get_history()
+                minutes = view.columns["minute"]
+                merged = view[
+                    bisect.bisect_left(minutes, columns["minute"][0]):
+                    bisect.bisect_left(minutes, before)
+                ]
+                persisting[code] = loop.run_in_executor(None, self.store.rewrite_many, merged)
+        for code, result in zip(
+            persisting, await asyncio.gather(*persisting.values(), return_exceptions=True)
+        ):
+            if isinstance(result, (OSError, ValueError)):
+                logger.error(f"[{code}] 백필 분봉 저장 실패: {result}")
+            elif isinstance(result, BaseException):
+                raise result
+        logger.info(
+            f"분봉 백필: {len(filled)}/{len(codes)}개 종목, "
+            f"{sum(filled.values())}개 분봉 ({time.perf_counter() - t0:.2f}s)"
+        )
+        return filled
+
+    def _queue_backfill(self, stock_codes: Iterable[str]) -> None:
+        """종목을 백필 대기열에 추가 (실행 중이면 바로 백필 태스크 시작)"""
+        self._backfill_pending.update(stock_codes)
+        if self._running:
+            self._schedule_backfill()
+
+    def _schedule_backfill(self) -> None:
+        """대기 중인 종목 백필 태스크 시작 (이미 돌고 있으면 그 태스크가 이어서 처리)"""
+        if self._backfill_task is None or self._backfill_task.done():
+            self._backfill_task = asyncio.ensure_future(self._backfill_pending_loop())
+
+    async def _backfill_pending_loop(self) -> None:
+        """add_stock으로 쌓인 종목을 모아서 백필 (도중에 추가된 종목은 다음 묶음)"""
+        while self._backfill_pending and self._running:
+            codes = sorted(self._backfill_pending)
+            self._backfill_pending.clear()
+            try:
+                await self.backfill(codes)
+            except Exception as e:
+                logger.error(f"분봉 백필 오류: {e}")
 
     def get_buffer(self, stock_code: str) -> Optional[StockCandleBuffer]:
         """종목의 캔들 버퍼 반환"""
         return self._buffers.get(stock_code)
 
     def get_candles(
-        self, stock_code: str, n: Optional[int] = None, include_current: bool = True
-    ) -> list[CandleBar]:
+        self,
+        stock_code: str,
+        n: Optional[int] = None,
+        include_current: bool = True,
+        timeframe: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Sequence[CandleBar]:
         """
-        종목의 분봉 리스트 반환.
+        종목의 분봉 목록 반환 (CandleView, 빈 경우 []).
 
         Parameters
         ----------
         stock_code : 종목코드
         n : 최근 n개만 (None이면 전체)
         include_current : 현재(미완성) 캔들 포함 여부
+        timeframe : 상위 타임프레임 (예: "5m"). None이면 1분봉
+        start, end : [start, end) 시각 구간 조회 (이진 탐색). history_tiers를 쓰면
+            1분봉 보관 범위 이전은 압축된 상위 타임프레임 봉으로 이어진다.
+            지정하면 n은 구간 결과의 최근 n개에 적용된다
         """
         buf = self._buffers.get(stock_code)
         if buf is None:
             return []
+        if timeframe == "1m":
+            timeframe = None
+        if timeframe is not None and timeframe not in getattr(buf, "timeframes", {}):
+            return []
+        if start is not None or end is not None:
+            if self._pool is not None:
+                raise ValueError("workers 모드에서는 start/end 구간 조회를 지원하지 않습니다")
+            view = buf.get_range(
+                None if start is None else to_epoch_minute(start),
+                None if end is None else to_epoch_minute(end),
+                include_current,
+                timeframe,
+            )
+            return view if n is None else view[max(0, len(view) - n):]
+        if timeframe is not None:
+            return buf.get_timeframe_candles(timeframe, n, include_current)
         if include_current:
             return buf.get_all_candles(n)
         return buf.get_history(n)
 
-    # ──────── WebSocket 구독/해제 ────────
-    async def _subscribe(self, stock_code: str) -> None:
-        """H0STCNT0 (실시간 체결) 구독"""
-        if not self._ws:
-            return
-        key = self._get_approval_key()
-        msg = json.dumps({
-            "header": {
-                "approval_key": key,
-                "custtype": "P",
-                "tr_type": "1",
-                "content-type": "utf-8",
-            },
-            "body": {
-                "input": {
-                    "tr_id": "H0STCNT0",
-                    "tr_key": stock_code,
-                }
-            },
-        })
-        await self._ws.send(msg)
-        self._subscribed.add(stock_code)
-        logger.info(f"구독 요청: {stock_code} (H0STCNT0)")
+    def market_snapshot(self) -> MarketSnapshot:
+        """
+        전 종목 단면 스냅샷 (컬럼 배열 복사본, 종목 순서는 snapshot.codes).
+        최근 체결가, 현재 분봉 OHLCV, 당일 시가 대비 등락률, N분 수익률·거래량을
+        틱마다 증분으로 갱신해 두므로 종목 수와 무관하게 배열 복사 비용만 든다
+        (candle_snapshot 참고, workers 모드 미지원)
+        """
+        if self._pool is not None:
+            raise ValueError("workers 모드에서는 market_snapshot을 지원하지 않습니다")
+        return self._cross.snapshot()
+
+    def get_stored_candles(
+        self,
+        stock_code: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        day=None,
+    ) -> Sequence[CandleBar]:
+        """
+        저장소에서 [start, end) 구간 완성 분봉 조회 (max_history를 넘는 과거 포함).
+        day: 거래일 (None이면 start의 날짜, start도 없으면 오늘)
+        """
+        if self.store is None:
+            return []
+        if day is None and start is not None:
+            day = start.date()
+        return self.store.read(stock_code, day, start, end)
+
+    # ──────── 콜백 구독 ────────
+    def subscribe(
+        self,
+        event: str,
+        callback: Callable,
+        policy: str = "drop_oldest",
+        maxsize: int = 1024,
+        key: Optional[Callable[[tuple], Any]] = None,
+    ) -> Subscriber:
+        """
+        이벤트 구독자 등록 (동기/async 콜백 모두 가능).
+
+        Parameters
+        ----------
+        event : "tick" | "candle_closed" | "candles_closed" | "timeframe_closed"
+        callback : 이벤트 인자를 받는 함수 (DISPATCH_EVENTS 참고)
+        policy : "drop_oldest" | "coalesce" | "block" (Subscriber 참고)
+        maxsize : 구독자 대기열 최대 길이
+        key : coalesce 키 함수 (기본: 종목코드)
+        """
+        return self._dispatcher.subscribe(
+            Subscriber(event, callback, policy=policy, maxsize=maxsize, key=key)
+        )
 
-    async def _unsubscribe(self, stock_code: str) -> None:
-        """구독 해제"""
-        if not self._ws:
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """subscribe()로 등록한 구독자 해제"""
+        self._dispatcher.unsubscribe(subscriber)
+
+    def _bind_callback(self, name: str, event: str) -> None:
+        """on_* 이벤트 콜백을 디스패처 구독자로 (다시) 등록 (start() 동안만, 아니면 해제만)"""
+        old = self._callback_subs.pop(name, None)
+        if old is not None:
+            self._dispatcher.unsubscribe(old)
+        callback = self._callbacks.get(name)
+        if callback is not None and self._callbacks_dispatched:
+            self._callback_subs[name] = self._dispatcher.subscribe(
+                Subscriber(event, callback, policy="block", maxsize=self.CALLBACK_MAXSIZE)
+            )
+
+    def _dispatch_callbacks(self, enabled: bool) -> None:
+        """on_* 이벤트 콜백을 디스패처로 보낼지 (start() 시작·종료 시)"""
+        self._callbacks_dispatched = enabled
+        for name, event in (
+            ("on_tick", "tick"),
+            ("on_candle_closed", "candle_closed"),
+            ("on_candles_closed", "candles_closed"),
+            ("on_timeframe_closed", "timeframe_closed"),
+        ):
+            self._bind_callback(name, event)
+
+    async def _call_connection_callback(self, name: str) -> None:
+        """on_connected / on_disconnected를 스레드 풀에서 실행하고 끝날 때까지 대기"""
+        callback = getattr(self, name)
+        if callback is None:
             return
-        key = self._get_approval_key()
-        msg = json.dumps({
+        try:
+            await self._dispatcher.call(callback, name)
+        except RuntimeError:  # 디스패처 스레드 풀이 이미 종료됨
+            pass
+
+    # ──────── TR 디코더 ────────
+    def register_decoder(self, decoder: FrameDecoder) -> FrameDecoder:
+        """
+        H0STCNT0 외 실시간 TR 디코더 등록 (start() 전에).
+        이미 추가한 종목도 디코더에 추가되고, 연결 시 종목마다 이 TR을 함께 구독한다.
+        """
+        if self._running:
+            raise ValueError("디코더는 start() 전에 등록해야 합니다")
+        if self._pool is not None:
+            raise ValueError("workers 모드에서는 decoders를 지원하지 않습니다")
+        if decoder.tr_id == "H0STCNT0" or decoder.tr_id in self._decoders:
+            raise ValueError(f"이미 등록된 TR입니다: {decoder.tr_id}")
+        for stock_code in self._buffers:
+            decoder.add_stock(stock_code)
+        self._decoders[decoder.tr_id] = decoder
+        return decoder
+
+    def get_decoder(self, tr_id: str) -> Optional[FrameDecoder]:
+        return self._decoders.get(tr_id)
+
+    @property
+    def _tr_ids(self) -> tuple[str, ...]:
+        """종목마다 구독하는 TR (H0STCNT0 + 등록 디코더)"""
+        return ("H0STCNT0", *self._decoders)
+
+    @property
+    def _session_capacity(self) -> int:
+        """세션당 종목 수 한도 (실시간 등록 한도 ÷ 종목당 TR 수)"""
+        return max(1, self.max_per_session // (1 + len(self._decoders)))
+
+    # ──────── WebSocket 구독/해제 ────────
+    @staticmethod
+    def _subscription_message(
+        key: str, tr_type: str, stock_code: str, tr_id: str = "H0STCNT0"
+    ) -> str:
+        """실시간 TR 구독(tr_type "1")·해제("2") 요청 메시지"""
+        return json.dumps({
             "header": {
                 "approval_key": key,
                 "custtype": "P",
-                "tr_type": "2",
+                "tr_type": tr_type,
                 "content-type": "utf-8",
             },
             "body": {
                 "input": {
-                    "tr_id": "H0STCNT0",
+                    "tr_id": tr_id,
                     "tr_key": stock_code,
                 }
             },
         })
-        await self._ws.send(msg)
-        self._subscribed.discard(stock_code)
-        logger.info(f"구독 해제: {stock_code}")
 
-    # ──────── 틱 데이터 파싱 ────────
-    def _parse_tick(self, raw: str) -> None:
-        """
-        KIS 실시간 체결 데이터 파싱.
-        형식: 0|H0STCNT0|001|field0^field1^field2^...
-
-        H0STCNT0 필드 순서 (^-구분):
-          [0]  MKSC_SHRN_ISCD   종목코드
-          [1]  STCK_CNTG_HOUR   체결시간 (HHMMSS)
-          [2]  STCK_PRPR        현재가 (체결가)
-          [3]  PRDY_VRSS_SIGN   전일대비부호
-          [4]  PRDY_VRSS        전일대비
-          [5]  PRDY_CTRT        전일대비율
-          [6]  WGHN_AVRG_STCK_PRC  가중평균가
-          [7]  STCK_OPRC        시가
-          [8]  STCK_HGPR        고가
-          [9]  STCK_LWPR        저가
-          [10] ASKP1            매도호가1
-          [11] BIDP1            매수호가1
-          [12] CNTG_VOL         체결거래량 (이번 틱)
-          [13] ACML_VOL         누적거래량
-          [14] ACML_TR_PBMN     누적거래대금
-          [15] SELN_CNTG_CSNU   매도체결건수
-          [16] SHNU_CNTG_CSNU   매수체결건수
-          [17] NTBY_CNTG_CSNU   순매수체결건수
-          [18] CTTR             체결강도
-          [19] SELN_CNTG_SMTN   총매도수량
-          [20] SHNU_CNTG_SMTN   총매수수량
-          [21] CCLD_DVSN        체결구분 (1:매수, 5:매도)
-          ...
-        """
-        parts = raw.split("|")
-        if len(parts) < 4:
-            return
+    async def _subscribe(
+        self, stock_code: str, session: Optional[KisSession] = None
+    ) -> None:
+        """H0STCNT0 (실시간 체결) + 등록 디코더 TR 구독"""
+        session = session or self._session_of.get(stock_code)
+        await self._subscribe_many((stock_code,), session)
 
-        encrypted = parts[0]
-        tr_id = parts[1]
-
-        if encrypted == "1":
-            # 암호화 데이터 (체결 통보 등) — 시세가 아니므로 무시
+    async def _subscribe_many(
+        self, stock_codes: Iterable[str], session: Optional[KisSession]
+    ) -> int:
+        """
+        여러 종목 구독 요청을 응답을 기다리지 않고 연달아 전송 (재연결·재배치 시 전 종목).
+        끊김으로 빠졌던 종목은 수신 중단 구간을 버퍼에 기록한다.
+        반환값: 요청을 보낸 종목 수
+        """
+        if session is None or not session.ws:
+            return 0
+        key = await self._get_approval_key()
+        ws = session.ws
+        if ws is None:  # 키 발급을 기다리는 동안 끊김
+            return 0
+        codes = [code for code in stock_codes if code not in session.subscribed]
+        tr_ids = self._tr_ids
+        for code in codes:
+            for tr_id in tr_ids:
+                await ws.send(self._subscription_message(key, "1", code, tr_id))
+            session.subscribed.add(code)
+        trs = "+".join(tr_ids)
+        if len(codes) == 1:
+            logger.info(f"구독 요청: {codes[0]} ({trs}, 세션 #{session.index})")
+        elif codes:
+            logger.info(f"구독 요청: {len(codes)}개 종목 일괄 전송 ({trs}, 세션 #{session.index})")
+        if self._outage_start:
+            self._end_outage(codes)
+        return len(codes)
+
+    # ──────── 수신 중단 구간 ────────
+    def _begin_outage(self, session: KisSession) -> None:
+        """세션 끊김: 구독 중이던 종목의 수신 중단 시작 시각 기록"""
+        if self._pool is not None:
             return
+        minute = to_epoch_minute(datetime.now())
+        for code in session.subscribed:
+            self._outage_start.setdefault(code, minute)
 
-        if tr_id != "H0STCNT0":
-            return
+    def _end_outage(self, stock_codes: Iterable[str]) -> None:
+        """
+        재구독: 수신 중단 구간(끊긴 분 ~ 재구독한 분)을 버퍼에 기록하고,
+        백필을 쓰는 경우 재구독한 분이 마감된 뒤 REST 분봉으로 그 구간을 복구한다.
+        """
+        end = to_epoch_minute(datetime.now())
+        marked = []
+        for code in stock_codes:
+            start = self._outage_start.pop(code, None)
+            buf = self._buffers.get(code)
+            if start is None or buf is None:
+                continue
+            buf.mark_outage(start, end)
+            marked.append(code)
+        if marked and (self.backfill_on_add or self.backfill_client is not None):
+            delay = 60 - datetime.now().second + self.close_grace + 1
+            asyncio.get_running_loop().call_later(delay, self._queue_backfill, marked)
 
-        fields = parts[3].split("^")
-        if len(fields) < 14:
+    # ──────── 틱 데이터 파싱 ────────
+    def _parse_tick(self, raw: str, recv_ns: int = 0) -> None:
+        """
+        KIS 실시간 체결 프레임 파싱 후 버퍼 반영 (형식은 decode_tick_frame 참고).
+        raw: 수신 프레임 (bytes 파서면 bytes, str도 가능)
+        recv_ns: 수신 시각 (time.time_ns(), 계측용 — 0이면 모름)
+        등록 디코더의 TR 프레임은 해당 디코더로 넘긴다.
+        """
+        if self._pool is not None:
+            self._pool.submit(raw)
             return
-
-        try:
-            stock_code = fields[0]
-            trade_time_str = fields[1]  # HHMMSS
-            price = abs(float(fields[2]))
-            cntg_vol = abs(int(fields[12]))  # 체결 거래량 (이번 틱)
-
-            # 체결 시각 → datetime (오늘 날짜 + HHMMSS)
-            today = datetime.now().date()
-            h, m, s = int(trade_time_str[:2]), int(trade_time_str[2:4]), int(trade_time_str[4:6])
-            trade_dt = datetime(today.year, today.month, today.day, h, m, s)
-
-        except (ValueError, IndexError) as e:
-            logger.warning(f"틱 파싱 오류: {e} | raw={raw[:100]}")
+        if self._decoders:
+            decoder = self._decoders.get(self.parser.tr_id(raw))
+            if decoder is not None:
+                raw = self.parser.text(raw)
+                if self.metrics is None:
+                    decoder.decode(raw, recv_ns)
+                else:
+                    t0 = time.perf_counter_ns()
+                    decoder.decode(raw, recv_ns)
+                    self.metrics.observe(f"decode.{decoder.tr_id}", time.perf_counter_ns() - t0)
+                return
+        metrics = self.metrics
+        if metrics is None:
+            ticks = self._decode_frame(raw, self._session_date, self.extended, self._symbols)
+            if ticks:
+                self._apply_ticks(ticks)
             return
 
-        # 버퍼에 반영
-        buf = self._buffers.get(stock_code)
-        if buf is None:
+        t0 = time.perf_counter_ns()
+        if recv_ns:
+            metrics.observe("queue", time.time_ns() - recv_ns)
+        ticks = self._decode_frame(raw, self._session_date, self.extended, self._symbols)
+        metrics.observe("decode", time.perf_counter_ns() - t0)
+        metrics.observe_frame(raw, len(ticks))
+        if ticks:
+            if recv_ns:
+                metrics.observe_lag(ticks, recv_ns)
+            self._apply_ticks(ticks)
+
+    def _apply_ticks(self, ticks: list[tuple]) -> None:
+        """
+        디코딩된 체결 배치(체결시각 = epoch-second)를 종목별로 묶어 버퍼에 한 번에
+        반영하고 콜백 호출. on_tick은 프레임 내 체결 순서대로, on_candle_closed는
+        그 뒤에 호출된다. 체결시각 datetime은 틱 콜백이 있을 때만 만든다.
+        extended 모드의 확장 필드는 버퍼에만 반영하고 틱 콜백 인자는 같다.
+        """
+        # 종목별 묶기 (튜플은 자르지 않고 그대로, 종목 조회는 묶음당 1회)
+        groups: dict[str, list[tuple]] = {}
+        for tick in ticks:
+            batch = groups.get(tick[0])
+            if batch is None:
+                groups[tick[0]] = [tick]
+            else:
+                batch.append(tick)
+
+        ids = self._symbols.ids
+        slots = self._slots
+        by_slot: list[tuple[tuple, list[tuple]]] = []
+        skipped = False
+        for stock_code, batch in groups.items():
+            slot = ids.get(stock_code)
+            entry = None if slot is None else slots[slot]
+            if entry is None:
+                skipped = True
+            else:
+                by_slot.append((entry, batch))
+        if not by_slot:
             return
+        applied = [t for t in ticks if t[0] in self._buffers] if skipped else ticks
+
+        # 버퍼에 반영 (종목당 락 1회)
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = time.perf_counter_ns()
+        closed_candles: list[CandleBar] = []
+        timeframe_closed: list[tuple[str, CandleBar]] = []
+        cross = self._cross
+        for (buf, row), batch in by_slot:
+            closed = buf._on_decoded(batch)
+            if closed:
+                closed_candles.extend(closed)
+            if buf.timeframes:
+                timeframe_closed.extend(buf.drain_timeframe_closed())
+            cur = buf.current
+            if cur is not None:
+                cross.tick(
+                    row, cur.open, cur.high, cur.low, cur.close,
+                    cur.volume, cur.trade_count, batch[-1][3],
+                )
+        if metrics is not None:
+            metrics.observe("buffer", time.perf_counter_ns() - t0)
+
+        self._tick_count += len(applied)
+        self._last_tick_second = applied[-1][3]
+
+        # 콜백: 매 틱 (체결시각 datetime은 초가 바뀔 때만 생성)
+        on_tick = None if self._callbacks_dispatched else self.on_tick
+        publish_ticks = self._dispatcher.has("tick")
+        if on_tick or publish_ticks:
+            last_second = -1
+            trade_dt: Optional[datetime] = None
+            for tick in applied:
+                second = tick[3]
+                if second != last_second:
+                    trade_dt = from_epoch_second(second)
+                    last_second = second
+                if on_tick:
+                    if metrics is not None:
+                        t0 = time.perf_counter_ns()
+                    try:
+                        on_tick(tick[0], tick[1], tick[2], trade_dt)
+                    except Exception as e:
+                        logger.error(f"on_tick 콜백 에러: {e}")
+                    if metrics is not None:
+                        metrics.observe("callback.on_tick", time.perf_counter_ns() - t0)
+                if publish_ticks:
+                    self._dispatcher.publish("tick", (tick[0], tick[1], tick[2], trade_dt))
 
-        closed_candle = buf.on_tick(price, cntg_vol, trade_dt)
+        # 콜백: 분봉 완성
+        if closed_candles:
+            self._emit_closed(closed_candles)
+        if timeframe_closed:
+            self._emit_timeframe_closed(timeframe_closed)
 
-        self._tick_count += 1
-        self._last_tick_time = trade_dt
+    def _emit_closed(self, closed_candles: list[CandleBar]) -> None:
+        """마감된 분봉 묶음을 저장소에 기록하고 콜백으로 전달"""
+        self._candle_count += len(closed_candles)
 
-        # 콜백: 매 틱
-        if self.on_tick:
+        if self.store is not None:
             try:
-                self.on_tick(stock_code, price, cntg_vol, trade_dt)
-            except Exception as e:
-                logger.error(f"on_tick 콜백 에러: {e}")
-
-        # 콜백: 분봉 완성
-        if closed_candle and self.on_candle_closed:
-            self._candle_count += 1
+                self.store.append_many(closed_candles)
+            except OSError as e:
+                logger.error(f"분봉 저장 실패: {e}")
+
+        # start() 동안은 on_* 콜백도 디스패처 구독자로 전달된다
+        inline = not self._callbacks_dispatched
+        metrics = self.metrics
+        on_candle_closed = self.on_candle_closed if inline else None
+        if on_candle_closed:
+            for closed_candle in closed_candles:
+                if metrics is not None:
+                    t0 = time.perf_counter_ns()
+                try:
+                    on_candle_closed(closed_candle)
+                except Exception as e:
+                    logger.error(f"on_candle_closed 콜백 에러: {e}")
+                if metrics is not None:
+                    metrics.observe("callback.on_candle_closed", time.perf_counter_ns() - t0)
+
+        on_candles_closed = self.on_candles_closed if inline else None
+        if on_candles_closed:
+            if metrics is not None:
+                t0 = time.perf_counter_ns()
             try:
-                self.on_candle_closed(closed_candle)
+                on_candles_closed(closed_candles)
             except Exception as e:
-                logger.error(f"on_candle_closed 콜백 에러: {e}")
+                logger.error(f"on_candles_closed 콜백 에러: {e}")
+            if metrics is not None:
+                metrics.observe("callback.on_candles_closed", time.perf_counter_ns() - t0)
+
+        dispatcher = self._dispatcher
+        if dispatcher.has("candle_closed"):
+            for closed_candle in closed_candles:
+                dispatcher.publish("candle_closed", (closed_candle,))
+        if dispatcher.has("candles_closed"):
+            dispatcher.publish("candles_closed", (closed_candles,))
+
+    def _emit_timeframe_closed(self, closed: list[tuple[str, CandleBar]]) -> None:
+        """마감된 상위 타임프레임 캔들을 콜백으로 전달 (start() 동안은 디스패처로)"""
+        metrics = self.metrics
+        on_timeframe_closed = None if self._callbacks_dispatched else self.on_timeframe_closed
+        if on_timeframe_closed:
+            for timeframe, candle in closed:
+                if metrics is not None:
+                    t0 = time.perf_counter_ns()
+                try:
+                    on_timeframe_closed(timeframe, candle)
+                except Exception as e:
+                    logger.error(f"on_timeframe_closed 콜백 에러: {e}")
+                if metrics is not None:
+                    metrics.observe("callback.on_timeframe_closed", time.perf_counter_ns() - t0)
+        if self._dispatcher.has("timeframe_closed"):
+            for item in closed:
+                self._dispatcher.publish("timeframe_closed", item)
+
+    # ──────── 분봉 타이머 마감 ────────
+    def _close_candles(self, minute: int) -> list[CandleBar]:
+        """
+        전 종목을 한 번에 훑어 epoch-minute이 minute 이전인 미완성 캔들을
+        마감하고, 닫힌 캔들을 한 묶음으로 콜백에 전달한다.
+        워커 모드에서는 워커에 마감을 요청하고 결과는 _pool_result_loop가 전달한다.
+        """
+        if self._pool is not None:
+            self._pool.close_before(minute)
+            return []
+        closed_candles: list[CandleBar] = []
+        timeframe_closed: list[tuple[str, CandleBar]] = []
+        for buf in list(self._buffers.values()):
+            closed_candle = buf.close_before(minute)
+            if closed_candle is not None:
+                closed_candles.append(closed_candle)
+            if buf.timeframes:
+                timeframe_closed.extend(buf.drain_timeframe_closed())
+        for decoder in self._decoders.values():
+            decoder.close_before(minute)
+        if closed_candles:
+            self._emit_closed(closed_candles)
+        if timeframe_closed:
+            self._emit_timeframe_closed(timeframe_closed)
+        return closed_candles
+
+    async def _pool_result_loop(self) -> None:
+        """워커가 보낸 닫힌 캔들 묶음을 이벤트 루프에서 콜백으로 전달"""
+        loop = asyncio.get_running_loop()
+        while self._running:
+            closed_candles = await loop.run_in_executor(None, self._pool.get_closed)
+            if closed_candles is None:
+                break
+            if closed_candles:
+                self._emit_closed(closed_candles)
+
+    async def _candle_close_loop(self) -> None:
+        """매 분 경계 + close_grace 시점마다 _close_candles 실행"""
+        while self._running:
+            now = time.time()
+            boundary = (now // 60 + 1) * 60
+            await asyncio.sleep(boundary + self.close_grace - now)
+            self._close_candles(to_epoch_minute(datetime.fromtimestamp(boundary)))
+
+    async def _store_sync_loop(self) -> None:
+        """store.fsync_interval초마다 저장소 fsync (executor에서 실행)"""
+        loop = asyncio.get_running_loop()
+        while self._running:
+            await asyncio.sleep(self.store.fsync_interval)
+            try:
+                await loop.run_in_executor(None, self.store.sync)
+            except OSError as e:
+                logger.error(f"분봉 저장소 fsync 실패: {e}")
 
     # ──────── 메인 루프 ────────
     async def start(self) -> None:
         """WebSocket 연결 및 메시지 수신 루프 시작"""
         self._running = True
+        self._loop = asyncio.get_running_loop()
         logger.info("RealtimeCandleManager 시작")
 
+        self._dispatch_callbacks(True)
+        self._dispatcher.start()
+        background = [asyncio.ensure_future(self._approval_key_refresh_loop())]
+        if self.auto_close:
+            background.append(asyncio.ensure_future(self._candle_close_loop()))
+        if self._pool is not None:
+            self._pool.start()
+            background.append(asyncio.ensure_future(self._pool_result_loop()))
+        if self.store is not None and self.store.fsync_interval > 0:
+            background.append(asyncio.ensure_future(self._store_sync_loop()))
+        if self._backfill_pending:
+            self._schedule_backfill()
+        metrics_server = None
+        if self.metrics is not None:
+            background.append(asyncio.ensure_future(
+                event_loop_lag_loop(self.metrics, running=lambda: self._running)
+            ))
+            if self.metrics_port is not None:
+                metrics_server = await serve_prometheus(
+                    self.metrics_text, self.metrics_host, self.metrics_port
+                )
+        if self.publish_path is not None:
+            from candle_ipc import CandlePublisher  # 순환 import 방지
+
+            self.publisher = CandlePublisher(self, self.publish_path)
+            await self.publisher.start()
+        try:
+            await asyncio.gather(*(self._run_session(s) for s in self._sessions))
+        finally:
+            # 끊길 때 처리 태스크에 넘긴 남은 프레임까지 반영
+            processors = [s.processor for s in self._sessions if s.processor is not None]
+            if processors:
+                await asyncio.gather(*processors, return_exceptions=True)
+            for s in self._sessions:
+                s.processor = None
+            # 처리한 프레임의 on_* 콜백까지 전달
+            if not await self._dispatcher.flush(self._callback_subs.values()):
+                logger.warning("종료 전 콜백 대기열을 다 전달하지 못했습니다")
+            for task in background:
+                task.cancel()
+            self._loop = None
+            if self._universe_task is not None:
+                self._universe_task.cancel()
+            while self._universe_changes:  # 보내지 못한 구독은 다음 start()의 연결 시
+                self._finish_universe(self._universe_changes.popleft())
+            if self._backfill_task is not None:
+                self._backfill_task.cancel()
+            if self.backfill_client is not None:
+                self.backfill_client.close()
+                self.backfill_client = None
+            if metrics_server is not None:
+                metrics_server.close()
+            if self.publisher is not None:
+                await self.publisher.close()
+                self.publisher = None
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._dispatcher.stop()
+            self._dispatch_callbacks(False)
+            if self.store is not None:
+                self.store.close()
+            if self.journal is not None:
+                self.journal.flush()
+            self._http.close()
+
+    async def _run_session(self, session: KisSession) -> None:
+        """세션 1개의 연결·재연결 루프"""
         while self._running:
+            session.connected_at = 0.0
             try:
-                await self._connect_and_listen()
+                await self._connect_and_listen(session)
             except Exception as e:
-                logger.error(f"WebSocket 오류: {e}")
+                logger.error(f"WebSocket 오류 (세션 #{session.index}): {e}")
 
             if self._running:
-                logger.info(f"{self._reconnect_delay}초 후 재연결...")
-                await asyncio.sleep(self._reconnect_delay)
-
-    async def _connect_and_listen(self) -> None:
+                if (
+                    session.connected_at
+                    and time.monotonic() - session.connected_at >= self.RECONNECT_STABLE_SECONDS
+                ):
+                    session.failures = 0
+                delay = self._reconnect_backoff(session.failures)
+                session.failures += 1
+                # 한 번도 연결되지 않은 세션(시작 시 접속 실패)은 끊김이 아니므로
+                # 복구 시간(_recovered)을 재지 않는다
+                if not session.dropped_ns and session.connect_count:
+                    session.dropped_ns = time.perf_counter_ns()
+                logger.info(f"{delay:.2f}초 후 재연결... (세션 #{session.index})")
+                await asyncio.sleep(delay)
+
+    def _reconnect_backoff(self, failures: int) -> float:
+        """연속 failures회 재연결 후 대기 시간: 상한 min(MAX, MIN·2^n)의 50~100% (지터)"""
+        cap = min(self.RECONNECT_DELAY_MAX, self.RECONNECT_DELAY_MIN * (1 << min(failures, 16)))
+        return random.uniform(cap / 2, cap)
+
+    async def _connect_and_listen(self, session: Optional[KisSession] = None) -> None:
         """단일 WebSocket 세션"""
-        key = self._get_approval_key()
+        session = session or self._sessions[0]
+        key = await self._get_approval_key()
 
         async with websockets.connect(
             self.ws_url,
             ping_interval=None,  # KIS가 자체 PINGPONG 사용
             max_size=None,
         ) as ws:
-            self._ws = ws
-            logger.info(f"KIS WebSocket 연결 성공: {self.ws_url}")
-
-            if self.on_connected:
-                try:
-                    self.on_connected()
-                except Exception:
-                    pass
-
-            # 대기 중인 구독 처리
-            for code in list(self._pending_subscribe):
-                await self._subscribe(code)
-            self._pending_subscribe.clear()
-
-            # 메시지 수신 루프
+            session.ws = ws
+            session.connect_count += 1
+            session.connected_at = time.monotonic()
+            logger.info(f"KIS WebSocket 연결 성공: {self.ws_url} (세션 #{session.index})")
+
+            await self._call_connection_callback("on_connected")
+
+            # 배정된 전 종목(끊긴 동안 추가된 종목 포함) 구독 일괄 전송
+            await self._subscribe_many(sorted(session.pending), session)
+
+            # 메시지 수신 루프: 소켓 수신과 PINGPONG 응답은 이 루프에서 바로
+            # 처리하고, 체결 프레임은 대기열을 거쳐 _process_frames가 처리한다.
+            # 콜백이 밀려도 대기열에 자리가 있는 동안은 PINGPONG 응답이 지연되지 않는다.
+            # 대기열이 inbound_maxsize에 차면 프레임을 버리지 않고 자리가 날 때까지
+            # 소켓 읽기를 멈춘다 (커널 수신 버퍼가 차면 TCP가 송신 측을 늦춤).
+            inbound: asyncio.Queue = asyncio.Queue(self.inbound_maxsize)
+            session.inbound = inbound
+            # 이전 연결의 처리 태스크가 남은 프레임을 마저 처리한 뒤 이어서 처리 (순서 유지)
+            session.processor = asyncio.ensure_future(
+                self._process_frames(session, inbound, session.processor)
+            )
             try:
-                async for message in ws:
-                    raw = message if isinstance(message, str) else message.decode("utf-8")
+                # bytes 파서: UTF-8 디코딩 없이 받은 프레임을 그대로 넘긴다
+                if self.parser.binary and not self._recv_accepts_decode(ws):
+                    self._fallback_parser(ws)
+                binary = self.parser.binary
+                brace, zero, one = (123, 48, 49) if binary else ("{", "0", "1")
+                loads_json = self._loads_json
+                while True:
+                    raw = await ws.recv(decode=False) if binary else await ws.recv()
+                    recv_ns = time.time_ns() if self._stamp_frames else 0
+                    if not binary and not isinstance(raw, str):
+                        raw = raw.decode("utf-8")
+                    if not raw:
+                        continue
+                    head = raw[0]
 
                     # PINGPONG 응답
-                    if raw.startswith("{"):
+                    if head == brace:
                         try:
-                            j = json.loads(raw)
+                            j = loads_json(raw)
                             header = j.get("header", {})
                             tr_id = header.get("tr_id", "")
                             if tr_id == "PINGPONG":
-                                await ws.send(raw)  # PONG 응답
+                                await ws.send(raw.decode("utf-8") if binary else raw)  # PONG 응답
                                 continue
                             msg1 = j.get("body", {}).get("msg1", "")
                             logger.debug(f"KIS 응답: {tr_id} - {msg1}")
-                        except json.JSONDecodeError:
+                        except ValueError:
                             pass
                         continue
 
-                    # 실시간 체결 데이터 파싱
-                    if raw.startswith("0") or raw.startswith("1"):
-                        self._parse_tick(raw)
+                    # 실시간 체결 데이터 → 처리 대기열
+                    if head == zero or head == one:
+                        if session.dropped_ns:
+                            self._recovered(session)
+                        if self.journal is not None:
+                            self.journal.record(raw, recv_ns)
+                        if inbound.full():
+                            await self._inbound_stall(session, inbound, (recv_ns, raw))
+                        else:
+                            inbound.put_nowait((recv_ns, raw))
+                        if self.metrics is not None:
+                            self.metrics.observe("receive", time.time_ns() - recv_ns)
 
             except websockets.ConnectionClosed as e:
                 logger.warning(f"WebSocket 연결 종료: {e}")
             finally:
-                self._ws = None
-                self._subscribed.clear()
-                if self.on_disconnected:
-                    try:
-                        self.on_disconnected()
-                    except Exception:
-                        pass
+                # 남은 프레임은 처리 태스크에 맡긴다 (block 정책 유지, 루프를 막지 않음).
+                # 대기열이 가득 차 종료 표시를 못 넣으면 처리 태스크가 비운 뒤 스스로 끝낸다
+                session.inbound = None
+                try:
+                    inbound.put_nowait(None)
+                except asyncio.QueueFull:
+                    pass
+                session.ws = None
+                if self._running:
+                    session.dropped_ns = time.perf_counter_ns()
+                    self._begin_outage(session)
+                session.subscribed.clear()
+                if len(self._sessions) > 1 and self._running:
+                    self._rebalance(session)
+                await self._call_connection_callback("on_disconnected")
+
+    def _recovered(self, session: KisSession) -> None:
+        """재연결 후 첫 체결 프레임: 끊김 감지 → 첫 프레임 시간 기록"""
+        elapsed_ns = time.perf_counter_ns() - session.dropped_ns
+        session.dropped_ns = 0
+        session.last_recovery_s = elapsed_ns / 1e9
+        if self.metrics is not None:
+            self.metrics.observe("reconnect", elapsed_ns)
+        logger.info(
+            f"세션 #{session.index} 재연결 후 첫 체결 수신 "
+            f"(끊김 후 {session.last_recovery_s:.2f}s)"
+        )
+
+    def _fallback_parser(self, ws) -> None:
+        """연결의 recv가 bytes 수신(decode=False)을 지원하지 않으면 python 파서로 전환"""
+        from candle_parser import PythonParser  # 순환 import 방지
+
+        logger.warning(
+            f"{type(ws).__name__}.recv가 decode=False를 지원하지 않아 "
+            f"{self.parser.name} 파서 대신 python 파서를 사용합니다"
+        )
+        self.parser = PythonParser()
+        self._decode_frame = self.parser.decode
+
+    async def _inbound_stall(
+        self, session: KisSession, inbound: asyncio.Queue, item: tuple[int, Union[str, bytes]]
+    ) -> None:
+        """수신 대기열이 가득 참: 자리가 날 때까지 소켓 읽기를 멈추고 기다린다 (역압)"""
+        session.inbound_stalls += 1
+        if session.inbound_stalls % 100 == 1:
+            logger.warning(
+                f"세션 #{session.index} 수신 대기열 가득 참 ({self.inbound_maxsize}개) "
+                f"— 처리가 따라올 때까지 수신 중지 (누적 {session.inbound_stalls}회)"
+            )
+        t0 = time.monotonic()
+        await inbound.put(item)
+        session.inbound_stall_s += time.monotonic() - t0
+
+    async def _process_frames(
+        self,
+        session: KisSession,
+        inbound: asyncio.Queue,
+        previous: Optional[asyncio.Task] = None,
+    ) -> None:
+        """
+        수신 대기열의 (수신 시각, 체결 프레임)을 파싱·반영. None을 받거나, 연결이 끊긴 뒤
+        (session.inbound가 바뀜) 대기열을 다 비우면 종료한다.
+        block 정책 구독자가 밀려 있으면 여유가 생길 때까지 처리를 멈춘다.
+        previous: 이전 연결의 처리 태스크 (남은 프레임을 다 처리할 때까지 기다린 뒤 시작)
+        """
+        if previous is not None and not previous.done():
+            await asyncio.gather(previous, return_exceptions=True)
+        dispatcher = self._dispatcher
+        while True:
+            if session.inbound is not inbound and inbound.empty():
+                return
+            item = await inbound.get()
+            while item is not None:
+                self._parse_tick(item[1], item[0])
+                if inbound.empty() or dispatcher.needs_drain:
+                    break
+                item = inbound.get_nowait()
+            if item is None:
+                return
+            if dispatcher.needs_drain:
+                await dispatcher.drain()
 
     def stop(self) -> None:
         """매니저 종료"""
         self._running = False
-        if self._ws:
-            asyncio.ensure_future(self._ws.close())
+        for session in self._sessions:
+            if session.ws:
+                asyncio.ensure_future(session.ws.close())
         logger.info("RealtimeCandleManager 종료 요청")
 
     # ──────── 유틸리티 ────────
+    @property
+    def _stamp_frames(self) -> bool:
+        """수신 프레임에 수신 시각을 찍을지 (저널·계측 사용 시)"""
+        return self.journal is not None or self.metrics is not None
+
+    def metrics_text(self, prefix: str = "kis_candle") -> str:
+        """Prometheus 텍스트 형식 메트릭 (metrics 꺼져 있으면 빈 문자열)"""
+        if self.metrics is None:
+            return ""
+        lines = [
+            f"# TYPE {prefix}_ticks_total counter",
+            f"{prefix}_ticks_total {self._tick_count}",
+            f"# TYPE {prefix}_candles_closed_total counter",
+            f"{prefix}_candles_closed_total {self._candle_count}",
+            f"# TYPE {prefix}_inbound_depth gauge",
+        ]
+        for s in self._sessions:
+            depth = s.inbound.qsize() if s.inbound else 0
+            lines.append(f'{prefix}_inbound_depth{{session="{s.index}"}} {depth}')
+        lines.append(f"# TYPE {prefix}_inbound_stalls_total counter")
+        for s in self._sessions:
+            lines.append(
+                f'{prefix}_inbound_stalls_total{{session="{s.index}"}} {s.inbound_stalls}'
+            )
+        lines.append(f"# TYPE {prefix}_inbound_stall_seconds_total counter")
+        for s in self._sessions:
+            lines.append(
+                f'{prefix}_inbound_stall_seconds_total{{session="{s.index}"}} '
+                f"{s.inbound_stall_s:.6f}"
+            )
+        return self.metrics.prometheus(prefix) + "\n".join(lines) + "\n"
+
     @property
     def stats(self) -> dict:
         """현재 통계 정보"""
-        return {
-            "is_connected": self._ws is not None,
-            "subscribed_stocks": list(self._subscribed),
+        result = {
+            "is_connected": any(s.ws is not None for s in self._sessions),
+            "subscribed_stocks": [
+                code for s in self._sessions for code in s.subscribed
+            ],
+            "sessions": [
+                {
+                    "index": s.index,
+                    "is_connected": s.ws is not None,
+                    "assigned": len(s.assigned),
+                    "subscribed": len(s.subscribed),
+                    "capacity": self._session_capacity,
+                    "connect_count": s.connect_count,
+                    "last_recovery_s": s.last_recovery_s,
+                    "inbound_depth": s.inbound.qsize() if s.inbound else 0,
+                    "inbound_stalls": s.inbound_stalls,
+                    "inbound_stall_s": round(s.inbound_stall_s, 3),
+                }
+                for s in self._sessions
+            ],
             "total_ticks": self._tick_count,
             "total_candles_closed": self._candle_count,
             "last_tick_time": (
-                self._last_tick_time.strftime("%H:%M:%S")
-                if self._last_tick_time
+                from_epoch_second(self._last_tick_second).strftime("%H:%M:%S")
+                if self._last_tick_second is not None
                 else None
             ),
             "buffers": {
                 code: {
                     "history_count": len(buf.history),
+                    "history": buf.history.usage,
+                    "late_ticks": buf.late_ticks,
+                    "timeframes": list(getattr(buf, "timeframes", ())),
                     "current_candle": repr(buf.current) if buf.current else None,
+                    "outages": [
+                        (from_epoch_minute(start).strftime("%H:%M"),
+                         from_epoch_minute(end).strftime("%H:%M"))
+                        for start, end in getattr(buf, "outages", ())
+                    ],
                 }
                 for code, buf in self._buffers.items()
             },
         }
+        if self._pool is not None:
+            result["workers"] = self._pool.stats
+        if self.store is not None:
+            result["store"] = self.store.stats
+        if self.journal is not None:
+            result["journal"] = self.journal.stats
+        if self.backfill_client is not None:
+            result["backfill"] = self.backfill_client.stats
+        if self.publisher is not None:
+            result["publisher"] = self.publisher.stats
+        if self._decoders:
+            result["decoders"] = {tr_id: d.stats for tr_id, d in self._decoders.items()}
+        if self.metrics is not None:
+            result["metrics"] = self.metrics.snapshot()
+        if self._last_universe is not None or self._universe_changes:
+            result["universe"] = {
+                "stocks": len(self._buffers),
+                "pending_changes": len(self._universe_changes),
+                "last_change": (
+                    self._last_universe.stats if self._last_universe is not None else None
+                ),
+            }
+        result["ingest"] = {
+            "parser": self.parser.name,
+            "json": self._json_backend,
+            "event_loop": type(self._loop).__module__ if self._loop is not None else None,
+        }
+        subscribers = self._dispatcher.stats
+        if subscribers:
+            result["subscribers"] = subscribers
+        return result
 
 
 # ──────────────────────────────────────────────
@@ -617,9 +3718,11 @@ if __name__ == "__main__":
     print(f"📊 실시간 1분봉 생성기 시작 (종목: {', '.join(STOCKS)})")
     print("   Ctrl+C 로 종료\n")
 
-    # ── 실행 ──
+    # ── 실행 (uvloop이 설치되어 있으면 uvloop 이벤트 루프) ──
+    from candle_parser import run
+
     try:
-        asyncio.run(manager.start())
+        run(manager.start())
     except KeyboardInterrupt:
         manager.stop()
         print("\n종료됨.")
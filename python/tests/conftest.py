@@ -0,0 +1,6 @@
+"""python/ 모듈을 패키지 설치 없이 import할 수 있도록 경로 추가"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,118 @@
+"""시뮬레이터 REST 분봉 조회로 백필: 병합 결과, 실시간 분봉 유지, 저장소 재적재"""
+
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from candle_store import CandleStore
+from kis_simulator import KisSimulator, chart_bar
+from realtime_candle import RealtimeCandleManager, to_epoch_second
+
+N_SYMBOLS = 4
+UNTIL_HOUR = 10
+
+
+@pytest.fixture(scope="module")
+def backfilled(tmp_path_factory):
+    """
+    N_SYMBOLS 종목을 09:00 ~ UNTIL_HOUR시까지 백필한 매니저.
+    첫 종목은 until 5분 전 완성 분봉 1개(저장소에도 기록)와 until 1분 전 현재 캔들을 미리 넣는다.
+    """
+    root = str(tmp_path_factory.mktemp("store"))
+    until = datetime.now().replace(hour=UNTIL_HOUR, minute=0, second=30, microsecond=0)
+    live_second = to_epoch_second(until.replace(second=0)) - 300
+    codes = [f"{i:06d}" for i in range(N_SYMBOLS)]
+    rewrites = []
+
+    async def run():
+        sim = KisSimulator()
+        await sim.start()
+        manager = RealtimeCandleManager(
+            app_key="test", app_secret="test", rest_url=sim.rest_url, auto_close=False,
+            store=CandleStore(root),
+        )
+        for code in codes:
+            manager.add_stock(code)
+        live = manager.get_buffer(codes[0])
+        live.on_ticks([(101.0, 7, live_second), (102.0, 3, live_second + 30)])
+        live.on_ticks([(103.0, 1, live_second + 240)])
+        manager.store.append_many(live.get_history())
+
+        rewrite_many = manager.store.rewrite_many
+
+        def recording(bars):
+            bars = list(bars)
+            rewrites.append((threading.current_thread(), bars))
+            return rewrite_many(bars)
+
+        manager.store.rewrite_many = recording
+        try:
+            filled = await manager.backfill(until=until)
+        finally:
+            manager.backfill_client.close()
+            await sim.stop()
+        manager.store.close()
+        return manager, filled
+
+    manager, filled = asyncio.run(run())
+    return {
+        "manager": manager, "filled": filled, "codes": codes, "root": root,
+        "day": f"{until:%Y%m%d}", "live_minute": live_second // 60, "rewrites": rewrites,
+    }
+
+
+def test_minutes_contiguous_from_open(backfilled):
+    for code in backfilled["codes"]:
+        minutes = list(backfilled["manager"].get_buffer(code).get_history().columns["minute"])
+        assert minutes == list(range(minutes[0], minutes[0] + len(minutes))), code
+        assert minutes[0] % 1440 == 9 * 60
+    for code in backfilled["codes"][1:]:
+        assert backfilled["filled"][code] == (UNTIL_HOUR - 9) * 60
+
+
+def test_bars_match_simulator(backfilled):
+    live_minute = backfilled["live_minute"]
+    for code in backfilled["codes"]:
+        c = backfilled["manager"].get_buffer(code).get_history().columns
+        for i, minute in enumerate(c["minute"]):
+            if code == backfilled["codes"][0] and minute >= live_minute:
+                continue
+            expected = chart_bar(code, backfilled["day"], minute % 1440)
+            if int(expected["cntg_vol"]):
+                assert c["close"][i] == float(expected["stck_prpr"]), (code, minute)
+                assert c["volume"][i] == int(expected["cntg_vol"]), (code, minute)
+
+
+def test_live_bars_kept(backfilled):
+    live_minute = backfilled["live_minute"]
+    live = backfilled["manager"].get_buffer(backfilled["codes"][0])
+    c = live.get_history().columns
+    i = list(c["minute"]).index(live_minute)
+    assert (c["volume"][i], c["close"][i]) == (10, 102.0), "실시간 분봉이 REST로 덮임"
+    assert c["minute"][len(c["minute"]) - 1] == live_minute + 3
+    assert live.get_current().close == 103.0
+
+
+def test_rewrites_run_off_loop_per_symbol(backfilled):
+    rewrites = backfilled["rewrites"]
+    assert len(rewrites) == N_SYMBOLS
+    assert all(thread is not threading.main_thread() for thread, _ in rewrites)
+    for _, bars in rewrites:
+        assert {bar.stock_code for bar in bars} == {bars[0].stock_code}
+
+
+def test_store_restores_backfilled_bars(backfilled):
+    restarted = RealtimeCandleManager(
+        app_key="test", app_secret="test", auto_close=False, store=CandleStore(backfilled["root"])
+    )
+    try:
+        for code in backfilled["codes"]:
+            restarted.add_stock(code)
+            expected = backfilled["manager"].get_buffer(code).get_history().columns
+            got = restarted.get_buffer(code).get_history().columns
+            assert list(got["minute"]) == list(expected["minute"]), code
+            assert list(got["volume"]) == list(expected["volume"]), code
+    finally:
+        restarted.store.close()
@@ -0,0 +1,56 @@
+"""block 구독자가 밀리면 수신 대기열이 차서 소켓 읽기를 멈추고, 프레임은 하나도 버리지 않는다"""
+
+import asyncio
+
+from kis_simulator import KisSimulator
+from realtime_candle import RealtimeCandleManager
+
+
+async def _wait_until(predicate, timeout: float) -> bool:
+    for _ in range(int(timeout / 0.05)):
+        if predicate():
+            return True
+        await asyncio.sleep(0.05)
+    return predicate()
+
+
+def test_full_inbound_stalls_reads_without_dropping_frames():
+    async def run():
+        sim = KisSimulator(ticks_per_symbol=50, records_per_frame=1)
+        await sim.start()
+        manager = RealtimeCandleManager(
+            app_key="test", app_secret="test", ws_url=sim.ws_url, rest_url=sim.rest_url,
+            auto_close=False, inbound_maxsize=50, metrics=True,
+        )
+        codes = [f"{i:06d}" for i in range(20)]
+        for code in codes:
+            manager.add_stock(code)
+        gate = asyncio.Event()
+
+        async def slow(*args):
+            await gate.wait()
+
+        manager.subscribe("tick", slow, policy="block", maxsize=1)
+        task = asyncio.ensure_future(manager.start())
+        try:
+            assert await _wait_until(lambda: sim.subscribed_count == len(codes), 5)
+            assert await _wait_until(lambda: manager.stats["sessions"][0]["inbound_stalls"] > 0, 5)
+            session = manager.stats["sessions"][0]
+            assert session["inbound_depth"] <= 50
+            assert "inbound_stalls_total" in manager.metrics_text()
+
+            # 전송을 멈추고 소비를 풀면 보낸 체결이 전부 반영된다
+            sim.ticks_per_symbol = 0
+            gate.set()
+            assert await _wait_until(lambda: manager.stats["total_ticks"] == sim.ticks_sent, 10), (
+                manager.stats["total_ticks"], sim.ticks_sent,
+            )
+            assert sim.ticks_sent > 0
+        finally:
+            gate.set()
+            manager.stop()
+            await asyncio.wait_for(task, 10)
+            await sim.stop()
+        assert manager._sessions[0].processor is None
+
+    asyncio.run(run())
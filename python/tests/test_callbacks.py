@@ -0,0 +1,65 @@
+"""start() 동안 on_* 콜백은 수신 루프 밖에서 실행되고, 종료 전에 모두 전달된다"""
+
+import asyncio
+import threading
+import time
+
+from kis_simulator import KisSimulator
+from realtime_candle import RealtimeCandleManager
+
+
+def test_sync_callbacks_run_off_the_loop():
+    threads = set()
+    ticks = []
+    connected = []
+    started = threading.Event()
+
+    def on_tick(stock_code, price, qty, trade_time):
+        threads.add(threading.current_thread())
+        if not started.is_set():
+            started.set()
+            time.sleep(0.5)  # 느린 소비자: 그동안 수신·PINGPONG은 계속된다
+        ticks.append(stock_code)
+
+    async def run():
+        sim = KisSimulator(ticks_per_symbol=20, ping_interval=0.05)
+        await sim.start()
+        manager = RealtimeCandleManager(
+            app_key="test", app_secret="test", ws_url=sim.ws_url, rest_url=sim.rest_url,
+            auto_close=False,
+        )
+        for i in range(5):
+            manager.add_stock(f"{i:06d}")
+        manager.on_tick = on_tick
+        manager.on_connected = lambda: connected.append(threading.current_thread())
+        task = asyncio.ensure_future(manager.start())
+        try:
+            for _ in range(100):
+                if started.is_set():
+                    break
+                await asyncio.sleep(0.05)
+            pongs = sim.stats["pongs"]
+            await asyncio.sleep(0.3)  # 첫 콜백이 아직 자는 동안
+            assert ticks == []
+            assert sim.stats["pongs"] > pongs
+            assert manager.stats["total_ticks"] > 1
+        finally:
+            manager.stop()
+            await asyncio.wait_for(task, 10)
+            await sim.stop()
+        return manager
+
+    manager = asyncio.run(run())
+    assert threading.main_thread() not in threads
+    assert connected and connected[0] is not threading.main_thread()
+    assert len(ticks) == manager.stats["total_ticks"]  # 종료 전에 남은 이벤트까지 전달
+    assert manager._callback_subs == {}
+
+
+def test_callbacks_inline_before_start():
+    manager = RealtimeCandleManager(app_key="test", app_secret="test", auto_close=False)
+    manager.add_stock("005930")
+    calls = []
+    manager.on_tick = lambda *args: calls.append(threading.current_thread())
+    manager._parse_tick("0|H0STCNT0|001|" + "^".join(["005930", "090000", "70000"] + ["0"] * 9 + ["5"]))
+    assert calls == [threading.main_thread()]
@@ -0,0 +1,67 @@
+"""스트리밍 지표(IndicatorEngine)와 배치 재계산(batch_indicators) 결과 일치"""
+
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from candle_indicators import (  # noqa: E402
+    ATR,
+    EMA,
+    RSI,
+    SMA,
+    VWAP,
+    Bollinger,
+    IndicatorEngine,
+    batch_indicators,
+)
+from realtime_candle import StockCandleBuffer  # noqa: E402
+
+N_BARS = 300
+
+
+def _indicators():
+    return [SMA(20), EMA(12), RSI(14), ATR(14), VWAP(), Bollinger(20, 2.0)]
+
+
+@pytest.fixture(scope="module")
+def streamed():
+    """무작위 틱을 흘려 넣은 버퍼와 엔진 (이력이 덮어써지지 않도록 용량은 넉넉히)"""
+    rng = random.Random(7)
+    buf = StockCandleBuffer("000000", max_history=N_BARS * 2)
+    indicators = _indicators()
+    engine = IndicatorEngine(buf, indicators, history=N_BARS * 2)
+    t = datetime(2025, 1, 2, 9, 0)
+    price = 50_000
+    for _ in range(N_BARS * 4):
+        t += timedelta(seconds=rng.choice((5, 15, 25)))
+        price = max(1, price + rng.randint(-50, 50))
+        buf.on_tick(float(price), rng.randint(1, 300), t)
+    return buf, engine, indicators
+
+
+def _rows(values):
+    if isinstance(values, tuple):  # 다중 출력 (Bollinger 등)은 열 → 행
+        values = list(zip(*values))
+    return [v if isinstance(v, tuple) else (v,) for v in values]
+
+
+@pytest.mark.parametrize("name", [ind.name for ind in _indicators()])
+def test_stream_matches_batch(streamed, name):
+    buf, engine, indicators = streamed
+    view = buf.get_history()
+    assert len(view) > 100
+    batch = batch_indicators(view, indicators)
+
+    got = _rows(engine.get_history(name))
+    want = _rows(list(batch[name]) if not isinstance(batch[name], tuple) else batch[name])
+    assert len(got) == len(want) == len(view)
+    for i, (g_row, w_row) in enumerate(zip(got, want)):
+        for g, w in zip(g_row, w_row):
+            if g is None:
+                assert math.isnan(w), (name, i, w)
+            else:
+                assert math.isclose(g, w, rel_tol=1e-9, abs_tol=1e-6), (name, i, g, w)
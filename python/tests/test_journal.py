@@ -0,0 +1,86 @@
+"""저널 기록 → 재생: 결정성, 기록한 날 기준 날짜, 마지막 분 마감"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from kis_simulator import make_frame, make_record
+from realtime_candle import RealtimeCandleManager
+from tick_journal import JournalReplay, TickJournalWriter
+
+CODES = ["005930", "000660"]
+RECORD_DAY = datetime(2025, 1, 2)
+MINUTES = 3
+TICKS_PER_MINUTE = 6
+
+
+@pytest.fixture(scope="module")
+def journal(tmp_path_factory):
+    """09:00 ~ 09:02 종목별 분당 TICKS_PER_MINUTE 체결을 기록한 저널 경로"""
+    path = str(tmp_path_factory.mktemp("journal") / "session.journal")
+    writer = TickJournalWriter(path)
+    for minute in range(MINUTES):
+        for k in range(TICKS_PER_MINUTE):
+            second = k * 10
+            records = [
+                make_record(code, f"09{minute:02d}{second:02d}", 10_000 + i * 1_000 + k * 10, k + 1)
+                for i, code in enumerate(CODES)
+            ]
+            recv = RECORD_DAY.replace(hour=9, minute=minute, second=second, microsecond=1_000)
+            writer.record(make_frame(records), int(recv.timestamp() * 1e9))
+    writer.close()
+    return path
+
+
+def _manager() -> tuple[RealtimeCandleManager, list]:
+    manager = RealtimeCandleManager(app_key="test", app_secret="test")
+    for code in CODES:
+        manager.add_stock(code)
+    closed: list = []
+    manager.on_candles_closed = closed.extend
+    return manager, closed
+
+
+def _bars(closed: list) -> list[tuple]:
+    return sorted((c.stock_code, c.dt, c.close, c.volume) for c in closed)
+
+
+def _replay_sync(path: str) -> tuple[RealtimeCandleManager, list]:
+    manager, closed = _manager()
+    JournalReplay(path).run_sync(manager)
+    return manager, closed
+
+
+def _replay_async(path: str) -> tuple[RealtimeCandleManager, list]:
+    manager, closed = _manager()
+    asyncio.run(JournalReplay(path).run(manager))
+    return manager, closed
+
+
+@pytest.mark.parametrize("replay", [_replay_sync, _replay_async], ids=["run_sync", "run"])
+def test_replay_closes_every_minute(journal, replay):
+    manager, closed = replay(journal)
+    bars = _bars(closed)
+    assert len(bars) == len(CODES) * MINUTES
+    assert {dt.date() for _, dt, _, _ in bars} == {RECORD_DAY.date()}
+    assert max(dt for _, dt, _, _ in bars) == RECORD_DAY.replace(hour=9, minute=MINUTES - 1)
+    for code in CODES:
+        assert manager.get_buffer(code).get_current() is None
+    volume = sum(range(1, TICKS_PER_MINUTE + 1))
+    assert all(v == volume for _, _, _, v in bars)
+
+
+def test_replay_deterministic(journal):
+    assert _bars(_replay_sync(journal)[1]) == _bars(_replay_sync(journal)[1])
+    assert _bars(_replay_sync(journal)[1]) == _bars(_replay_async(journal)[1])
+
+
+def test_replay_without_auto_close_keeps_last_minute_open(journal):
+    """auto_close가 꺼져 있으면 다음 체결이 들어온 분만 닫히고 마지막 분은 열린 채 남음"""
+    manager, closed = _manager()
+    manager.auto_close = False
+    JournalReplay(journal).run_sync(manager)
+    assert len(closed) == len(CODES) * (MINUTES - 1)
+    for code in CODES:
+        assert manager.get_buffer(code).get_current() is not None
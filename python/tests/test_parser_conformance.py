@@ -0,0 +1,112 @@
+"""파서 백엔드 공통 적합성: 모든 백엔드가 참조 구현(PythonParser)과 같은 체결 튜플을 낸다"""
+
+import pytest
+
+from candle_parser import (
+    PARSERS,
+    PythonParser,
+    check_conformance,
+    conformance_frames,
+    get_parser,
+    recv_supports_bytes,
+)
+from realtime_candle import SessionDate, SymbolTable
+
+FRAMES = conformance_frames()
+
+# 참조 구현의 기대값 (extended=False, SymbolTable 없음): 설명 → [(종목코드, 가격, 수량)]
+EXPECTED = {
+    "단건": [("005930", 70000.0, 15)],
+    "다건 (같은 체결시각 재사용)": [
+        ("005930", 70000.0, 15), ("000660", 180500.0, 3), ("005930", 70100.0, 7),
+    ],
+    "미등록 종목 포함": [("005930", 70000.0, 15), ("999999", 1234.0, 1)],
+    "자정 전 체결": [("005930", 70000.0, 10)],
+    "체결시간 오류 레코드만 건너뜀": [("005930", 70000.0, 15), ("000660", 180500.0, 3)],
+    "가격 오류 레코드만 건너뜀": [("005930", 70100.0, 7)],
+    "레코드 수 오류 → 1건": [("005930", 70000.0, 15)],
+    "레코드 수 0": [],
+    "필드 수가 레코드 수로 나눠지지 않음": [],
+    "레코드 폭 부족": [],
+    "기본 폭 (확장 필드 없음)": [("005930", 70000.0, 15), ("000660", 180500.0, 3)],
+    "암호화 프레임": [],
+    "다른 TR": [],
+    "구분자 부족": [],
+    "빈 프레임": [],
+}
+
+
+@pytest.fixture(params=list(PARSERS))
+def parser(request):
+    # binary 파서도 설치된 websockets와 무관하게 디코딩 자체는 검사한다
+    return PARSERS[request.param]()
+
+
+@pytest.fixture
+def symbols():
+    table = SymbolTable()
+    for code in ("005930", "000660"):
+        table.intern(code)
+    return table
+
+
+def _inputs(parser, frame):
+    return [frame.encode("utf-8"), frame] if parser.binary else [frame]
+
+
+def test_frames_cover_expected():
+    assert [label for label, _ in FRAMES] == list(EXPECTED)
+
+
+@pytest.mark.parametrize("label,frame", FRAMES, ids=[label for label, _ in FRAMES])
+def test_reference_decodes_expected_ticks(label, frame):
+    ticks = PythonParser().decode(frame, SessionDate(), False, None)
+    assert [t[:3] for t in ticks] == EXPECTED[label]
+
+
+@pytest.mark.parametrize("extended", [False, True], ids=["basic", "extended"])
+@pytest.mark.parametrize("with_table", [False, True], ids=["no-table", "table"])
+@pytest.mark.parametrize("label,frame", FRAMES, ids=[label for label, _ in FRAMES])
+def test_matches_reference(parser, symbols, label, frame, extended, with_table):
+    session = SessionDate()
+    table = symbols if with_table else None
+    expected = PythonParser().decode(frame, session, extended, table)
+    for raw in _inputs(parser, frame):
+        got = parser.decode(raw, session, extended, table)
+        assert got == expected, (type(raw), got, expected)
+        for tick in got:
+            assert type(tick[0]) is str
+            if table is not None and tick[0] in table:
+                # 등록 종목코드는 SymbolTable의 객체 그대로
+                assert tick[0] is table.names[tick[0]]
+
+
+@pytest.mark.parametrize("label,frame", FRAMES, ids=[label for label, _ in FRAMES])
+def test_tr_id_and_text(parser, label, frame):
+    for raw in _inputs(parser, frame):
+        if len(frame) >= 10:
+            assert parser.tr_id(raw) == frame[2:10]
+        assert parser.text(raw) == frame
+
+
+def test_check_conformance(parser):
+    assert check_conformance(parser) == sum(2 * 2 * len(_inputs(parser, f)) for _, f in FRAMES)
+
+
+def test_check_conformance_rejects_mismatch():
+    class DropLast(PythonParser):
+        name = "drop-last"
+
+        def decode(self, raw, *args):
+            return super().decode(raw, *args)[:-1]
+
+    with pytest.raises(AssertionError, match="drop-last"):
+        check_conformance(DropLast())
+
+
+def test_get_parser():
+    assert get_parser("python").name == "python"
+    expected = "bytes" if recv_supports_bytes() else "python"
+    assert get_parser("auto").name == expected
+    with pytest.raises(ValueError):
+        get_parser("nope")
@@ -0,0 +1,37 @@
+"""재연결 루프: 시작 시 접속 실패는 끊김 복구 시간으로 세지 않음"""
+
+import asyncio
+
+from realtime_candle import RealtimeCandleManager
+
+
+def _run_failing_session(connect_count: int, attempts: int = 3):
+    """_connect_and_listen이 attempts회 실패하는 동안 _run_session을 돌린 세션"""
+    manager = RealtimeCandleManager(app_key="test", app_secret="test")
+    manager.RECONNECT_DELAY_MIN = manager.RECONNECT_DELAY_MAX = 0.001
+    session = manager._sessions[0]
+    session.connect_count = connect_count
+    calls = []
+
+    async def refuse(session):
+        calls.append(session.index)
+        if len(calls) >= attempts:
+            manager._running = False
+        raise OSError("Connection refused")
+
+    manager._connect_and_listen = refuse
+    manager._running = True
+    asyncio.run(manager._run_session(session))
+    assert len(calls) == attempts
+    return session
+
+
+def test_first_connect_failure_is_not_an_outage():
+    session = _run_failing_session(connect_count=0)
+    assert session.dropped_ns == 0
+    assert session.failures == 2
+
+
+def test_reconnect_failure_keeps_outage_start():
+    session = _run_failing_session(connect_count=1)
+    assert session.dropped_ns > 0
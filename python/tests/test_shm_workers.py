@@ -0,0 +1,120 @@
+"""workers 모드: 워커 프로세스 분봉 집계, 공유 메모리 세그먼트 이름, 잘못된 프레임 처리"""
+
+import itertools
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from candle_shm import SharedCandleReader, ShmWorkerPool
+from kis_simulator import make_frame, make_record
+from realtime_candle import RealtimeCandleManager, to_epoch_minute
+
+_ids = itertools.count()
+
+
+@pytest.fixture
+def prefix():
+    return f"kctest_{os.getpid()}_{next(_ids)}"
+
+
+def _shutdown(pool):
+    pool.shutdown()
+    pool._release_readers()
+
+
+def test_workers_aggregate_minute_bars(prefix):
+    codes = [f"{i:06d}" for i in range(6)]
+    manager = RealtimeCandleManager(
+        app_key="test", app_secret="test", workers=2, auto_close=False, shm_prefix=prefix
+    )
+    assert manager.shm_prefix == prefix
+    for code in codes:
+        manager.add_stock(code)
+    pool = manager._pool
+    pool.start()
+    try:
+        # 09:00 ~ 09:02, 프레임마다 전 종목 레코드 (워커별로 나눠 다시 만들어짐)
+        for minute in range(3):
+            for second in (0, 30):
+                hhmmss = f"09{minute:02d}{second:02d}"
+                manager._parse_tick(make_frame(
+                    [make_record(code, hhmmss, 1000 + i + minute, 10 + i) for i, code in enumerate(codes)]
+                ))
+        pool.flush()
+        today = datetime.now().replace(hour=9, minute=3, second=0, microsecond=0)
+        manager._close_candles(to_epoch_minute(today))
+
+        closed = []
+        deadline = time.monotonic() + 10
+        while len(closed) < len(codes) * 3 and time.monotonic() < deadline:
+            closed.extend(pool.get_closed(timeout=0.5) or [])
+        assert len(closed) == len(codes) * 3
+        assert pool.stats["frames_split"] > 0
+
+        for i, code in enumerate(codes):
+            # 다른 프로세스처럼 prefix로 붙어서 읽기
+            reader = SharedCandleReader.attach(code, manager.shm_prefix)
+            try:
+                view = reader.get_history()
+                assert [bar.dt.minute for bar in view] == [0, 1, 2]
+                assert [bar.volume for bar in view] == [2 * (10 + i)] * 3
+                assert [bar.close for bar in view] == [1000.0 + i + m for m in range(3)]
+            finally:
+                reader.release()
+    finally:
+        _shutdown(pool)
+
+
+def test_default_prefix_is_per_process():
+    pool = ShmWorkerPool(1, 10)
+    assert pool.prefix == f"kiscandle_{os.getpid()}"
+
+
+def test_existing_segment_is_not_unlinked(prefix):
+    running = ShmWorkerPool(1, 10, prefix=prefix)
+    other = ShmWorkerPool(1, 10, prefix=prefix)
+    try:
+        live = running.add_stock("005930")
+        with pytest.raises(FileExistsError):
+            other.add_stock("005930")
+        # 실행 중인 풀의 세그먼트는 그대로 붙을 수 있다
+        reader = SharedCandleReader.attach("005930", prefix)
+        reader.release()
+        assert live.get_current() is None
+    finally:
+        _shutdown(other)
+        _shutdown(running)
+
+
+def test_cleanup_stale_recreates_segment(prefix):
+    crashed = ShmWorkerPool(1, 10, prefix=prefix)
+    crashed.add_stock("005930")
+    try:
+        fresh = ShmWorkerPool(1, 20, prefix=prefix, cleanup_stale=True)
+        try:
+            assert fresh.add_stock("005930").max_history == 20
+        finally:
+            _shutdown(fresh)
+    finally:
+        crashed._release_readers()
+        for shm in crashed._segments.values():
+            shm.close()
+
+
+def test_submit_drops_malformed_frames(prefix):
+    pool = ShmWorkerPool(2, 10, prefix=prefix)
+    try:
+        for code in ("005930", "000660"):
+            pool.add_stock(code)
+        a = make_record("005930", "090000", 70000, 1)
+        b = make_record("000660", "090000", 180000, 1)
+        pool.submit("0|H0STCNT0|001|005930")                  # 구분자 없음
+        pool.submit(make_frame([a, b]).replace("|002|", "|003|"))  # 필드 수 ≠ 레코드 수 × 폭
+        pool.submit("0|H0STCNT0|002|" + "^".join([a, b[:20]]))   # 레코드 폭 불일치
+        pool.submit(make_frame([a, b]))
+        assert pool.stats["frames_invalid"] == 3
+        assert pool.stats["frames_routed"] == 1
+    finally:
+        _shutdown(pool)
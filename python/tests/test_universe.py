@@ -0,0 +1,84 @@
+"""종목 제거 시 미완성 캔들 마감(persist)과 저장소 파일 정리"""
+
+import asyncio
+import threading
+from datetime import datetime
+
+from candle_store import CandleStore
+from realtime_candle import RealtimeCandleManager, to_epoch_second
+
+
+def _manager(root):
+    manager = RealtimeCandleManager(
+        app_key="test", app_secret="test", auto_close=False, store=CandleStore(root)
+    )
+    closed, batches = [], []
+    manager.on_candle_closed = closed.append
+    manager.on_candles_closed = batches.append
+    return manager, closed, batches
+
+
+def _trade(manager, code, price, qty):
+    second = to_epoch_second(datetime.now().replace(hour=9, minute=1, second=10, microsecond=0))
+    manager.get_buffer(code).on_ticks([(price, qty, second)])
+
+
+def test_persist_emits_forced_close(tmp_path):
+    manager, closed, batches = _manager(str(tmp_path))
+    for code in ("005930", "000660"):
+        manager.add_stock(code)
+        _trade(manager, code, 100.0, 5)
+
+    manager.set_universe(["000660"])
+
+    assert [bar.stock_code for bar in closed] == ["005930"]
+    assert [len(batch) for batch in batches] == [1]
+    assert manager.stats["total_candles_closed"] == 1
+    stored = manager.store.read("005930", closed[0].dt)
+    assert [(bar.dt, bar.volume) for bar in stored] == [(closed[0].dt, 5)]
+    assert manager.store.stats["open_files"] == 0  # 제거 종목 파일은 닫힘 (남은 종목은 아직 기록 없음)
+    manager.store.close()
+
+
+def test_no_persist_drops_current(tmp_path):
+    manager, closed, _ = _manager(str(tmp_path))
+    manager.add_stock("005930")
+    _trade(manager, "005930", 100.0, 5)
+
+    manager.remove_stock("005930", persist=False)
+
+    assert closed == []
+    assert len(manager.store.read("005930")) == 0
+    manager.store.close()
+
+
+def test_release_runs_in_executor_on_loop(tmp_path):
+    manager, closed, _ = _manager(str(tmp_path))
+    codes = [f"{i:06d}" for i in range(20)]
+    threads = []
+    release_many = manager.store.release_many
+
+    def recording(stock_codes):
+        threads.append((threading.current_thread(), list(stock_codes)))
+        release_many(stock_codes)
+
+    manager.store.release_many = recording
+
+    async def run():
+        for code in codes:
+            manager.add_stock(code)
+            _trade(manager, code, 100.0, 1)
+        manager.set_universe(codes[:5])
+        assert len(closed) == 15
+        for _ in range(100):
+            if threads:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert len(threads) == 1  # 한 번에 묶어서
+    thread, released = threads[0]
+    assert thread is not threading.main_thread()
+    assert sorted(released) == codes[5:]
+    assert manager.store.stats["open_files"] == 0
+    manager.store.close()
@@ -0,0 +1,309 @@
+"""
+원본 체결 프레임 저널 (기록·재생)
+
+RealtimeCandleManager(journal=TickJournalWriter(...))로 연결하면 수신한
+실시간 프레임을 수신 시각과 함께 압축·청크 단위 append-only 파일에 기록합니다.
+JournalReplay는 기록된 프레임을 같은 순서로 _parse_tick에 다시 넣어
+실시간 / N배속 / 최대 속도로 세션을 재현합니다 (실 KIS 접속 불필요).
+
+파일 레이아웃 (리틀 엔디언):
+  파일 헤더 8바이트 : MAGIC
+  청크 헤더 28바이트: payload_len(uint32) n_frames(uint32)
+                      first_ns(int64) last_ns(int64) crc32(uint32)
+  청크 본문          : zlib 압축된 [recv_ns(int64) len(uint32) frame(utf-8)] * n_frames
+쓰기 도중 종료되어 남은 불완전한 마지막 청크는 읽을 때 경고 후 무시합니다.
+
+재생은 결정적입니다: 체결시각(HHMMSS)의 날짜는 재생하는 날이 아니라 저널의
+수신 시각으로 정하고(매니저·디코더의 SessionDate를 재생 동안 바꿔 끼움),
+auto_close 매니저는 벽시계 대신 저널의 수신 시각을 기준으로 분 경계 +
+close_grace마다 _close_candles를 호출하고 저널 끝에서 마지막 분까지 마감하므로,
+같은 저널은 재생 날짜·속도와 관계없이 항상 같은 분봉을 만듭니다 (workers 모드는
+워커가 벽시계 날짜를 씀).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, Optional, Union
+
+from realtime_candle import SessionDate, to_epoch_minute
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KISTJ001"
+CHUNK_HEADER = struct.Struct("<IIqqI")
+FRAME_HEADER = struct.Struct("<qI")
+
+
+# ──────────────────────────────────────────────
+# 기록
+# ──────────────────────────────────────────────
+class TickJournalWriter:
+    """
+    수신 프레임 저널 기록기.
+    record()는 메모리 청크에 추가만 하고, 청크가 chunk_frames개 또는
+    chunk_seconds초를 넘으면 압축·쓰기를 전용 스레드 1개에 넘긴다
+    (수신 루프를 막지 않으며 청크 순서는 보장된다).
+
+    Parameters
+    ----------
+    path : str
+        저널 파일 경로 (있으면 끝에 이어서 기록)
+    chunk_frames : int
+        청크당 최대 프레임 수
+    chunk_seconds : float
+        청크를 닫는 최대 경과 시간(초, 수신 시각 기준)
+    level : int
+        zlib 압축 레벨
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_frames: int = 4096,
+        chunk_seconds: float = 1.0,
+        level: int = 6,
+    ):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.chunk_ns = int(chunk_seconds * 1e9)
+        self.level = level
+        self._frames: list[tuple[int, Union[str, bytes]]] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self.frames_written = 0
+        self.chunks_written = 0
+        self.bytes_raw = 0
+        self.bytes_written = 0
+
+    def record(self, raw: Union[str, bytes], recv_ns: Optional[int] = None) -> None:
+        """프레임 1개 기록 (raw: str 또는 UTF-8 bytes, recv_ns: 수신 시각 ns, 생략 시 현재 시각)"""
+        if recv_ns is None:
+            recv_ns = time.time_ns()
+        with self._lock:
+            frames = self._frames
+            frames.append((recv_ns, raw))
+            if (
+                len(frames) >= self.chunk_frames
+                or recv_ns - frames[0][0] >= self.chunk_ns
+            ):
+                self._frames = []
+                self._executor.submit(self._write_chunk, frames)
+
+    def flush(self, wait: bool = True) -> None:
+        """대기 중인 프레임을 청크로 내보냄 (wait=True면 쓰기 완료까지 대기)"""
+        with self._lock:
+            frames, self._frames = self._frames, []
+            future = self._executor.submit(self._write_chunk, frames) if frames else None
+        if wait:
+            if future is not None:
+                future.result()
+            self._executor.submit(self._file.flush).result()
+
+    def close(self) -> None:
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self._file.close()
+
+    def _write_chunk(self, frames: list[tuple[int, Union[str, bytes]]]) -> None:
+        """청크 압축·기록 (journal 스레드)"""
+        parts = []
+        for recv_ns, raw in frames:
+            data = raw if isinstance(raw, bytes) else raw.encode("utf-8")
+            parts.append(FRAME_HEADER.pack(recv_ns, len(data)))
+            parts.append(data)
+        body = b"".join(parts)
+        payload = zlib.compress(body, self.level)
+        try:
+            self._file.write(CHUNK_HEADER.pack(
+                len(payload), len(frames), frames[0][0], frames[-1][0],
+                zlib.crc32(payload),
+            ))
+            self._file.write(payload)
+        except (OSError, ValueError) as e:
+            logger.error(f"저널 기록 실패 ({len(frames)}개 프레임 유실): {e}")
+            return
+        self.frames_written += len(frames)
+        self.chunks_written += 1
+        self.bytes_raw += len(body)
+        self.bytes_written += CHUNK_HEADER.size + len(payload)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "frames_written": self.frames_written,
+            "chunks_written": self.chunks_written,
+            "pending_frames": len(self._frames),
+            "compression_ratio": (
+                round(self.bytes_raw / self.bytes_written, 2) if self.bytes_written else None
+            ),
+        }
+
+
+# ──────────────────────────────────────────────
+# 읽기
+# ──────────────────────────────────────────────
+def read_journal(path: str) -> Iterator[tuple[int, str]]:
+    """저널 파일 → (recv_ns, frame) 순서대로 (손상·불완전 청크에서 멈춤)"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"저널 파일 형식 불일치: {path}")
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if not header:
+                return
+            if len(header) < CHUNK_HEADER.size:
+                logger.warning(f"저널 꼬리 청크 헤더 불완전 → 무시: {path}")
+                return
+            payload_len, n_frames, _, _, crc = CHUNK_HEADER.unpack(header)
+            payload = f.read(payload_len)
+            if len(payload) < payload_len or zlib.crc32(payload) != crc:
+                logger.warning(f"저널 청크 손상/불완전 → 이후 무시: {path}")
+                return
+            body = zlib.decompress(payload)
+            pos = 0
+            for _ in range(n_frames):
+                recv_ns, size = FRAME_HEADER.unpack_from(body, pos)
+                pos += FRAME_HEADER.size
+                yield recv_ns, body[pos:pos + size].decode("utf-8")
+                pos += size
+
+
+# ──────────────────────────────────────────────
+# 재생
+# ──────────────────────────────────────────────
+class JournalReplay:
+    """
+    저널 프레임을 RealtimeCandleManager._parse_tick에 다시 넣는 재생기.
+
+    Parameters
+    ----------
+    path : str
+        저널 파일 경로
+    speed : float | None
+        1.0 = 기록 당시 속도, 10.0 = 10배속, None 또는 0 = 대기 없이 최대 속도
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = None):
+        self.path = path
+        self.speed = speed
+        self.frames = 0
+        self.elapsed = 0.0
+        self._now = 0.0  # 재생 중인 프레임의 수신 시각 (time.time() 단위)
+
+    def _pin_session_date(self, manager) -> list[tuple[object, SessionDate]]:
+        """
+        매니저와 등록 디코더의 체결시각 날짜 기준을 재생 중인 프레임의 수신 시각으로
+        고정. 반환값: 되돌릴 (객체, 원래 SessionDate) 목록
+        """
+        pinned = SessionDate(lambda: self._now)
+        previous = [(manager, manager._session_date)]
+        manager._session_date = pinned
+        for decoder in manager._decoders.values():
+            if isinstance(getattr(decoder, "session_date", None), SessionDate):
+                previous.append((decoder, decoder.session_date))
+                decoder.session_date = pinned
+        return previous
+
+    @staticmethod
+    def _restore_session_date(previous: list[tuple[object, SessionDate]]) -> None:
+        manager, session_date = previous[0]
+        manager._session_date = session_date
+        for decoder, session_date in previous[1:]:
+            decoder.session_date = session_date
+
+    def _boundary(self, manager, recv_ns: int) -> Optional[int]:
+        """recv_ns 시점에 마감해야 하는 epoch-minute (분 경계 + close_grace 기준)"""
+        if not manager.auto_close:
+            return None
+        ts = recv_ns / 1e9 - manager.close_grace
+        return to_epoch_minute(datetime.fromtimestamp(ts))
+
+    def run_sync(self, manager) -> int:
+        """최대 속도로 동기 재생 (이벤트 루프 불필요). 반환값: 재생한 프레임 수"""
+        parse = manager._parse_tick
+        closed_minute: Optional[int] = None
+        last_ns: Optional[int] = None
+        previous = self._pin_session_date(manager)
+        t0 = time.perf_counter()
+        try:
+            for recv_ns, raw in read_journal(self.path):
+                self._now = recv_ns / 1e9
+                closed_minute = self._close_due(manager, recv_ns, closed_minute)
+                parse(raw)
+                self.frames += 1
+                last_ns = recv_ns
+            self._close_final(manager, last_ns)
+        finally:
+            self._restore_session_date(previous)
+        self.elapsed = time.perf_counter() - t0
+        return self.frames
+
+    async def run(self, manager) -> int:
+        """
+        speed에 맞춰 비동기 재생. 기록 당시 프레임 간격을 speed로 나눈 만큼
+        기다리며, 다른 태스크(구독자 소비 등)에 제어를 넘긴다.
+        반환값: 재생한 프레임 수
+        """
+        parse = manager._parse_tick
+        dispatcher = manager._dispatcher
+        closed_minute: Optional[int] = None
+        first_ns: Optional[int] = None
+        last_ns: Optional[int] = None
+        previous = self._pin_session_date(manager)
+        t0 = time.perf_counter()
+        try:
+            for recv_ns, raw in read_journal(self.path):
+                if first_ns is None:
+                    first_ns = recv_ns
+                if self.speed:
+                    delay = (recv_ns - first_ns) / 1e9 / self.speed - (time.perf_counter() - t0)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif self.frames % 1024 == 0:
+                    await asyncio.sleep(0)
+                self._now = recv_ns / 1e9
+                closed_minute = self._close_due(manager, recv_ns, closed_minute)
+                parse(raw)
+                self.frames += 1
+                last_ns = recv_ns
+                if dispatcher.needs_drain:
+                    await dispatcher.drain()
+            self._close_final(manager, last_ns)
+        finally:
+            self._restore_session_date(previous)
+        self.elapsed = time.perf_counter() - t0
+        return self.frames
+
+    def _close_final(self, manager, last_ns: Optional[int]) -> None:
+        """
+        저널 끝: 마지막 프레임을 받은 분까지 마감 (auto_close일 때, 실시간에서는
+        다음 분 경계 + close_grace에 타이머가 닫았을 캔들)
+        """
+        if last_ns is None or not manager.auto_close:
+            return
+        manager._close_candles(to_epoch_minute(datetime.fromtimestamp(last_ns / 1e9)) + 1)
+
+    def _close_due(self, manager, recv_ns: int, closed_minute: Optional[int]) -> Optional[int]:
+        """저널 시각이 분 경계 + close_grace를 넘었으면 타이머 마감 실행"""
+        minute = self._boundary(manager, recv_ns)
+        if minute is not None and minute != closed_minute:
+            if closed_minute is not None:
+                manager._close_candles(minute)
+            return minute
+        return closed_minute